@@ -0,0 +1,117 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import aiofiles
+
+from db import logger
+from query_stats import query_tag
+
+BEST_AVAILABLE_PLATFORMS = ["ktc", "sf", "fc", "dd", "dp"]
+# Output order; the old templates sorted by player_position
+BEST_AVAILABLE_POSITIONS = ["QB", "RB", "TE", "WR"]
+
+# Per-position counts /best_available has always returned per platform
+DEFAULT_LIMITS = {"ktc": 7, "sf": 4, "fc": 5, "dd": 5, "dp": 5}
+
+VALUES_TTL_SECONDS = float(os.getenv("best_available_ttl_seconds", "900"))
+MAX_ROSTERED_LEAGUES = int(os.getenv("best_available_max_leagues", "5000"))
+# Bounds staleness when a league was refreshed through another worker
+ROSTERED_TTL_SECONDS = float(os.getenv("best_available_rostered_ttl_seconds", "300"))
+
+
+class BestAvailableIndex:
+    """Player values per platform, sorted by value within each position, and
+    the rostered player ids of recently refreshed leagues. Top-N free agents
+    is a walk down the sorted list skipping rostered ids."""
+
+    def __init__(self):
+        # (platform, rank_type, roster) -> {position: [(value, sleeper_id, full_name), ...]}
+        self.values = {}
+        self.loaded_at = {}
+        self.locks = {platform: asyncio.Lock() for platform in BEST_AVAILABLE_PLATFORMS}
+        # (session_id, league_id) -> (loaded_at, frozenset of sleeper ids), least recently used first
+        self.rostered = OrderedDict()
+
+    def invalidate(self, platform: str = None):
+        # Called after a ranks load; the next request reloads the values
+        for key in list(self.loaded_at):
+            if platform is None or key == platform:
+                del self.loaded_at[key]
+
+    async def ensure_values(self, db, platform: str):
+        loaded_at = self.loaded_at.get(platform)
+        if loaded_at is not None and time.monotonic() - loaded_at < VALUES_TTL_SECONDS:
+            return
+        async with self.locks[platform]:
+            loaded_at = self.loaded_at.get(platform)
+            if loaded_at is not None and time.monotonic() - loaded_at < VALUES_TTL_SECONDS:
+                return
+
+            sql_path = Path.cwd() / "sql" / "best_available" / "values" / f"{platform}.sql"
+            async with aiofiles.open(sql_path, mode='r') as values_file:
+                values_sql = await values_file.read()
+            with query_tag(f"best_available/values/{platform}"):
+                rows = await db.fetch(values_sql)
+
+            values = {}
+            for row in rows:
+                for roster in ("sf", "one_qb"):
+                    by_position = values.setdefault((platform, row["rank_type"], roster), {})
+                    by_position.setdefault(row["player_position"], []).append(
+                        (row[f"{roster}_value"], row["sleeper_id"], row["full_name"]))
+            for by_position in values.values():
+                for players in by_position.values():
+                    players.sort(key=lambda player: player[0], reverse=True)
+
+            for key in [key for key in self.values if key[0] == platform]:
+                del self.values[key]
+            self.values.update(values)
+            self.loaded_at[platform] = time.monotonic()
+            logger.info(f"Loaded best available values for {platform}: {len(rows)} rows")
+
+    async def load_rostered(self, db, session_id: str, league_id: str) -> frozenset:
+        rows = await db.fetch("""
+            SELECT player_id FROM dynastr.league_players
+            WHERE session_id = $1 AND league_id = $2;
+        """, session_id, league_id)
+        rostered = frozenset(row["player_id"] for row in rows)
+        key = (session_id, league_id)
+        self.rostered[key] = (time.monotonic(), rostered)
+        self.rostered.move_to_end(key)
+        while len(self.rostered) > MAX_ROSTERED_LEAGUES:
+            self.rostered.popitem(last=False)
+        return rostered
+
+    async def get_rostered(self, db, session_id: str, league_id: str) -> frozenset:
+        key = (session_id, league_id)
+        cached = self.rostered.get(key)
+        if cached is None or time.monotonic() - cached[0] >= ROSTERED_TTL_SECONDS:
+            return await self.load_rostered(db, session_id, league_id)
+        self.rostered.move_to_end(key)
+        return cached[1]
+
+    async def top_available(self, db, platform: str, rank_type: str, roster: str, session_id: str,
+                            league_id: str, limit: int = None, position: str = None) -> list:
+        await self.ensure_values(db, platform)
+        rostered = await self.get_rostered(db, session_id, league_id)
+        limit = limit or DEFAULT_LIMITS[platform]
+        by_position = self.values.get((platform, rank_type, roster), {})
+
+        results = []
+        for player_position in [position] if position else BEST_AVAILABLE_POSITIONS:
+            found = 0
+            for value, sleeper_id, full_name in by_position.get(player_position, []):
+                if found >= limit:
+                    break
+                if sleeper_id in rostered:
+                    continue
+                results.append({"sleeper_id": sleeper_id, "full_name": full_name,
+                                "player_position": player_position, "player_value": value})
+                found += 1
+        return results
+
+
+best_available_index = BestAvailableIndex()
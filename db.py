@@ -2,11 +2,37 @@ import asyncpg
 import os
 import asyncio
 import logging
-from fastapi import HTTPException 
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from itertools import cycle
+from typing import Optional
+from fastapi import HTTPException, Request
+from deadlines import statement_timeout_ms
+from query_stats import InstrumentedConnection, query_tag, record_pool_wait
 
 pool = None
 pool_lock = asyncio.Lock()
 
+# Read replicas, one pool per host listed in replica_hosts
+replica_pools = []
+replica_cycle = None
+replica_lock = asyncio.Lock()
+
+# Reads go to the primary when a replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("replica_max_lag_seconds", "5"))
+# How long a replica's measured lag is trusted before it is checked again
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("replica_lag_check_seconds", "2"))
+# How long a client keeps sending the WAL position of its last write. Reads
+# carrying it only go to a replica that has replayed up to that position.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("read_your_writes_seconds", "30"))
+WRITE_LSN_COOKIE = "last_write_lsn"
+WRITE_LSN_HEADER = "x-last-write-lsn"
+
+replica_lag = {}
+# Set per request by ReadYourWritesMiddleware; record_session_write marks it
+session_write = ContextVar("session_write", default=None)
+
 # Configure the logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('my_logger')
@@ -24,23 +50,242 @@ async def init_db_pool():
         user=user,
         password=password,
         ssl=sslmode,
-        command_timeout=60
+        command_timeout=60,
+        connection_class=InstrumentedConnection
     )
 
-async def get_db():
-    global pool
+
+async def init_replica_pools():
+    global replica_pools, replica_cycle
+    # replica_hosts is a comma separated host[:port] list; the other settings
+    # fall back to the primary's so a replica only needs its address.
+    replica_hosts = [h.strip() for h in os.getenv("replica_hosts", "").split(",") if h.strip()]
+    dbname = os.getenv("replica_dbname", os.getenv("dbname"))
+    user = os.getenv("replica_user", os.getenv("user"))
+    password = os.getenv("replica_password", os.getenv("password"))
+    sslmode = os.getenv("replica_sslmode", os.getenv("sslmode"))
+
+    pools = []
+    for replica_host in replica_hosts:
+        host, _, port = replica_host.partition(":")
+        try:
+            replica_pool = await asyncpg.create_pool(
+                host=host,
+                port=int(port) if port else None,
+                database=dbname,
+                user=user,
+                password=password,
+                ssl=sslmode,
+                command_timeout=60,
+                connection_class=InstrumentedConnection
+            )
+        except Exception as e:
+            logger.error(f"Failed to create replica pool for {replica_host}: {e}")
+            continue
+        pools.append(replica_pool)
+
+    replica_pools = pools
+    replica_cycle = cycle(pools) if pools else None
+
+
+def record_session_write(session_id: str):
+    # Called by write routes. The response then carries the primary's WAL
+    # position, which the client sends back on its reads, so any worker on
+    # any host can tell whether a replica has caught up with the write.
+    marker = session_write.get()
+    if session_id and marker is not None:
+        marker["wrote"] = True
+
+
+def parse_lsn(lsn: Optional[str]) -> Optional[int]:
+    # pg_lsn text form is two hex halves, e.g. 16/B374D848; None when the
+    # value is missing or malformed
     try:
-        if pool is None:
-            async with pool_lock:
-                if pool is None:
-                    await init_db_pool()
-        async with pool.acquire() as connection:
-            yield connection
+        high, low = lsn.split("/")
+        return (int(high, 16) << 32) + int(low, 16)
+    except (AttributeError, ValueError):
+        return None
+
+
+async def current_write_lsn(connection=None) -> str:
+    with query_tag("db/write_lsn"):
+        return await (connection or pool).fetchval("SELECT pg_current_wal_lsn()::text")
+
+
+async def get_replica_lag(replica_pool, force: bool = False) -> tuple:
+    # (lag seconds, replayed WAL position) of a replica
+    checked_at, lag, replay_lsn = replica_lag.get(id(replica_pool), (None, None, None))
+    if not force and checked_at is not None and time.monotonic() - checked_at < REPLICA_LAG_CHECK_SECONDS:
+        return lag, replay_lsn
+
+    # An idle primary stops advancing the replay timestamp, so a replica that
+    # has replayed everything it received counts as caught up.
+    lag_query = """
+        SELECT CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag_seconds
+        , pg_last_wal_replay_lsn()::text as replay_lsn
+    """
+    try:
+        row = await replica_pool.fetchrow(lag_query)
+        lag, replay_lsn = float(row["lag_seconds"]), parse_lsn(row["replay_lsn"])
+        if replay_lsn is None:
+            # Not in recovery, so it cannot show it replayed any write
+            logger.error(f"Replica reported no replay position: {row['replay_lsn']!r}")
+    except Exception as e:
+        logger.error(f"Failed to read replica lag: {e}")
+        lag, replay_lsn = float("inf"), None
+    replica_lag[id(replica_pool)] = (time.monotonic(), lag, replay_lsn)
+    return lag, replay_lsn
+
+
+def replayed(replay_lsn: Optional[int], min_lsn: Optional[int]) -> bool:
+    # No write to wait for, or a replica with no known position that cannot
+    # be trusted with one
+    if min_lsn is None:
+        return True
+    if replay_lsn is None:
+        return False
+    return replay_lsn >= min_lsn
+
+
+async def choose_read_pool(min_lsn: Optional[int] = None):
+    # min_lsn is the WAL position of the client's last write, if it sent one
+    if replica_cycle is None:
+        return pool
+    for _ in range(len(replica_pools)):
+        replica_pool = next(replica_cycle)
+        lag, replay_lsn = await get_replica_lag(replica_pool)
+        if lag > REPLICA_MAX_LAG_SECONDS:
+            continue
+        if not replayed(replay_lsn, min_lsn):
+            # The cached position may just be older than the write
+            lag, replay_lsn = await get_replica_lag(replica_pool, force=True)
+        if lag <= REPLICA_MAX_LAG_SECONDS and replayed(replay_lsn, min_lsn):
+            return replica_pool
+    return pool
+
+
+class ReadYourWritesMiddleware:
+    """Adds the primary's WAL position to responses of requests that called
+    record_session_write, as the X-Last-Write-LSN header and a cookie that
+    lasts READ_YOUR_WRITES_SECONDS. get_read_db reads either one back."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # A dict rather than a flag so a route running in a copied context
+        # still marks this request
+        marker = {"wrote": False}
+        token = session_write.set(marker)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and marker["wrote"] and message["status"] < 400:
+                try:
+                    lsn = await current_write_lsn()
+                except Exception as e:
+                    logger.error(f"Failed to read the write LSN: {e}")
+                    lsn = None
+                if lsn:
+                    cookie = (f"{WRITE_LSN_COOKIE}={lsn}; Max-Age={int(READ_YOUR_WRITES_SECONDS)}; Path=/; "
+                              "HttpOnly; Secure; SameSite=None")
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (WRITE_LSN_HEADER.encode(), lsn.encode()),
+                        (b"set-cookie", cookie.encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session_write.reset(token)
+
+
+async def ensure_pools():
+    if pool is None:
+        async with pool_lock:
+            if pool is None:
+                await init_db_pool()
+    if replica_cycle is None and os.getenv("replica_hosts"):
+        async with replica_lock:
+            if replica_cycle is None:
+                await init_replica_pools()
+
+
+@asynccontextmanager
+async def primary_connection():
+    # For read routes that occasionally need to write, without holding a
+    # primary connection on every request
+    await ensure_pools()
+    acquire_started = time.monotonic()
+    async with pool.acquire() as connection:
+        record_pool_wait(time.monotonic() - acquire_started)
+        await apply_statement_timeout(connection)
+        yield connection
+
+
+async def apply_statement_timeout(connection):
+    # Server-side backstop, set once per connection to what is left of the
+    # request deadline at acquisition; the pool runs RESET ALL on release.
+    # InstrumentedConnection bounds each statement by what is left when it
+    # starts, so later statements do not get the whole budget again.
+    timeout_ms = statement_timeout_ms()
+    if timeout_ms is not None:
+        with query_tag("db/statement_timeout"):
+            await connection.execute(f"SET statement_timeout = {timeout_ms}")
+
+
+async def acquire_connection(min_lsn: Optional[int] = None, primary: bool = False):
+    # Only pool setup and acquisition are reported as a connection error;
+    # whatever the route raises while holding the connection is left alone
+    try:
+        await ensure_pools()
+        target_pool = pool if primary else await choose_read_pool(min_lsn)
+        acquire_started = time.monotonic()
+        connection = await target_pool.acquire()
     except Exception as e:
         logger.error(f"Failed to acquire database connection: {e}")
         raise HTTPException(status_code=500, detail="Database connection error")
+    record_pool_wait(time.monotonic() - acquire_started)
+    return target_pool, connection
+
+
+async def get_db():
+    # Primary connection, used by routes that write
+    target_pool, connection = await acquire_connection(primary=True)
+    try:
+        await apply_statement_timeout(connection)
+        yield connection
+    finally:
+        await target_pool.release(connection)
+
+
+async def get_read_db(request: Request):
+    # Replica connection for read-only routes. Falls back to the primary when no
+    # replica is configured, every replica is lagging, or none has replayed
+    # the client's last write yet.
+    last_write_lsn = request.headers.get(WRITE_LSN_HEADER) or request.cookies.get(WRITE_LSN_COOKIE)
+    min_lsn = parse_lsn(last_write_lsn)
+    if last_write_lsn and min_lsn is None:
+        # The client did write but its position is unreadable, so only the
+        # primary is sure to have the write
+        logger.info(f"Malformed last write LSN {last_write_lsn!r}, reading from the primary")
+        read_pool, connection = await acquire_connection(primary=True)
+    else:
+        read_pool, connection = await acquire_connection(min_lsn)
+    try:
+        await apply_statement_timeout(connection)
+        yield connection
+    finally:
+        await read_pool.release(connection)
 
 
 async def close_db():
-    global pool
     await pool.close()
+    for replica_pool in replica_pools:
+        await replica_pool.close()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+logger = logging.getLogger('my_logger')
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("request_deadline_seconds", "30"))
+
+# Per-route budgets, in seconds, for routes that differ from the default
+ROUTE_DEADLINES = {
+    "/roster": float(os.getenv("roster_deadline_seconds", "60")),
+    "/roster/stream": float(os.getenv("roster_deadline_seconds", "60")) + 30,
+    "/refresh_all": float(os.getenv("refresh_all_deadline_seconds", "180")),
+    "/players/sync": 300,
+    # Batch jobs called after a ranks or projections load
+    "/trade_rollups/revalue": 300,
+    "/projections/refresh": 300,
+    "/user_details": 20,
+    "/league_history": 60,
+    "/league_history/refresh": 60,
+    "/leagues": 10,
+    "/get_user": 10,
+    "/league_summary": 20,
+    "/league_detail": 20,
+    "/trades_detail": 20,
+    "/trades_summary": 20,
+    "/value_history": 10,
+    "/best_available": 10,
+    "/trade_evaluate": 10,
+    "/v1/rankings": 10,
+}
+
+# Statements are not started with less than this left, and never get a
+# statement_timeout below it
+MIN_STATEMENT_TIMEOUT_SECONDS = 0.5
+
+current_deadline = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when there is no time left in the request's budget."""
+
+
+def start_deadline(budget: float = None):
+    # For tasks that outlive the request that started them: create_task copies
+    # the request's context, deadline included, into the new task
+    current_deadline.set(None if budget is None else time.monotonic() + budget)
+
+
+def remaining() -> float:
+    # Seconds left in the current request's budget, None outside a request
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline():
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def bounded_timeout(timeout: float) -> float:
+    # Shrinks a per-call timeout to what is left of the request budget
+    check_deadline()
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(min(timeout, left), 0.001)
+
+
+def statement_timeout_ms() -> int:
+    left = remaining()
+    if left is None:
+        return None
+    return int(max(left, MIN_STATEMENT_TIMEOUT_SECONDS) * 1000)
+
+
+class DeadlineMiddleware:
+    """Gives every request a deadline and cancels it when the deadline passes
+    or the client disconnects. The deadline is visible to Sleeper calls and
+    SQL through current_deadline."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        budget = ROUTE_DEADLINES.get(scope["path"], DEFAULT_DEADLINE_SECONDS)
+        token = current_deadline.set(time.monotonic() + budget)
+
+        body_received = asyncio.Event()
+        response_started = False
+        if scope["method"] in ("GET", "HEAD"):
+            body_received.set()
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                body_received.set()
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        async def wait_for_disconnect():
+            # Once the body has been read the server only sends http.disconnect
+            await body_received.wait()
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+
+        app_task = asyncio.create_task(self.app(scope, receive_wrapper, send_wrapper))
+        disconnect_task = asyncio.create_task(wait_for_disconnect())
+        try:
+            done, _ = await asyncio.wait(
+                {app_task, disconnect_task}, timeout=budget, return_when=asyncio.FIRST_COMPLETED
+            )
+            if app_task in done:
+                return app_task.result()
+
+            app_task.cancel()
+            await asyncio.gather(app_task, return_exceptions=True)
+            if disconnect_task in done:
+                logger.info(f"Client disconnected, cancelled {scope['path']}")
+                return
+            logger.error(f"Deadline of {budget}s exceeded, cancelled {scope['path']}")
+            if not response_started:
+                body = json.dumps({"detail": "Request deadline exceeded"}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+        finally:
+            disconnect_task.cancel()
+            current_deadline.reset(token)
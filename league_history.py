@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import aiofiles
+
+from db import logger
+from query_stats import query_tag
+from sleeper_client import SLEEPER_API
+from utils import make_api_call
+
+# The current season is refetched when its stored copy is older than this
+CURRENT_SEASON_TTL_SECONDS = float(os.getenv("league_history_ttl_seconds", "3600"))
+MAX_HISTORY_SEASONS = 50
+REGULAR_AND_PLAYOFF_WEEKS = 18
+
+
+async def stored_seasons(db, league_id: str) -> dict:
+    # The chain as far as it is already stored, keyed by league_id
+    rows = await db.fetch("""
+        WITH RECURSIVE chain AS (
+            SELECT league_id, previous_league_id, completed, fetched_at, 0 as depth
+            FROM dynastr.league_seasons WHERE league_id = $1
+            UNION ALL
+            SELECT ls.league_id, ls.previous_league_id, ls.completed, ls.fetched_at, chain.depth + 1
+            FROM dynastr.league_seasons ls
+            INNER JOIN chain on ls.league_id = chain.previous_league_id
+            WHERE chain.depth < $2
+        )
+        SELECT league_id, previous_league_id, completed, extract(epoch from now() - fetched_at) as age_seconds
+        FROM chain;
+    """, league_id, MAX_HISTORY_SEASONS)
+    return {row["league_id"]: row for row in rows}
+
+
+async def fetch_season(league: dict) -> dict:
+    # Everything stored for one season, fetched concurrently
+    league_id = league["league_id"]
+
+    async def week_trades(week):
+        transactions = await make_api_call(f"{SLEEPER_API}/league/{league_id}/transactions/{week}") or []
+        return [dict(t, week=week) for t in transactions if t["type"] == "trade" and t["status"] == "complete"]
+
+    async def draft_picks():
+        drafts = await make_api_call(f"{SLEEPER_API}/league/{league_id}/drafts") or []
+        picks = await asyncio.gather(*[make_api_call(f"{SLEEPER_API}/draft/{d['draft_id']}/picks") for d in drafts])
+        return [pick for draft_picks in picks for pick in (draft_picks or [])]
+
+    users, rosters, picks, *weeks = await asyncio.gather(
+        make_api_call(f"{SLEEPER_API}/league/{league_id}/users"),
+        make_api_call(f"{SLEEPER_API}/league/{league_id}/rosters"),
+        draft_picks(),
+        *[week_trades(week) for week in range(1, REGULAR_AND_PLAYOFF_WEEKS + 1)],
+    )
+    return {
+        "league": league,
+        "users": users or [],
+        "rosters": rosters or [],
+        "trades": [trade for week in weeks for trade in week],
+        "draft_picks": picks,
+    }
+
+
+async def store_season(db, season: dict):
+    league = season["league"]
+    league_id = league["league_id"]
+    names = {u["user_id"]: u.get("display_name") for u in season["users"]}
+
+    async with db.transaction():
+        # Replacing the season cascades to its rosters, trades and picks
+        await db.execute("DELETE FROM dynastr.league_seasons WHERE league_id = $1", league_id)
+        await db.execute("""
+            INSERT INTO dynastr.league_seasons (league_id, previous_league_id, season, league_name, status,
+                                                total_rosters, completed, fetched_at)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, now());
+        """, league_id, league.get("previous_league_id"), str(league["season"]), league.get("name"),
+            league.get("status"), league.get("total_rosters"), league.get("status") == "complete")
+
+        await db.executemany("""
+            INSERT INTO dynastr.league_season_rosters (league_id, roster_id, owner_id, display_name,
+                                                       wins, losses, ties, fpts, players)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9);
+        """, [(league_id, r["roster_id"], r.get("owner_id"), names.get(r.get("owner_id")),
+               r.get("settings", {}).get("wins"), r.get("settings", {}).get("losses"),
+               r.get("settings", {}).get("ties"),
+               Decimal(r.get("settings", {}).get("fpts", 0)) + Decimal(r.get("settings", {}).get("fpts_decimal", 0)) / 100,
+               json.dumps(r.get("players") or [])) for r in season["rosters"]])
+
+        await db.executemany("""
+            INSERT INTO dynastr.league_season_trades (league_id, transaction_id, status_updated, week,
+                                                      roster_ids, adds, drops, draft_picks)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+            ON CONFLICT DO NOTHING;
+        """, [(league_id, str(t["transaction_id"]), t.get("status_updated"), t["week"],
+               json.dumps(t.get("roster_ids")), json.dumps(t.get("adds")), json.dumps(t.get("drops")),
+               json.dumps(t.get("draft_picks"))) for t in season["trades"]])
+
+        await db.executemany("""
+            INSERT INTO dynastr.league_season_draft_picks (league_id, draft_id, pick_no, round, roster_id,
+                                                           picked_by, player_id, player_name, position)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            ON CONFLICT DO NOTHING;
+        """, [(league_id, str(p["draft_id"]), p["pick_no"], p.get("round"), p.get("roster_id"),
+               p.get("picked_by"), p.get("player_id"),
+               " ".join(filter(None, [p.get("metadata", {}).get("first_name"), p.get("metadata", {}).get("last_name")])) or None,
+               p.get("metadata", {}).get("position")) for p in season["draft_picks"]])
+
+
+async def refresh_league_history(db, league_id: str, force: bool = False) -> dict:
+    # Walks previous_league_id from league_id. Completed seasons already stored
+    # are followed from the database without touching Sleeper; every other
+    # season is fetched as soon as its league object is known, so the data
+    # fetches overlap the rest of the walk.
+    with query_tag("league_history/chain", league_id):
+        stored = await stored_seasons(db, league_id)
+
+    fetches = []
+    current_id = league_id
+    for _ in range(MAX_HISTORY_SEASONS):
+        if not current_id:
+            break
+        known = stored.get(current_id)
+        if known is not None and known["completed"]:
+            current_id = known["previous_league_id"]
+            continue
+        if known is not None and not force and known["age_seconds"] < CURRENT_SEASON_TTL_SECONDS:
+            current_id = known["previous_league_id"]
+            continue
+        league = await make_api_call(f"{SLEEPER_API}/league/{current_id}")
+        if not league:
+            break
+        fetches.append(asyncio.create_task(fetch_season(league)))
+        current_id = league.get("previous_league_id")
+        if current_id in ("0", ""):
+            current_id = None
+
+    started = time.monotonic()
+    seasons = await asyncio.gather(*fetches)
+    with query_tag("league_history/store", league_id):
+        for season in seasons:
+            await store_season(db, season)
+    logger.info(f"League history for {league_id}: fetched {len(seasons)} seasons in {time.monotonic() - started:.2f}s")
+    return {"league_id": league_id, "fetched": [s["league"]["league_id"] for s in seasons]}
+
+
+async def read_league_history(db, league_id: str) -> list:
+    sql_path = Path.cwd() / "sql" / "leagues" / "league_history.sql"
+    async with aiofiles.open(sql_path, mode='r') as history_file:
+        history_sql = await history_file.read()
+        history_sql = history_sql.replace("'league_id'", "$1")
+    with query_tag("leagues/league_history", league_id):
+        rows = await db.fetch(history_sql, league_id)
+    return [
+        dict(row, rosters=json.loads(row["rosters"]), trades=json.loads(row["trades"]),
+             draft_picks=json.loads(row["draft_picks"]))
+        for row in rows
+    ]
+
+
+async def current_season_stale(db, league_id: str) -> bool:
+    row = await db.fetchrow("""
+        SELECT completed, extract(epoch from now() - fetched_at) as age_seconds
+        FROM dynastr.league_seasons WHERE league_id = $1;
+    """, league_id)
+    return row is None or (not row["completed"] and row["age_seconds"] >= CURRENT_SEASON_TTL_SECONDS)
@@ -1,18 +1,43 @@
-from itsdangerous import URLSafeTimedSerializer
-from fastapi import FastAPI, Request, Response, HTTPException
-from fastapi import FastAPI, Depends
-from psycopg2 import extras
+import time
+# Taken before anything heavy is imported, for the worker's cold-start report
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Depends, Request, Response, HTTPException
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import aiofiles
+import asyncio
+import os
+import resource
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
 
 # UTILS
-from db import init_db_pool, close_db, get_db
-from superflex_models import UserDataModel, LeagueDataModel, RosterDataModel, RanksDataModel
-from utils import (get_user_id, insert_current_leagues, player_manager_rosters, insert_ranks_summary)
+from db import (init_db_pool, init_replica_pools, close_db, get_db, get_read_db, record_session_write,
+                primary_connection, ReadYourWritesMiddleware, logger)
+from session_lifecycle import run_session_sweeper, rehydrate_session
+from sleeper_client import sleeper_client
+from deadlines import DeadlineMiddleware
+from profiler import ProfilingMiddleware, admin_authorized, list_profiles, read_profile
+from query_stats import query_tag, query_percentiles
+from payloads import loop_lag_monitor, shutdown_executor
+from refresh_progress import get_or_start_refresh, refresh_all, sse_stream
+from best_available import best_available_index, BEST_AVAILABLE_PLATFORMS, BEST_AVAILABLE_POSITIONS
+from player_sync import sync_players
+from league_history import current_season_stale, read_league_history, refresh_league_history
+from value_history import (append_value_history, history_asset_key, trade_date, value_trend, values_at,
+                           VALUE_HISTORY_SOURCES, MAX_TREND_DAYS)
+from trade_values import trade_value_index, TRADE_VALUE_PLATFORMS, MAX_TRADES_PER_REQUEST
+from superflex_models import (UserDataModel, RosterDataModel, RanksDataModel, LeagueRanksDataModel,
+                               RefreshAllDataModel, TradeEvaluateDataModel)
+from utils import (get_user_id, insert_current_leagues, insert_ranks_summary,
+                   insert_league_ranks_summary, refresh_projection_index, update_trade_rollups, refresh_consensus_values,
+                   build_rankings_query, decode_rankings_cursor, encode_rankings_cursor, CONTENDER_SOURCES,
+                   TRADE_ROLLUP_PLATFORMS, RANKINGS_FIELDS, RANKINGS_MAX_LIMIT)
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,6 +47,12 @@ origins = [
 ]
 
 app = FastAPI()
+# Stamps write responses with the primary's WAL position for get_read_db
+app.add_middleware(ReadYourWritesMiddleware)
+# Inside the deadline middleware, so it runs in the task that may be cancelled
+app.add_middleware(ProfilingMiddleware)
+# Added before CORS so a 504 from an expired deadline still gets CORS headers
+app.add_middleware(DeadlineMiddleware)
 # Add CORSMiddleware to the application instance
 app.add_middleware(
     CORSMiddleware,
@@ -29,28 +60,83 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "Link", "X-Last-Write-LSN"],  # /v1/rankings paging, read-your-writes
 )
 
 #initialize the db pool
 @app.on_event("startup")
 async def startup_event():
     await init_db_pool()
+    await init_replica_pools()
+    app.state.session_sweeper = asyncio.create_task(run_session_sweeper())
+    loop_lag_monitor.start()
+    # Workers are recycled every max_requests, so this is paid continuously
+    app.state.startup = {
+        "pid": os.getpid(),
+        "import_ms": round(IMPORT_SECONDS * 1000, 1),
+        "ready_ms": round((time.perf_counter() - IMPORT_STARTED) * 1000, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    logger.info(f"Worker cold start: {app.state.startup}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.session_sweeper.cancel()
+    loop_lag_monitor.stop()
+    shutdown_executor()
+    await sleeper_client.close()
     await close_db()
 
 
+@app.get("/health")
+async def health():
+    return {"status": "ok", "startup": getattr(app.state, "startup", None)}
+
+
 # POST ROUTES
 @app.post("/user_details")
 async def user_details(user_data: UserDataModel, db=Depends(get_db)):
+    record_session_write(user_data.guid)
     return await insert_current_leagues(db, user_data)
 
 
 @app.post("/roster")
-async def roster(roster_data: RosterDataModel, db=Depends(get_db)):
+async def roster(roster_data: RosterDataModel):
     print('attempt rosters')
-    return await player_manager_rosters(db, roster_data)
+    record_session_write(roster_data.guid)
+    # A retried POST joins the refresh already running for this league
+    return await get_or_start_refresh(roster_data).wait()
+
+
+@app.post("/refresh_all")
+async def refresh_all_leagues(refresh_data: RefreshAllDataModel):
+    record_session_write(refresh_data.guid)
+    league_ids = refresh_data.league_ids
+    if league_ids is None:
+        # Read from the primary, /user_details has only just written them
+        async with primary_connection() as db:
+            rows = await db.fetch("""
+                SELECT DISTINCT league_id FROM dynastr.current_leagues
+                WHERE session_id = $1 AND user_id = $2 AND league_year = $3;
+            """, refresh_data.guid, refresh_data.user_id, refresh_data.league_year)
+        league_ids = [row["league_id"] for row in rows]
+    return await refresh_all(refresh_data.guid, refresh_data.user_id, refresh_data.league_year, league_ids)
+
+
+@app.get("/roster/stream")
+async def roster_stream(request: Request, league_id: str, user_id: str, guid: str, league_year: str):
+    roster_data = RosterDataModel(league_id=league_id, user_id=user_id, guid=guid, league_year=league_year)
+    record_session_write(guid)
+    progress = get_or_start_refresh(roster_data)
+
+    # EventSource resends the last id it saw when it reconnects
+    last_event_id = request.headers.get("last-event-id", "0")
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else 0
+    return StreamingResponse(
+        sse_stream(progress, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/ranks_summary")
@@ -59,11 +145,58 @@ async def ranks_summary(ranks_data: RanksDataModel, db=Depends(get_db)):
     return await insert_ranks_summary(db, ranks_data)
 
 
+@app.post("/league_ranks_summary")
+async def league_ranks_summary(league_ranks_data: LeagueRanksDataModel, db=Depends(get_db)):
+    record_session_write(league_ranks_data.guid)
+    return await insert_league_ranks_summary(db, league_ranks_data.league_id, league_ranks_data.guid)
+
+
+@app.post("/projections/refresh")
+async def projections_refresh(db=Depends(get_db)):
+    return await refresh_projection_index(db)
+
+
+@app.post("/players/sync")
+async def players_sync(db=Depends(get_db)):
+    # Daily refresh of dynastr.players from Sleeper's player dump
+    stats = await sync_players(db)
+    trade_value_index.sleeper_loaded_at = None
+    return stats
+
+
+@app.post("/trade_rollups/revalue")
+async def trade_rollups_revalue(platform: Optional[str] = None, db=Depends(get_db)):
+    # Called after a ranks load so every rolled up trade picks up new values
+    if platform is not None and platform not in TRADE_ROLLUP_PLATFORMS:
+        raise HTTPException(status_code=404, detail="Unknown platform")
+    async with db.transaction():
+        rows = await update_trade_rollups(db, platforms=[platform] if platform else None)
+    best_available_index.invalidate(platform)
+    trade_value_index.invalidate(platform)
+    result = {"platform": platform, "rows": rows}
+
+    # The rollups are committed by now, so a failure in the steps below is
+    # reported rather than turned into a 500; the next revalue redoes both
+    try:
+        # Any source's new ranks move the consensus
+        result["consensus_rows"] = await refresh_consensus_values(db)
+        trade_value_index.invalidate("consensus")
+    except Exception as e:
+        logger.error(f"Consensus rebuild after revalue failed: {e!r}")
+        result["consensus_error"] = str(e)
+    try:
+        result["history_rows"] = await append_value_history(db)
+    except Exception as e:
+        logger.error(f"Value history append after revalue failed: {e!r}")
+        result["history_error"] = str(e)
+    return result
+
+
 # GET ROUTES
 @app.get("/leagues")
-async def leagues(league_year: str, user_name: str, guid: str, db=Depends(get_db)):
-    # Get the user_id (ensure get_user_id is also an async function)
-    user_id = await get_user_id(user_name)
+async def leagues(league_year: str, user_name: str, guid: str, db=Depends(get_read_db)):
+    # Get the user_id, served from the users cache when it has been resolved before
+    user_id = await get_user_id(user_name, db)
     session_id = guid
 
     # Assemble the SQL file path
@@ -80,18 +213,81 @@ async def leagues(league_year: str, user_name: str, guid: str, db=Depends(get_db
                            .replace("'league_year'", f"'{league_year}'"))
 
     # Execute the query asynchronously and fetch results
-    results = await db.fetch(get_leagues_sql)
+    with query_tag("leagues/get_leagues"):
+        results = await db.fetch(get_leagues_sql)
+    if not results:
+        # Expired or new session: copy the user's newest session before
+        # falling back to a full re-ingest by the client
+        async with primary_connection() as primary:
+            if await rehydrate_session(primary, session_id, user_id, league_year):
+                record_session_write(session_id)
+                results = await primary.fetch(get_leagues_sql)
     return results
 
 
 @app.get("/get_user")
-async def get_user(user_name: str):
-    user_id = await get_user_id(user_name)
+async def get_user(user_name: str, db=Depends(get_read_db)):
+    user_id = await get_user_id(user_name, db)
     return {"user_id": user_id}
 
 
+@app.get("/sleeper/stats")
+async def sleeper_stats():
+    return sleeper_client.get_stats()
+
+
+@app.get("/admin/profiles")
+async def admin_profiles(request: Request, route: Optional[str] = None, limit: int = 50):
+    if not admin_authorized(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return list_profiles(route, limit)
+
+
+@app.get("/admin/query_stats")
+async def admin_query_stats(request: Request, template: Optional[str] = None):
+    # Latency percentiles per SQL template, variant and league size, slowest p95 first
+    if not admin_authorized(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return query_percentiles(template)
+
+
+@app.get("/admin/loop_lag")
+async def admin_loop_lag(request: Request):
+    # How late the event loop wakes timers on this worker; blocking work shows up here
+    if not admin_authorized(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return loop_lag_monitor.stats()
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def admin_profile(request: Request, profile_id: str):
+    if not admin_authorized(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    folded = read_profile(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    # Folded stacks: flamegraph.pl profile.folded > profile.svg, or drop into speedscope
+    return Response(content=folded, media_type="text/plain")
+
+
+@app.get("/league_history")
+async def league_history(league_id: str, db=Depends(get_read_db)):
+    # Completed seasons are stored once; only a missing or stale current
+    # season goes back to Sleeper before the single read
+    if await current_season_stale(db, league_id):
+        async with primary_connection() as primary:
+            await refresh_league_history(primary, league_id)
+            return await read_league_history(primary, league_id)
+    return await read_league_history(db, league_id)
+
+
+@app.post("/league_history/refresh")
+async def league_history_refresh(league_id: str, force: bool = False, db=Depends(get_db)):
+    return await refresh_league_history(db, league_id, force=force)
+
+
 @app.get('/ranks')
-async def ranks(platform: str, db=Depends(get_db)):
+async def ranks(platform: str, db=Depends(get_read_db)):
     # Ensure the SQL file exists and is readable
     sql_path = Path.cwd() / "sql" / "player_values" / "ranks" / f"{platform}.sql"
     if not sql_path.exists():
@@ -102,24 +298,46 @@ async def ranks(platform: str, db=Depends(get_db)):
         player_values_sql = await player_values_file.read()
 
     # Execute the query asynchronously
-    result = await db.fetch(player_values_sql)
+    with query_tag(f"player_values/ranks/{platform}"):
+        result = await db.fetch(player_values_sql)
     return result
 
 
+def trade_evaluate_params(trade_data: TradeEvaluateDataModel) -> TradeEvaluateDataModel:
+    # Runs ahead of get_read_db, so a bad request is refused without a connection
+    if trade_data.platform not in TRADE_VALUE_PLATFORMS:
+        raise HTTPException(status_code=404, detail="SQL file not found")
+    if not 0 < len(trade_data.trades) <= MAX_TRADES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {MAX_TRADES_PER_REQUEST} trades")
+    return trade_data
+
+
+@app.post('/trade_evaluate')
+async def trade_evaluate(trade_data: TradeEvaluateDataModel = Depends(trade_evaluate_params),
+                         db=Depends(get_read_db)):
+    # Values the sides of each trade server side, so the client does not need
+    # the full /trade_calculator table for what-if comparisons
+    rank_type = 'dynasty' if trade_data.rank_type.lower() == 'dynasty' else 'redraft'
+    roster = "sf" if trade_data.roster_type in ("Superflex", "sf_value") else "one_qb"
+
+    return await trade_value_index.evaluate(db, trade_data.platform, rank_type, roster, trade_data.trades)
+
+
 @app.get('/trade_calculator')
-async def trade_calculator(platform: str, rank_type: str, db=Depends(get_db)):
+async def trade_calculator(platform: str, rank_type: str, db=Depends(get_read_db)):
     trade_calc_sql_path = Path.cwd() / "sql" / "player_values" / "calc" / f"{rank_type}" / f"{platform}.sql"
 
     async with aiofiles.open(trade_calc_sql_path, mode='r') as trade_calc_file:
         tarde_calc_sql = await trade_calc_file.read()
     
     # Execute the query asynchronously
-    result = await db.fetch(tarde_calc_sql)
+    with query_tag(f"player_values/calc/{rank_type}/{platform}"):
+        result = await db.fetch(tarde_calc_sql)
     return result
 
 
 @app.get("/league_summary")
-async def league_summary(league_id: str, platform: str, rank_type: str, guid: str, roster_type: str, db=Depends(get_db)):
+async def league_summary(league_id: str, platform: str, rank_type: str, guid: str, roster_type: str, db=Depends(get_read_db)):
     session_id = guid
     league_type = 'sf_value' if roster_type == 'Superflex' else 'one_qb_value'
     rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
@@ -175,12 +393,13 @@ async def league_summary(league_id: str, platform: str, rank_type: str, guid: st
             .replace("league_pos_col", f"{league_pos_col}")
             .replace("'rank_type'", f"'{rank_type}'"))
     # Execute the query asynchronously and fetch results
-    results = await db.fetch(power_summary_sql)
+    with query_tag(f"summary/{rank_source}/{platform}", league_id, league_type=league_type, rank_type=rank_type):
+        results = await db.fetch(power_summary_sql)
     return results
 
 
 @app.get("/league_detail")
-async def league_detail(league_id: str, platform: str, rank_type: str, guid: str, roster_type: str, db=Depends(get_db)):
+async def league_detail(league_id: str, platform: str, rank_type: str, guid: str, roster_type: str, db=Depends(get_read_db)):
     session_id = guid
     league_type = 'sf_value' if roster_type.lower() == 'superflex' else 'one_qb_value'
     rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
@@ -211,35 +430,70 @@ async def league_detail(league_id: str, platform: str, rank_type: str, guid: str
         power_detail_sql = power_detail_sql.replace("'rank_type'", f"'{rank_type}'")
 
     # Execute the query asynchronously and fetch results
-    results = await db.fetch(power_detail_sql)
+    with query_tag(f"details/power/{platform}", league_id, league_type=league_type, rank_type=rank_type):
+        results = await db.fetch(power_detail_sql)
     return results
 
 
-@app.get("/trades_detail")
-async def trades_detail(league_id: str, platform: str, roster_type: str, league_year: str, rank_type: str, db=Depends(get_db)):
-    league_type = 'sf_value' if roster_type == 'Superflex' else 'one_qb_value'
-    rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
-
-    if platform == 'sf':
-        league_type = "superflex_sf_value" if roster_type == "sf_value" else "superflex_one_qb_value"
-    elif platform == 'dd':
-        league_type = "sf_trade_value" if roster_type == "sf_value" else "trade_value"
-
-    # Assemble SQL file path
-    sql_file_path = Path.cwd() / "sql" / "details" / "trades" / f"{platform}.sql"
+async def render_trades_sql(view: str, sql_name: str, league_id: str, league_year: str, league_type: str,
+                            rank_type: str, platform: str) -> str:
+    sql_file_path = Path.cwd() / "sql" / view / "trades" / f"{sql_name}.sql"
     if not sql_file_path.exists():
         raise HTTPException(status_code=404, detail="SQL file not found")
 
+    # Rollups store both roster types; pick the one this view asks for
+    if sql_name == "rollup":
+        league_type = "sf" if league_type in ("sf_value", "superflex_sf_value", "sf_trade_value") else "one_qb"
+
     # Read and personalize the SQL query asynchronously
     async with aiofiles.open(sql_file_path, mode='r') as file:
         trades_sql = await file.read()
         trades_sql = trades_sql.replace("'current_year'", f"'{league_year}'")
         trades_sql = trades_sql.replace("'league_id'", f"'{league_id}'")
+        trades_sql = trades_sql.replace("'platform'", f"'{platform}'")
         trades_sql = trades_sql.replace("league_type", f"{league_type}")
         trades_sql = trades_sql.replace("'rank_type'", f"'{rank_type}'")
+    return trades_sql
 
-    # Execute the query asynchronously and fetch results
-    trades = await db.fetch(trades_sql)
+
+async def fetch_trades(db, view: str, league_id: str, platform: str, roster_type: str, league_year: str, rank_type: str):
+    league_type = 'sf_value' if roster_type == 'Superflex' else 'one_qb_value'
+    rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
+
+    if platform == 'sf':
+        league_type = "superflex_sf_value" if roster_type == "sf_value" else "superflex_one_qb_value"
+    elif platform == 'dd':
+        league_type = "sf_trade_value" if roster_type == "sf_value" else "trade_value"
+    elif platform == 'fc':
+        # FantasyCalc trades have always been valued on dynasty ranks
+        rank_type = 'dynasty'
+
+    # Read precomputed trade sides; leagues not refreshed since the rollups
+    # were introduced fall back to valuing trades on the fly
+    if platform in TRADE_ROLLUP_PLATFORMS:
+        trades_sql = await render_trades_sql(view, "rollup", league_id, league_year, league_type, rank_type, platform)
+        with query_tag(f"{view}/trades/rollup", league_id, platform=platform, league_type=league_type, rank_type=rank_type):
+            trades = await db.fetch(trades_sql)
+        if trades:
+            return trades
+
+    trades_sql = await render_trades_sql(view, platform, league_id, league_year, league_type, rank_type, platform)
+    with query_tag(f"{view}/trades/{platform}", league_id, league_type=league_type, rank_type=rank_type):
+        return await db.fetch(trades_sql)
+
+
+@app.get("/trades_detail")
+async def trades_detail(league_id: str, platform: str, roster_type: str, league_year: str, rank_type: str,
+                        value_at_trade: bool = False, db=Depends(get_read_db)):
+    trades = await fetch_trades(db, "details", league_id, platform, roster_type, league_year, rank_type)
+
+    if value_at_trade and platform in VALUE_HISTORY_SOURCES:
+        # Each asset's value on the day the trade went through, next to today's
+        roster = "sf" if roster_type in ("Superflex", "sf_value") else "one_qb"
+        keyed = [(history_asset_key(t["sleeper_id"], t["asset"]), trade_date(t["status_updated"])) for t in trades]
+        history_rank = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
+        history = await values_at(db, platform, history_rank, roster, list(set(keyed)))
+        trades = [dict(t, value_at_trade=history.get(key)) for t, key in zip(trades, keyed)]
 
     transaction_ids = list(set([(i["transaction_id"], i["status_updated"]) for i in trades]))
     transaction_ids.sort(key=lambda x: datetime.fromtimestamp(int(str(x[1])[:10])), reverse=True)
@@ -255,42 +509,39 @@ async def trades_detail(league_id: str, platform: str, roster_type: str, league_
     return trades_dict
 
 
-@app.get("/trades_summary")
-async def trades_summary(league_id: str, platform: str, roster_type: str, league_year: str, rank_type: str, db=Depends(get_db)):
-    league_type = 'sf_value' if roster_type == 'Superflex' else 'one_qb_value'
-    rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
+def value_history_params(platform: str, days: int = 30) -> dict:
+    # Runs ahead of get_read_db, so a bad request is refused without a connection
+    if platform not in VALUE_HISTORY_SOURCES:
+        raise HTTPException(status_code=404, detail="Unknown platform")
+    if not 0 < days <= MAX_TREND_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_TREND_DAYS}")
+    return {"platform": platform, "days": days}
 
-    if platform == 'sf':
-        league_type = "superflex_sf_value" if roster_type == "sf_value" else "superflex_one_qb_value"
-    elif platform == 'dd':
-        league_type = "sf_trade_value" if roster_type == "sf_value" else "trade_value"
 
-    # Assemble SQL file path
-    sql_file_path = Path.cwd() / "sql" / "summary" / "trades" / f"{platform}.sql"
-    if not sql_file_path.exists():
-        raise HTTPException(status_code=404, detail="SQL file not found")
+@app.get("/value_history")
+async def value_history(rank_type: str, asset: str, params: dict = Depends(value_history_params),
+                        db=Depends(get_read_db)):
+    # asset is a Sleeper player id or a pick name such as "2025 Round 1 Pick 5"
+    rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
+    return await value_trend(db, params["platform"], rank_type, history_asset_key(asset, asset), params["days"])
 
-    # Read and personalize the SQL query asynchronously
-    async with aiofiles.open(sql_file_path, mode='r') as file:
-        trades_sql = await file.read()
-        trades_sql = trades_sql.replace("'current_year'", f"'{league_year}'")
-        trades_sql = trades_sql.replace("'league_id'", f"'{league_id}'")
-        trades_sql = trades_sql.replace("league_type", f"{league_type}")
-        trades_sql = trades_sql.replace("'rank_type'", f"'{rank_type}'")
 
-    # Execute the query asynchronously and fetch results
-    db_resp_obj = await db.fetch(trades_sql)
-    return db_resp_obj
+@app.get("/trades_summary")
+async def trades_summary(league_id: str, platform: str, roster_type: str, league_year: str, rank_type: str, db=Depends(get_read_db)):
+    return await fetch_trades(db, "summary", league_id, platform, roster_type, league_year, rank_type)
 
 
 @app.get("/contender_league_summary")
-async def contender_league_summary(league_id: str, projection_source: str, guid: str, db=Depends(get_db)):
+async def contender_league_summary(league_id: str, projection_source: str, guid: str, db=Depends(get_read_db)):
     print(league_id, projection_source)
 
     session_id = guid
 
+    # Indexed sources read precomputed points from player_projections_index
+    sql_name = "index" if projection_source in CONTENDER_SOURCES else projection_source
+
     # Assemble SQL file path
-    sql_file_path = Path.cwd() / "sql" / "summary" / "contender" / f"{projection_source}.sql"
+    sql_file_path = Path.cwd() / "sql" / "summary" / "contender" / f"{sql_name}.sql"
     if not sql_file_path.exists():
         raise HTTPException(status_code=404, detail="SQL file not found")
 
@@ -299,20 +550,25 @@ async def contender_league_summary(league_id: str, projection_source: str, guid:
         projections_sql = await file.read()
         projections_sql = projections_sql.replace("'session_id'", f"'{session_id}'")
         projections_sql = projections_sql.replace("'league_id'", f"'{league_id}'")
+        projections_sql = projections_sql.replace("'projection_source'", f"'{projection_source}'")
 
     # Execute the query asynchronously and fetch results
-    db_resp_obj = await db.fetch(projections_sql)
+    with query_tag(f"summary/contender/{sql_name}", league_id, projection_source=projection_source):
+        db_resp_obj = await db.fetch(projections_sql)
     return db_resp_obj
 
 
 @app.get("/contender_league_detail")
-async def contender_league_detail(league_id: str, projection_source: str, guid: str, db=Depends(get_db)):
+async def contender_league_detail(league_id: str, projection_source: str, guid: str, db=Depends(get_read_db)):
     print(league_id, projection_source)
 
     session_id = guid
 
+    # Indexed sources read precomputed points from player_projections_index
+    sql_name = "index" if projection_source in CONTENDER_SOURCES else projection_source
+
     # Assemble SQL file path
-    sql_file_path = Path.cwd() / "sql" / "details" / "contender" / f"{projection_source}.sql"
+    sql_file_path = Path.cwd() / "sql" / "details" / "contender" / f"{sql_name}.sql"
     if not sql_file_path.exists():
         raise HTTPException(status_code=404, detail="SQL file not found")
 
@@ -321,42 +577,42 @@ async def contender_league_detail(league_id: str, projection_source: str, guid:
         projections_sql = await file.read()
         projections_sql = projections_sql.replace("'session_id'", f"'{session_id}'")
         projections_sql = projections_sql.replace("'league_id'", f"'{league_id}'")
+        projections_sql = projections_sql.replace("'projection_source'", f"'{projection_source}'")
 
     # Execute the query asynchronously and fetch results
-    db_resp_obj = await db.fetch(projections_sql)
+    with query_tag(f"details/contender/{sql_name}", league_id, projection_source=projection_source):
+        db_resp_obj = await db.fetch(projections_sql)
     return db_resp_obj
 
 
+def best_available_params(platform: str, limit: Optional[int] = None, position: Optional[str] = None) -> dict:
+    # Runs ahead of get_read_db, so a bad request is a 400 without a connection
+    if platform not in BEST_AVAILABLE_PLATFORMS:
+        raise HTTPException(status_code=404, detail="SQL file not found")
+    if position is not None and position.upper() not in BEST_AVAILABLE_POSITIONS:
+        raise HTTPException(status_code=400, detail="Invalid position")
+    if limit is not None and not 0 < limit <= 100:
+        raise HTTPException(status_code=400, detail="Invalid limit")
+    return {"platform": platform, "limit": limit, "position": position.upper() if position else None}
+
+
 @app.get("/best_available")
-async def best_available(league_id: str, platform: str, rank_type: str, guid: str, roster_type: str, db=Depends(get_db)):
+async def best_available(league_id: str, rank_type: str, guid: str, roster_type: str,
+                         params: dict = Depends(best_available_params), db=Depends(get_read_db)):
     session_id = guid
+    platform = params["platform"]
     rank_type = 'dynasty' if rank_type.lower() == 'dynasty' else 'redraft'
 
-    if platform == 'sf':
-        league_type = "superflex_sf_value" if roster_type == "sf_value" else "superflex_one_qb_value"
-    elif platform == 'dd':
-        league_type = "sf_trade_value" if roster_type == "sf_value" else "trade_value"
+    if platform in ('sf', 'dd'):
+        roster = "sf" if roster_type == "sf_value" else "one_qb"
     else:
-        league_type = 'sf_value' if roster_type == 'Superflex' else 'one_qb_value'
-
-    # Assemble SQL file path
-    sql_file_path = Path.cwd() / "sql" / "best_available" / "power" / f"{platform}.sql"
-    if not sql_file_path.exists():
-        raise HTTPException(status_code=404, detail="SQL file not found")
-
-    # Read and personalize the SQL query asynchronously
-    async with aiofiles.open(sql_file_path, mode='r') as file:
-        ba_sql = await file.read()
-        ba_sql = (ba_sql.replace("'session_id'", f"'{session_id}'")
-                    .replace("'league_id'", f"'{league_id}'")
-                    .replace("league_type", f"{league_type}")
-                    .replace("'rank_type'", f"'{rank_type}'")
-                  )
-
-    # Execute the query asynchronously and fetch results
-    db_resp_obj = await db.fetch(ba_sql)
-    return db_resp_obj
+        roster = "sf" if roster_type == "Superflex" else "one_qb"
+    if platform == 'fc':
+        # FantasyCalc best available has always used dynasty values
+        rank_type = 'dynasty'
 
+    return await best_available_index.top_available(db, platform, rank_type, roster, session_id, league_id,
+                                                    limit=params["limit"], position=params["position"])
 
 
 # class Player(BaseModel):
@@ -370,25 +626,61 @@ async def best_available(league_id: str, platform: str, rank_type: str, guid: st
 #     superflex_one_qb_pos_rank: int
 #     insert_date: Optional[str] = None
 
-@app.get("/v1/rankings")
-async def navigator_ranks_api(rank_type: str,  db=Depends(get_db)):
+def rankings_params(rank_type: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    position: Optional[str] = None, team: Optional[str] = None,
+                    min_value: Optional[float] = None, max_value: Optional[float] = None,
+                    updated_since: Optional[datetime] = None, fields: Optional[str] = None) -> dict:
+    # Declared ahead of get_read_db so a bad request is refused before it
+    # takes a connection
     rank_type = rank_type.lower()
     if rank_type not in ['dynasty', 'redraft']:
         raise HTTPException(status_code=400, detail="Invalid rank type")
-    external_rankings_query = f"""
-        SELECT player_full_name, _position, team, rank_type, superflex_sf_value, 
-               superflex_sf_rank, superflex_sf_pos_rank, superflex_one_qb_value, 
-               superflex_one_qb_rank, superflex_one_qb_pos_rank, insert_date
-        FROM dynastr.sf_player_ranks 
-        WHERE rank_type = '{rank_type}'
-        ORDER BY superflex_sf_value DESC
-    """
+    if limit is not None and not 0 < limit <= RANKINGS_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {RANKINGS_MAX_LIMIT}")
+
+    selected_fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else RANKINGS_FIELDS
+    unknown_fields = [f for f in selected_fields if f not in RANKINGS_FIELDS]
+    if unknown_fields:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown_fields)}")
+
+    if cursor is not None:
+        try:
+            decode_rankings_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "rank_type": rank_type,
+        "fields": selected_fields,
+        "limit": limit,
+        "cursor": cursor,
+        "positions": [p.strip().upper() for p in position.split(",")] if position else None,
+        "teams": [t.strip().upper() for t in team.split(",")] if team else None,
+        "min_value": min_value,
+        "max_value": max_value,
+        "updated_since": updated_since,
+    }
+
+
+@app.get("/v1/rankings")
+async def navigator_ranks_api(request: Request, response: Response, params: dict = Depends(rankings_params),
+                              db=Depends(get_read_db)):
+    # Without limit every matching row is returned, as before paging existed.
+    # With it, the next page's cursor is sent in X-Next-Cursor and a Link header.
+    rank_type, selected_fields, limit = params["rank_type"], params["fields"], params["limit"]
+    external_rankings_query, args = build_rankings_query(**params)
+
     try:
-        result = await db.fetch(external_rankings_query)
-        return result
+        with query_tag("v1/rankings", rank_type=rank_type, paged=limit is not None):
+            result = await db.fetch(external_rankings_query, *args)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    await close_db()
\ No newline at end of file
+    if limit is not None and len(result) > limit:
+        result = result[:limit]
+        next_cursor = encode_rankings_cursor(result[-1])
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    return [{field: row[field] for field in selected_fields} for row in result]
+
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger('my_logger')
+
+# Normalizing more items than this runs on the executor instead of the loop
+OFFLOAD_ITEMS = int(os.getenv("payload_offload_items", "2000"))
+# "thread" or "process". The normalizers are pure Python, so in a thread the
+# interpreter still hands the loop a turn every few ms; a process pool frees
+# this worker's CPU too but pickling payloads both ways usually costs more.
+PAYLOAD_EXECUTOR = os.getenv("payload_executor", "thread")
+PAYLOAD_WORKERS = int(os.getenv("payload_workers", "2"))
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("loop_lag_interval_seconds", "0.5"))
+LOOP_LAG_WINDOW = 1200
+
+ROSTER_POSITIONS = ["QB", "RB", "WR", "TE", "FLEX", "SUPER_FLEX", "REC_FLEX"]
+
+executor = None
+
+
+def loads(body):
+    # Both decoders hold the GIL for the whole call, so a thread would not
+    # free the loop; orjson just makes the stall much shorter
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        # Imported here so workers that never offload skip multiprocessing
+        if PAYLOAD_EXECUTOR == "process":
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=PAYLOAD_WORKERS)
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=PAYLOAD_WORKERS, thread_name_prefix="payloads")
+    return executor
+
+
+def shutdown_executor():
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+
+
+async def offload(func, *args, size: int):
+    # Small payloads are cheaper inline than a trip through the executor
+    if size < OFFLOAD_ITEMS:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+
+
+def normalize_trades(trades: list, league_id: str) -> tuple:
+    # One pass over every trade; rows are deduplicated as they are built
+    # instead of emitting each pick once per roster in the trade
+    league_id = str(league_id)
+    player_adds, player_drops, draft_adds, draft_drops = {}, {}, {}, {}
+    for trade in trades:
+        transaction_id = str(trade["transaction_id"])
+        status_updated = str(trade["status_updated"])
+        roster_ids = set(trade["roster_ids"])
+
+        for player_id, roster_id in (trade["adds"] or {}).items():
+            if roster_id in roster_ids:
+                row = (transaction_id, status_updated, str(roster_id), "add", str(player_id), league_id)
+                player_adds[row] = None
+        for player_id, roster_id in (trade["drops"] or {}).items():
+            if roster_id in roster_ids:
+                row = (transaction_id, status_updated, str(roster_id), "drop", str(player_id), league_id)
+                player_drops[row] = None
+
+        if not roster_ids:
+            continue
+        for pick in trade["draft_picks"] or []:
+            if not pick:
+                continue
+            season, round_ = str(pick["season"]), pick["round"]
+            suffix = round_suffix(round_)
+            draft_adds[(transaction_id, status_updated, str(pick["owner_id"]), "add", season, str(round_),
+                        suffix, str(pick["roster_id"]), league_id)] = None
+            draft_drops[(transaction_id, status_updated, pick["previous_owner_id"], "drop", season, str(round_),
+                         suffix, str(pick["roster_id"]), league_id)] = None
+    return list(player_adds), list(player_drops), list(draft_adds), list(draft_drops)
+
+
+def round_suffix(rank: int) -> str:
+    ith = {1: "st", 2: "nd", 3: "rd"}.get(
+        rank % 10 * (rank % 100 not in [11, 12, 13]), "th"
+    )
+    return f"{str(rank)}{ith}"
+
+
+def normalize_rosters(rosters: list, session_id: str, user_id: str, entry_time: str) -> list:
+    return [
+        (session_id, user_id, player_id, roster["league_id"], roster.get("owner_id", "EMPTY"), entry_time)
+        for roster in rosters
+        for player_id in (roster.get("players") or [])
+    ]
+
+
+def normalize_leagues(leagues_json: list, league_year: str) -> list:
+    leagues = []
+    for league in leagues_json:
+        # One count of roster_positions instead of a scan per position
+        counts = Counter(league["roster_positions"])
+        qbs, rbs, wrs, tes, flexes, super_flexes, rec_flexes = (counts[p] for p in ROSTER_POSITIONS)
+        leagues.append(
+            (
+                league["name"],
+                league["league_id"],
+                league.get("avatar", ""),
+                league["total_rosters"],
+                qbs,
+                rbs,
+                wrs,
+                tes,
+                flexes,
+                super_flexes,
+                qbs + rbs + wrs + tes + flexes + super_flexes + rec_flexes,
+                len(league["roster_positions"]),
+                league["sport"],
+                rec_flexes,
+                league["settings"]["type"],
+                league_year,
+                league.get("previous_league_id", None),
+            )
+        )
+    return leagues
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task. Anything that
+    blocks the loop, such as decoding a large payload inline, shows up as lag
+    for every request on the worker."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples = deque(maxlen=LOOP_LAG_WINDOW)
+        self.max_lag = 0.0
+        self.task = None
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - started - self.interval, 0.0)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= 0.25:
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def stats(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0}
+
+        def at(fraction):
+            return round(ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)] * 1000, 2)
+
+        return {
+            "samples": len(ordered),
+            "interval_ms": self.interval * 1000,
+            "p50_ms": at(0.50),
+            "p99_ms": at(0.99),
+            "window_max_ms": round(ordered[-1] * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+            "executor": PAYLOAD_EXECUTOR,
+            "orjson": orjson is not None,
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
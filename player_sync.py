@@ -0,0 +1,143 @@
+import codecs
+import hashlib
+import json
+import time
+
+from db import logger
+from query_stats import query_tag, status_rows
+from sleeper_client import sleeper_client, SLEEPER_API
+
+PLAYER_COLUMNS = ["player_id", "full_name", "first_name", "last_name", "player_position", "team", "age", "content_hash"]
+
+
+class PlayerDumpParser:
+    """Incremental parser for Sleeper's /players/nfl dump, a single JSON object
+    of player_id -> player. Chunks are fed as they arrive and complete
+    players are returned as soon as their closing brace is in the buffer, so
+    only one player's text is held beyond the current chunk."""
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.started = False
+        self.finished = False
+
+    def skip(self, characters: str):
+        self.buffer = self.buffer.lstrip()
+        while self.buffer and self.buffer[0] in characters:
+            self.buffer = self.buffer[1:].lstrip()
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        players = []
+        if not self.started:
+            self.skip("")
+            if not self.buffer:
+                return players
+            if self.buffer[0] != "{":
+                raise ValueError("Sleeper player dump is not a JSON object")
+            self.buffer = self.buffer[1:]
+            self.started = True
+
+        while not self.finished:
+            self.skip(",")
+            if self.buffer.startswith("}"):
+                self.finished = True
+                break
+            try:
+                key, key_end = self.decoder.raw_decode(self.buffer)
+                colon = self.buffer.index(":", key_end)
+                value_start = colon + 1
+                while value_start < len(self.buffer) and self.buffer[value_start].isspace():
+                    value_start += 1
+                value, value_end = self.decoder.raw_decode(self.buffer, value_start)
+            except (json.JSONDecodeError, ValueError):
+                # The current player is not complete yet
+                break
+            players.append((key, value))
+            self.buffer = self.buffer[value_end:]
+        return players
+
+
+def player_record(player_id: str, player: dict) -> tuple:
+    first_name = player.get("first_name")
+    last_name = player.get("last_name")
+    # Team defenses have no full_name
+    full_name = player.get("full_name") or " ".join(filter(None, [first_name, last_name])) or None
+    age = player.get("age")
+    fields = [
+        str(player.get("player_id") or player_id),
+        full_name,
+        first_name,
+        last_name,
+        player.get("position"),
+        player.get("team"),
+        int(age) if age is not None else None,
+    ]
+    content_hash = hashlib.md5("\x1f".join("" if f is None else str(f) for f in fields).encode()).hexdigest()
+    return (*fields, content_hash)
+
+
+async def player_records(stats: dict):
+    # Streams the dump straight into COPY, one parsed player at a time
+    parser = PlayerDumpParser()
+    # Chunks can split a multi-byte character
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in sleeper_client.stream(f"{SLEEPER_API}/players/nfl"):
+        stats["bytes"] += len(chunk)
+        for player_id, player in parser.feed(decoder.decode(chunk)):
+            stats["parsed"] += 1
+            yield player_record(player_id, player)
+    if not parser.finished:
+        raise ValueError("Sleeper player dump ended before the closing brace")
+
+
+async def sync_players(db) -> dict:
+    # Loads the dump into a temp staging table with COPY, then touches only
+    # players whose content hash changed, so unchanged rows cause no index churn
+    started = time.monotonic()
+    stats = {"bytes": 0, "parsed": 0, "inserted": 0, "updated": 0}
+
+    async with db.transaction():
+        await db.execute("""
+            CREATE TEMP TABLE players_staging (
+                player_id varchar PRIMARY KEY
+                , full_name varchar
+                , first_name varchar
+                , last_name varchar
+                , player_position varchar
+                , team varchar
+                , age integer
+                , content_hash varchar
+            ) ON COMMIT DROP;
+        """)
+        with query_tag("players/sync_copy"):
+            await db.copy_records_to_table("players_staging", records=player_records(stats), columns=PLAYER_COLUMNS)
+        await db.execute("ANALYZE players_staging")
+
+        with query_tag("players/sync_merge"):
+            updated = await db.execute("""
+                UPDATE dynastr.players p
+                SET full_name = s.full_name
+                    , first_name = s.first_name
+                    , last_name = s.last_name
+                    , player_position = s.player_position
+                    , team = s.team
+                    , age = s.age
+                    , content_hash = s.content_hash
+                FROM players_staging s
+                WHERE p.player_id = s.player_id
+                AND p.content_hash IS DISTINCT FROM s.content_hash;
+            """)
+            inserted = await db.execute("""
+                INSERT INTO dynastr.players (player_id, full_name, first_name, last_name, player_position, team, age, content_hash)
+                SELECT s.player_id, s.full_name, s.first_name, s.last_name, s.player_position, s.team, s.age, s.content_hash
+                FROM players_staging s
+                WHERE NOT EXISTS (SELECT 1 FROM dynastr.players p WHERE p.player_id = s.player_id);
+            """)
+
+    stats["updated"] = status_rows(updated)
+    stats["inserted"] = status_rows(inserted)
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(f"Player sync: {stats}")
+    return stats
@@ -0,0 +1,208 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger('my_logger')
+
+# Fraction of requests profiled without being asked to; 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.getenv("profile_sample_rate", "0"))
+# Secret for the X-Profile header. Without it only sampling can trigger a profile
+PROFILE_SECRET = os.getenv("profile_secret")
+PROFILE_HEADER = b"x-profile"
+PROFILE_TOKEN_MAX_AGE_SECONDS = 3600
+PROFILE_INTERVAL_SECONDS = float(os.getenv("profile_interval_ms", "5")) / 1000
+PROFILE_DIR = Path(os.getenv("profile_dir", "/tmp/sf_profiles"))
+PROFILE_KEEP = int(os.getenv("profile_keep", "200"))
+PROFILE_MAX_DEPTH = 128
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+ROOT = str(Path(__file__).resolve().parent)
+
+# Built on first use; itsdangerous is only imported when profile_secret is set
+profile_serializer = None
+# One profile at a time keeps the sampler's cost bounded
+profile_lock = threading.Lock()
+
+
+def get_profile_serializer():
+    global profile_serializer
+    if profile_serializer is None:
+        from itsdangerous import URLSafeTimedSerializer
+        profile_serializer = URLSafeTimedSerializer(PROFILE_SECRET, salt="profile")
+    return profile_serializer
+
+
+def profile_token() -> str:
+    # Value for the X-Profile header, e.g. from a shell:
+    # python -c "from profiler import profile_token; print(profile_token())"
+    return get_profile_serializer().dumps("profile")
+
+
+def valid_profile_token(token: str) -> bool:
+    from itsdangerous import BadSignature
+    try:
+        get_profile_serializer().loads(token, max_age=PROFILE_TOKEN_MAX_AGE_SECONDS)
+        return True
+    except BadSignature:
+        return False
+
+
+def frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(ROOT):
+        filename = filename[len(ROOT) + 1:]
+    else:
+        filename = filename.rsplit("site-packages/", 1)[-1]
+    # ';' separates frames in the folded format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler(threading.Thread):
+    """Samples the event loop thread's Python stack at a fixed interval.
+    Samples taken while another task is running are kept, under an
+    [other task] root, because time the loop spends elsewhere is part of
+    the request's latency."""
+
+    def __init__(self, loop, task):
+        super().__init__(daemon=True)
+        self.loop = loop
+        self.task = task
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(PROFILE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            current = asyncio.current_task(self.loop)
+            if current is None:
+                stack.insert(0, "[idle loop]")
+            elif current is not self.task:
+                stack.insert(0, "[other task]")
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def write_profile(sampler: StackSampler, scope, status: int, seconds: float, trigger: str) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    # Folded stacks, readable by flamegraph.pl, speedscope and inferno
+    folded = "\n".join(f"{stack} {count}" for stack, count in sampler.stacks.most_common())
+    (PROFILE_DIR / f"{profile_id}.folded").write_text(folded)
+    meta = {
+        "profile_id": profile_id,
+        "route": scope["path"],
+        "method": scope["method"],
+        "params": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "seconds": round(seconds, 4),
+        "samples": sampler.samples,
+        "interval_ms": PROFILE_INTERVAL_SECONDS * 1000,
+        "trigger": trigger,
+        "created_at": time.time(),
+    }
+    (PROFILE_DIR / f"{profile_id}.json").write_text(json.dumps(meta))
+
+    metas = sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old_meta in metas[:max(len(metas) - PROFILE_KEEP, 0)]:
+        old_meta.unlink(missing_ok=True)
+        old_meta.with_suffix(".folded").unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles(route: str = None, limit: int = 50) -> list:
+    profiles = []
+    if not PROFILE_DIR.exists():
+        return profiles
+    for meta_path in PROFILE_DIR.glob("*.json"):
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            continue
+        if route is None or meta["route"] == route:
+            profiles.append(meta)
+    profiles.sort(key=lambda meta: meta["created_at"], reverse=True)
+    return profiles[:limit]
+
+
+def read_profile(profile_id: str):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.folded"
+    return path.read_text() if path.exists() else None
+
+
+def admin_authorized(token: str) -> bool:
+    admin_token = os.getenv("admin_token")
+    return bool(admin_token) and token is not None and hmac.compare_digest(token, admin_token)
+
+
+class ProfilingMiddleware:
+    """Profiles a request when it is sampled (profile_sample_rate) or carries a
+    signed X-Profile header, and writes a folded-stack file tagged with the
+    route and query string. Other requests pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def trigger(self, scope):
+        if PROFILE_SECRET:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return "header" if valid_profile_token(value.decode("latin-1")) else None
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (not PROFILE_SECRET and not PROFILE_SAMPLE_RATE):
+            return await self.app(scope, receive, send)
+
+        trigger = self.trigger(scope)
+        if trigger is None or not profile_lock.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        sampler = StackSampler(asyncio.get_running_loop(), asyncio.current_task())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            return await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            try:
+                profile_id = write_profile(sampler, scope, status, time.perf_counter() - started, trigger)
+                logger.info(f"Profiled {scope['path']} as {profile_id} ({sampler.samples} samples)")
+            except OSError as e:
+                logger.error(f"Could not write profile for {scope['path']}: {e}")
+            finally:
+                profile_lock.release()
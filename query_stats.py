@@ -0,0 +1,184 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import asyncpg
+
+from deadlines import statement_timeout_ms
+
+logger = logging.getLogger('my_logger')
+
+SLOW_QUERY_MS = float(os.getenv("slow_query_ms", "500"))
+# Latencies kept per (template, variant, league size) for the percentiles
+QUERY_STATS_WINDOW = int(os.getenv("query_stats_window", "500"))
+# League sizes remembered for bucketing, least recently used dropped first
+QUERY_STATS_MAX_LEAGUES = int(os.getenv("query_stats_max_leagues", "20000"))
+
+# (template_id, variant dict, league_id) of the template the caller is running
+current_query_tag = ContextVar("current_query_tag", default=None)
+# Seconds the current request waited for a pooled connection
+current_pool_wait = ContextVar("current_pool_wait", default=None)
+
+query_latencies = {}
+query_counts = {}
+untagged_samples = {}
+# league_id -> total_rosters, least recently used first
+league_sizes = OrderedDict()
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+WHITESPACE = re.compile(r"\s+")
+
+
+@contextmanager
+def query_tag(template_id: str, league_id: str = None, **variant):
+    # Attributes the queries run inside the block to a SQL template, since the
+    # inlined literals make every league look like a different statement
+    token = current_query_tag.set((template_id, variant, league_id))
+    try:
+        yield
+    finally:
+        current_query_tag.reset(token)
+
+
+def record_pool_wait(seconds: float):
+    current_pool_wait.set(seconds)
+
+
+def record_league_size(league_id: str, total_rosters):
+    if league_id and total_rosters:
+        league_id = str(league_id)
+        league_sizes[league_id] = int(total_rosters)
+        league_sizes.move_to_end(league_id)
+        while len(league_sizes) > QUERY_STATS_MAX_LEAGUES:
+            league_sizes.popitem(last=False)
+
+
+def untagged_template_id(query: str) -> str:
+    normalized = WHITESPACE.sub(" ", LITERALS.sub("?", query)).strip()
+    template_id = "sql:" + hashlib.sha1(normalized.encode()).hexdigest()[:10]
+    untagged_samples.setdefault(template_id, normalized[:200])
+    return template_id
+
+
+def record_query(query: str, seconds: float, rows):
+    tag = current_query_tag.get()
+    if tag is None:
+        template_id, variant, league_id = untagged_template_id(query), {}, None
+    else:
+        template_id, variant, league_id = tag
+    variant_key = ",".join(f"{k}={v}" for k, v in sorted(variant.items()))
+    league_size = None
+    if league_id:
+        league_size = league_sizes.get(str(league_id))
+        if league_size is not None:
+            league_sizes.move_to_end(str(league_id))
+    key = (template_id, variant_key, league_size)
+
+    latencies = query_latencies.get(key)
+    if latencies is None:
+        latencies = query_latencies[key] = deque(maxlen=QUERY_STATS_WINDOW)
+    latencies.append(seconds)
+    query_counts[key] = query_counts.get(key, 0) + 1
+
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        pool_wait = current_pool_wait.get()
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "template_id": template_id,
+            "variant": variant,
+            "league_id": league_id,
+            "league_size": league_size,
+            "ms": round(seconds * 1000, 1),
+            "rows": rows,
+            "pool_wait_ms": round(pool_wait * 1000, 1) if pool_wait is not None else None,
+        }))
+
+
+def status_rows(status: str):
+    # "INSERT 0 12", "UPDATE 3", "DELETE 0"
+    last = status.rsplit(" ", 1)[-1] if status else ""
+    return int(last) if last.isdigit() else None
+
+
+def deadline_kwargs(kwargs: dict) -> dict:
+    # Each statement gets what is left of the request deadline when it starts;
+    # asyncpg cancels it on the server once that runs out
+    if kwargs.get("timeout") is None:
+        timeout_ms = statement_timeout_ms()
+        if timeout_ms is not None:
+            kwargs["timeout"] = timeout_ms / 1000
+    return kwargs
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """asyncpg connection that times every statement against the query tag
+    of the caller and bounds it by the request deadline. Used as the pools'
+    connection_class."""
+
+    async def reset(self, *, timeout=None):
+        # Run by the pool on release; kept apart from the caller's template
+        with query_tag("pool/reset"):
+            await super().reset(timeout=timeout)
+
+    async def fetch(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        result = await super().fetch(query, *args, **deadline_kwargs(kwargs))
+        record_query(query, time.perf_counter() - started, len(result))
+        return result
+
+    async def fetchrow(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        result = await super().fetchrow(query, *args, **deadline_kwargs(kwargs))
+        record_query(query, time.perf_counter() - started, 0 if result is None else 1)
+        return result
+
+    async def fetchval(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        result = await super().fetchval(query, *args, **deadline_kwargs(kwargs))
+        record_query(query, time.perf_counter() - started, None)
+        return result
+
+    async def execute(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        result = await super().execute(query, *args, **deadline_kwargs(kwargs))
+        record_query(query, time.perf_counter() - started, status_rows(result))
+        return result
+
+    async def executemany(self, command, args, **kwargs):
+        # args may be any iterable; count it only when it is sized
+        started = time.perf_counter()
+        result = await super().executemany(command, args, **deadline_kwargs(kwargs))
+        record_query(command, time.perf_counter() - started, len(args) if hasattr(args, "__len__") else None)
+        return result
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def query_percentiles(template_prefix: str = None) -> list:
+    stats = []
+    for (template_id, variant, league_size), latencies in list(query_latencies.items()):
+        if template_prefix and not template_id.startswith(template_prefix):
+            continue
+        ordered = sorted(latencies)
+        stats.append({
+            "template_id": template_id,
+            "variant": variant,
+            "league_size": league_size,
+            "count": query_counts[(template_id, variant, league_size)],
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1),
+            "sql": untagged_samples.get(template_id),
+        })
+    stats.sort(key=lambda s: s["p95_ms"], reverse=True)
+    return stats
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+import db as database
+from best_available import best_available_index
+from db import current_write_lsn, primary_connection, logger
+from deadlines import ROUTE_DEADLINES, remaining, start_deadline
+from query_stats import query_tag
+from superflex_models import RosterDataModel
+
+# A finished refresh stays attachable this long, so a client that reconnects
+# right after completion replays the result instead of starting over
+FINISHED_REFRESH_TTL_SECONDS = float(os.getenv("finished_refresh_ttl_seconds", "60"))
+SSE_KEEPALIVE_SECONDS = 15
+# Leagues one /refresh_all call refreshes at once
+REFRESH_ALL_CONCURRENCY = int(os.getenv("refresh_all_concurrency", "6"))
+# Primary connections left to other routes; refreshes from every /roster and
+# /refresh_all on the worker share the rest of the pool
+REFRESH_RESERVED_CONNECTIONS = int(os.getenv("refresh_reserved_connections", "4"))
+# A league refreshed this recently by another worker or node is reused: the
+# same session skips the refresh, other sessions skip the league-wide stages
+LEAGUE_REFRESH_REUSE_SECONDS = float(os.getenv("league_refresh_reuse_seconds", "60"))
+LEAGUE_LOCK_POLL_SECONDS = 0.25
+LEAGUE_LOCK_WAIT_SECONDS = float(os.getenv("league_lock_wait_seconds", "120"))
+
+
+class RefreshProgress:
+    """Event log of one league refresh. Any number of subscribers can replay
+    it from an event id and follow it until the refresh finishes."""
+
+    def __init__(self, roster_data: RosterDataModel, nfl_state: dict = None):
+        self.roster_data = roster_data
+        self.nfl_state = nfl_state
+        self.events = []
+        self.condition = asyncio.Condition()
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.result = None
+        self.task = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def emit(self, event: str, **data):
+        async with self.condition:
+            data["elapsed"] = round(time.monotonic() - self.started_at, 3)
+            self.events.append((len(self.events) + 1, event, data))
+            self.condition.notify_all()
+
+    async def finish(self, result, write_lsn: str = None):
+        self.result = result
+        status = "error" if isinstance(result, Exception) else "ok"
+        # The stream's response started before the refresh wrote anything, so
+        # the WAL position for read-your-writes comes with the done event
+        await self.emit("done", status=status, error=str(result) if status == "error" else None,
+                        last_write_lsn=write_lsn)
+        self.finished_at = time.monotonic()
+        async with self.condition:
+            self.condition.notify_all()
+
+    async def wait(self):
+        await asyncio.shield(self.task)
+        return self.result
+
+    async def subscribe(self, last_event_id: int = 0):
+        # Yields (event_id, event, data) after last_event_id, then follows
+        # new events; yields None as a keepalive while nothing happens
+        position = last_event_id
+        while True:
+            async with self.condition:
+                if position >= len(self.events) and not self.finished:
+                    try:
+                        await asyncio.wait_for(self.condition.wait(), SSE_KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                pending = self.events[position:]
+                finished = self.finished
+            if not pending and not finished:
+                yield None
+            for event in pending:
+                position = event[0]
+                yield event
+            if finished and position >= len(self.events):
+                return
+
+
+active_refreshes = {}
+refresh_semaphore = None
+
+
+async def refresh_slots() -> asyncio.Semaphore:
+    # Sized from the primary pool, so refreshes can never take every connection
+    global refresh_semaphore
+    if refresh_semaphore is None:
+        await database.ensure_pools()
+        refresh_semaphore = asyncio.Semaphore(max(database.pool.get_max_size() - REFRESH_RESERVED_CONNECTIONS, 1))
+    return refresh_semaphore
+
+
+@asynccontextmanager
+async def league_refresh_lock(league_id: str):
+    # Yields (primary connection, seconds waited) holding a session-level
+    # advisory lock that serializes refreshes of a league across all workers
+    # and hosts. Each attempt takes a refresh slot and a connection and gives
+    # both back when the lock is busy, so nothing is held while waiting. A
+    # dropped connection or the pool's reset releases the lock.
+    started = time.monotonic()
+    # Waiting longer than the refresh's deadline would only end in a timeout
+    left = remaining()
+    wait_limit = LEAGUE_LOCK_WAIT_SECONDS if left is None else min(LEAGUE_LOCK_WAIT_SECONDS, left)
+    slots = await refresh_slots()
+    while True:
+        async with slots:
+            async with primary_connection() as db:
+                with query_tag("refresh/league_lock", league_id):
+                    locked = await db.fetchval(
+                        "SELECT pg_try_advisory_lock(hashtext('dynastr.league_refresh'), hashtext($1))", league_id)
+                if locked:
+                    try:
+                        yield db, time.monotonic() - started
+                    finally:
+                        with query_tag("refresh/league_lock", league_id):
+                            await db.fetchval(
+                                "SELECT pg_advisory_unlock(hashtext('dynastr.league_refresh'), hashtext($1))", league_id)
+                    return
+        if time.monotonic() - started + LEAGUE_LOCK_POLL_SECONDS >= wait_limit:
+            raise asyncio.TimeoutError(f"Timed out waiting for the refresh of league {league_id}")
+        await asyncio.sleep(LEAGUE_LOCK_POLL_SECONDS)
+
+
+async def last_league_refresh(db, league_id: str):
+    with query_tag("refresh/league_refreshes", league_id):
+        return await db.fetchrow("""
+            SELECT session_id, extract(epoch from now() - refreshed_at) as age_seconds
+            FROM dynastr.league_refreshes WHERE league_id = $1;
+        """, league_id)
+
+
+async def record_league_refresh(db, league_id: str, session_id: str):
+    with query_tag("refresh/league_refreshes", league_id):
+        await db.execute("""
+            INSERT INTO dynastr.league_refreshes (league_id, session_id, refreshed_at)
+            VALUES ($1, $2, now())
+            ON CONFLICT (league_id) DO UPDATE SET session_id = EXCLUDED.session_id, refreshed_at = now();
+        """, league_id, session_id)
+
+
+async def run_refresh(progress: RefreshProgress):
+    # Imported here, utils pulls in the Sleeper client and templates
+    from utils import player_manager_rosters
+
+    # The refresh outlives the request that started it, so it gets its own
+    # budget instead of the deadline copied from that request
+    start_deadline(ROUTE_DEADLINES["/roster"])
+    roster_data = progress.roster_data
+    result = None
+    write_lsn = None
+    try:
+        async with league_refresh_lock(roster_data.league_id) as (db, waited):
+            last = await last_league_refresh(db, roster_data.league_id)
+            recent = last is not None and last["age_seconds"] < LEAGUE_REFRESH_REUSE_SECONDS
+            await progress.emit("league_lock", waited=round(waited, 3), reused=recent,
+                                same_session=recent and last["session_id"] == roster_data.guid)
+            if recent and last["session_id"] == roster_data.guid:
+                logger.info(f"Reusing refresh of league {roster_data.league_id} finished "
+                            f"{last['age_seconds']:.1f}s ago")
+            else:
+                result = await player_manager_rosters(db, roster_data, progress=progress,
+                                                      nfl_state=progress.nfl_state, league_fresh=recent)
+                # Only a full refresh restarts the reuse window
+                if not isinstance(result, Exception) and not recent:
+                    await record_league_refresh(db, roster_data.league_id, roster_data.guid)
+            if not isinstance(result, Exception):
+                await best_available_index.load_rostered(db, roster_data.guid, roster_data.league_id)
+                write_lsn = await current_write_lsn(db)
+    except Exception as e:
+        logger.error(f"Refresh of league {roster_data.league_id} failed: {e}")
+        result = e
+    finally:
+        await progress.finish(result, write_lsn)
+
+
+def get_or_start_refresh(roster_data: RosterDataModel, nfl_state: dict = None) -> RefreshProgress:
+    # Attaches to the refresh already running for this session and league,
+    # or starts one that outlives the request that asked for it
+    key = (roster_data.guid, roster_data.league_id)
+    progress = active_refreshes.get(key)
+    if progress is not None and (not progress.finished
+                                 or time.monotonic() - progress.finished_at < FINISHED_REFRESH_TTL_SECONDS):
+        return progress
+
+    for stale_key in [k for k, p in active_refreshes.items()
+                      if p.finished and time.monotonic() - p.finished_at >= FINISHED_REFRESH_TTL_SECONDS]:
+        del active_refreshes[stale_key]
+
+    progress = RefreshProgress(roster_data, nfl_state)
+    progress.task = asyncio.create_task(run_refresh(progress))
+    active_refreshes[key] = progress
+    return progress
+
+
+async def refresh_all(session_id: str, user_id: str, league_year: str, league_ids: list) -> dict:
+    # Refreshes every league with at most REFRESH_ALL_CONCURRENCY running.
+    # The NFL state is fetched once for all of them; each league still runs on
+    # its own connection, so one failing league does not undo the others.
+    from utils import get_sleeper_state
+
+    nfl_state = await get_sleeper_state()
+    semaphore = asyncio.Semaphore(REFRESH_ALL_CONCURRENCY)
+
+    async def refresh_league(league_id: str):
+        roster_data = RosterDataModel(league_id=league_id, user_id=user_id, guid=session_id, league_year=league_year)
+        async with semaphore:
+            started = time.monotonic()
+            progress = get_or_start_refresh(roster_data, nfl_state)
+            result = await progress.wait()
+        if isinstance(result, Exception):
+            return league_id, {"status": "error", "error": str(result),
+                               "seconds": round(time.monotonic() - started, 3)}
+        return league_id, {"status": "ok", "seconds": round(time.monotonic() - started, 3)}
+
+    results = await asyncio.gather(*[refresh_league(league_id) for league_id in dict.fromkeys(league_ids)])
+    return dict(results)
+
+
+def format_sse(event_id: int, event: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(progress: RefreshProgress, last_event_id: int = 0):
+    async for item in progress.subscribe(last_event_id):
+        if item is None:
+            yield ": keepalive\n\n"
+            continue
+        yield format_sse(*item)
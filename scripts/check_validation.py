@@ -0,0 +1,60 @@
+"""Checks that malformed requests are refused with a 4xx before a database
+connection is taken.
+
+    python scripts/check_validation.py
+
+Runs the app in-process with no database configured and without the startup
+hook, so any case that reached get_read_db would come back as a 500
+"Database connection error" instead of the expected status. Exits 1 on a
+mismatch.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+
+BEST_AVAILABLE = {"league_id": "1", "platform": "ktc", "rank_type": "dynasty", "guid": "g",
+                  "roster_type": "Superflex"}
+TRADE = {"platform": "ktc", "rank_type": "dynasty", "roster_type": "Superflex", "trades": [[["4046"], ["6794"]]]}
+
+# (method, path, query params or JSON body, expected status)
+CASES = [
+    ("GET", "/v1/rankings", {"rank_type": "dynasty", "limit": "0"}, 400),
+    ("GET", "/v1/rankings", {"rank_type": "dynasty", "limit": "100000"}, 400),
+    ("GET", "/v1/rankings", {"rank_type": "dynasty", "fields": "player_full_name,password"}, 400),
+    ("GET", "/v1/rankings", {"rank_type": "dynasty", "limit": "10", "cursor": "not-a-cursor"}, 400),
+    ("GET", "/v1/rankings", {"rank_type": "keeper"}, 400),
+    ("GET", "/best_available", {**BEST_AVAILABLE, "position": "K"}, 400),
+    ("GET", "/best_available", {**BEST_AVAILABLE, "limit": "500"}, 400),
+    ("GET", "/best_available", {**BEST_AVAILABLE, "platform": "nope"}, 404),
+    ("POST", "/trade_evaluate", {**TRADE, "trades": []}, 400),
+    ("POST", "/trade_evaluate", {**TRADE, "platform": "nope"}, 404),
+    ("GET", "/value_history", {"platform": "ktc", "rank_type": "dynasty", "asset": "4046", "days": "0"}, 400),
+    ("GET", "/value_history", {"platform": "ktc", "rank_type": "dynasty", "asset": "4046", "days": "99999"}, 400),
+    ("GET", "/value_history", {"platform": "nope", "rank_type": "dynasty", "asset": "4046"}, 404),
+]
+
+
+def main():
+    client = TestClient(app, raise_server_exceptions=False)
+    failed = 0
+    for method, path, params, expected in CASES:
+        if method == "GET":
+            response = client.get(path, params=params)
+        else:
+            response = client.request(method, path, json=params)
+        ok = response.status_code == expected
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {response.status_code} (want {expected}) {method} {path} "
+              f"{response.text[:120]}")
+    if failed:
+        print(f"{failed} of {len(CASES)} cases failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
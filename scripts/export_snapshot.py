@@ -0,0 +1,259 @@
+"""Exports leagues, rosters, trades and every platform's valuations to
+partitioned, zstd-compressed Parquet for offline analysis.
+
+    python scripts/export_snapshot.py --out /data/dynastr         # incremental
+    python scripts/export_snapshot.py --out /data/dynastr --full  # everything
+    python scripts/export_snapshot.py --out /data/dynastr --only league_players
+
+Rows are streamed through a server-side cursor and written one row group per
+batch, so memory stays bounded by --batch-size whatever the table size.
+Files land in <out>/<dataset>/snapshot_date=<YYYY-MM-DD>/part-<run>-<n>.parquet.
+Incremental runs export rows past the watermark recorded in
+<out>/_export_state.json for each dataset, less --overlap-seconds: a row
+stamped before the last run's watermark but committed after that run read
+the table would otherwise never be exported. Rows inside the overlap are
+exported again, so readers dedupe on the dataset's key in DATASET_KEYS,
+keeping the row from the newest run (the run id in the file name).
+
+Connects to the first replica in replica_hosts when one is configured, so
+exports do not compete with user traffic on the primary. Requires pyarrow.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import asyncpg
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    sys.exit("export_snapshot.py needs pyarrow: pip install pyarrow")
+
+# name -> (query, watermark expression or None for a full export every run).
+# The watermark expression is compared with $1 and its maximum is stored
+# as the next run's starting point.
+DATASETS = {
+    "current_leagues": ("SELECT * FROM dynastr.current_leagues", "insert_date::timestamp"),
+    "league_players": ("SELECT * FROM dynastr.league_players", "insert_date::timestamp"),
+    "player_trades": ("SELECT * FROM dynastr.player_trades", "status_updated::bigint"),
+    "draft_pick_trades": ("SELECT * FROM dynastr.draft_pick_trades", "status_updated::bigint"),
+    "trade_rollups": ("SELECT * FROM dynastr.trade_rollups", "valued_at"),
+    "ktc_player_ranks": ("SELECT * FROM dynastr.ktc_player_ranks", None),
+    "sf_player_ranks": ("SELECT * FROM dynastr.sf_player_ranks", None),
+    "fc_player_ranks": ("SELECT * FROM dynastr.fc_player_ranks", None),
+    "dd_player_ranks": ("SELECT * FROM dynastr.dd_player_ranks", None),
+    "dp_player_ranks": ("SELECT * FROM dynastr.dp_player_ranks", None),
+}
+
+# Columns identifying a row of an incremental dataset, for deduping the
+# overlap downstream. Trade rows are inserted once and never updated, so
+# the whole row is the key.
+DATASET_KEYS = {
+    "current_leagues": ["session_id", "league_id", "partition_date"],
+    "league_players": ["session_id", "user_id", "player_id", "league_id", "partition_date"],
+    "player_trades": None,
+    "draft_pick_trades": None,
+    "trade_rollups": ["league_id", "platform", "rank_type", "transaction_id", "user_id"],
+}
+
+ARROW_TYPES = {
+    "bool": pa.bool_(),
+    "int2": pa.int16(),
+    "int4": pa.int32(),
+    "int8": pa.int64(),
+    "float4": pa.float32(),
+    "float8": pa.float64(),
+    # Analysts aggregate values; float64 is what every tool reads natively
+    "numeric": pa.float64(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("us"),
+    "timestamptz": pa.timestamp("us", tz="UTC"),
+}
+
+
+def arrow_schema(attributes) -> pa.Schema:
+    # Everything without a native mapping (varchar, text, jsonb, ...) is a string
+    return pa.schema([(a.name, ARROW_TYPES.get(a.type.name, pa.string())) for a in attributes])
+
+
+def convert(value, arrow_type):
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return float(value)
+    if arrow_type == pa.string() and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def watermark_value(watermark_expr: str, raw):
+    # State is JSON; timestamps are stored as ISO strings
+    if raw is None:
+        return None
+    if watermark_expr.endswith("::bigint"):
+        return int(raw)
+    return datetime.fromisoformat(raw)
+
+
+def rewind(watermark_expr: str, since, overlap_seconds: float):
+    # The watermark is stamped when a write starts, but the row is only
+    # visible once its transaction commits, up to a request deadline later
+    if since is None:
+        return None
+    if watermark_expr.endswith("::bigint"):
+        # Sleeper's status_updated, in epoch milliseconds
+        return since - int(overlap_seconds * 1000)
+    return since - timedelta(seconds=overlap_seconds)
+
+
+async def export_dataset(connection, name: str, query: str, watermark_expr, since, out: Path,
+                         run_id: str, batch_size: int, rows_per_file: int) -> dict:
+    args = []
+    if watermark_expr is not None:
+        query = f"SELECT t.*, {watermark_expr} AS _watermark FROM ({query}) t"
+        if since is not None:
+            query += f" WHERE {watermark_expr} > $1"
+            args.append(since)
+
+    statement = await connection.prepare(query)
+    attributes = [a for a in statement.get_attributes() if a.name != "_watermark"]
+    schema = arrow_schema(attributes)
+    types = [schema.field(a.name).type for a in attributes]
+
+    partition = out / name / f"snapshot_date={date.today().isoformat()}"
+    partition.mkdir(parents=True, exist_ok=True)
+
+    stats = {"dataset": name, "rows": 0, "bytes": 0, "files": 0, "watermark": None}
+    started = time.monotonic()
+    writer = None
+    file_rows = 0
+    path = None
+    batch = []
+    max_watermark = None
+
+    def flush():
+        nonlocal writer, file_rows, path
+        if not batch:
+            return
+        if writer is None:
+            path = partition / f"part-{run_id}-{stats['files']:05d}.parquet"
+            writer = pq.ParquetWriter(path, schema, compression="zstd")
+            stats["files"] += 1
+        columns = [[convert(row[i], types[i]) for row in batch] for i in range(len(attributes))]
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=arrow_type) for column, arrow_type in zip(columns, types)], schema=schema))
+        file_rows += len(batch)
+        batch.clear()
+        if file_rows >= rows_per_file:
+            close_file()
+
+    def close_file():
+        nonlocal writer, file_rows
+        if writer is not None:
+            writer.close()
+            stats["bytes"] += path.stat().st_size
+            writer = None
+            file_rows = 0
+
+    # Server-side cursors only live inside a transaction
+    async with connection.transaction(readonly=True):
+        async for record in statement.cursor(*args, prefetch=batch_size):
+            batch.append(record)
+            stats["rows"] += 1
+            if watermark_expr is not None:
+                mark = record["_watermark"]
+                if mark is not None and (max_watermark is None or mark > max_watermark):
+                    max_watermark = mark
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+    close_file()
+
+    if max_watermark is not None:
+        stats["watermark"] = max_watermark.isoformat() if isinstance(max_watermark, datetime) else max_watermark
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    stats["rows_per_second"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] else stats["rows"]
+    return stats
+
+
+async def run(args):
+    load_dotenv()
+    replica_hosts = [h.strip() for h in os.getenv("replica_hosts", "").split(",") if h.strip()]
+    if replica_hosts and not args.primary:
+        host, _, port = replica_hosts[0].partition(":")
+        connection = await asyncpg.connect(
+            host=host,
+            port=int(port) if port else None,
+            database=os.getenv("replica_dbname", os.getenv("dbname")),
+            user=os.getenv("replica_user", os.getenv("user")),
+            password=os.getenv("replica_password", os.getenv("password")),
+            ssl=os.getenv("replica_sslmode", os.getenv("sslmode")),
+        )
+    else:
+        connection = await asyncpg.connect(
+            host=os.getenv("host"),
+            database=os.getenv("dbname"),
+            user=os.getenv("user"),
+            password=os.getenv("password"),
+            ssl=os.getenv("sslmode"),
+        )
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    state_path = out / "_export_state.json"
+    state = {} if args.full or not state_path.exists() else json.loads(state_path.read_text())
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+    totals = {"rows": 0, "bytes": 0}
+    started = time.monotonic()
+    try:
+        for name, (query, watermark_expr) in DATASETS.items():
+            if args.only and name not in args.only:
+                continue
+            since = None
+            if watermark_expr:
+                since = rewind(watermark_expr, watermark_value(watermark_expr, state.get(name)), args.overlap_seconds)
+            stats = await export_dataset(connection, name, query, watermark_expr, since, out, run_id,
+                                         args.batch_size, args.rows_per_file)
+            # Never moves back: a run that only re-read the overlap keeps the old mark
+            if stats["watermark"] is not None and (
+                    state.get(name) is None
+                    or watermark_value(watermark_expr, stats["watermark"]) > watermark_value(watermark_expr, state[name])):
+                state[name] = stats["watermark"]
+                # Saved per dataset so an interrupted run keeps what it finished
+                state_path.write_text(json.dumps(state, indent=2))
+            totals["rows"] += stats["rows"]
+            totals["bytes"] += stats["bytes"]
+            print(f"{name:<20} {stats['rows']:>10} rows {stats['bytes'] / 1e6:>9.2f} MB "
+                  f"{stats['files']:>3} files {stats['seconds']:>8.2f}s {stats['rows_per_second']:>9} rows/s")
+    finally:
+        await connection.close()
+
+    seconds = time.monotonic() - started
+    print(f"{'total':<20} {totals['rows']:>10} rows {totals['bytes'] / 1e6:>9.2f} MB "
+          f"{seconds:>14.2f}s {round(totals['rows'] / seconds) if seconds else 0:>9} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--full", action="store_true", help="ignore saved watermarks and export everything")
+    parser.add_argument("--only", nargs="+", choices=list(DATASETS), help="export only these datasets")
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows fetched and written per row group")
+    parser.add_argument("--rows-per-file", type=int, default=2000000, help="rows per Parquet file")
+    parser.add_argument("--overlap-seconds", type=float, default=900,
+                        help="re-export rows this far behind the saved watermark; must exceed the longest write")
+    parser.add_argument("--primary", action="store_true", help="read from the primary even if replicas exist")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
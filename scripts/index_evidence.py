@@ -0,0 +1,129 @@
+"""Records before/after plan evidence for the indexes a migration builds.
+
+    python scripts/index_evidence.py 002_access_path_indexes
+    python scripts/index_evidence.py 002_access_path_indexes --only summary/power
+
+Runs against the database scripts/plan_seed.py seeded, after the migration
+has been applied. Every template variant from plan_regression.py is
+explained once with all indexes in place. Then, for each index the
+migration creates, the variants are explained again inside a transaction
+that drops that index and is rolled back. Variants whose plan shape changes
+are reported with both shapes, execution times and buffers. The report is
+written next to the migration as <version>.plans.json.
+
+DROP INDEX inside the transaction takes an ACCESS EXCLUSIVE lock on the
+indexed table until the rollback, so only run this against the seeded
+database, never the primary.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import asyncpg
+from dotenv import load_dotenv
+
+from migrate import CONCURRENT_INDEX, MIGRATIONS_DIR, split_statements
+from plan_regression import SQL_DIR, explain, load_seed, template_variants
+
+
+def rendered_templates(params: dict, only: str = None) -> dict:
+    rendered = {}
+    for template_id, variant, replacements in template_variants(params):
+        if only and not template_id.startswith(only):
+            continue
+        sql = (SQL_DIR / f"{template_id}.sql").read_text().strip().rstrip(";")
+        if not sql:
+            continue
+        for placeholder, value in replacements.items():
+            sql = sql.replace(placeholder, value)
+        rendered[f"{template_id}[{variant}]"] = sql
+    return rendered
+
+
+async def explain_all(connection, rendered: dict) -> dict:
+    results = {}
+    for key, sql in rendered.items():
+        try:
+            results[key] = await explain(connection, sql)
+        except Exception as e:
+            results[key] = {"error": str(e)}
+    return results
+
+
+def summary(result: dict) -> dict:
+    return {name: result[name] for name in ("execution_ms", "shared_buffers", "plan_shape")}
+
+
+async def run(args) -> int:
+    load_dotenv()
+    migration_path = MIGRATIONS_DIR / f"{args.version}.sql"
+    indexes = []
+    for statement in split_statements(migration_path.read_text()):
+        concurrent_index = CONCURRENT_INDEX.search(statement)
+        if concurrent_index:
+            index, schema = concurrent_index.groups()
+            indexes.append(f"{schema}.{index}")
+    if not indexes:
+        print(f"error: {migration_path.name} builds no indexes concurrently")
+        return 1
+
+    seed = load_seed()
+    if not seed:
+        print("error: no seed manifest; seed the database with plan_seed.py first")
+        return 1
+    rendered = rendered_templates(seed, args.only)
+
+    connection = await asyncpg.connect(
+        host=os.getenv("host"),
+        database=os.getenv("dbname"),
+        user=os.getenv("user"),
+        password=os.getenv("password"),
+        ssl=os.getenv("sslmode"),
+    )
+    report = {"_seed": seed, "indexes": {}}
+    try:
+        with_indexes = await explain_all(connection, rendered)
+        for index in indexes:
+            transaction = connection.transaction()
+            await transaction.start()
+            try:
+                await connection.execute(f"DROP INDEX {index}")
+                without_index = await explain_all(connection, rendered)
+            finally:
+                await transaction.rollback()
+
+            changed = {}
+            for key, after in with_indexes.items():
+                before = without_index[key]
+                if "error" in after or "error" in before or before["plan_shape"] == after["plan_shape"]:
+                    continue
+                changed[key] = {"before": summary(before), "after": summary(after)}
+            report["indexes"][index] = changed
+            print(f"{index}: changes the plan of {len(changed)} template variants")
+            for key, plans in changed.items():
+                print(f"    {key}: {plans['before']['execution_ms']}ms -> {plans['after']['execution_ms']}ms, "
+                      f"{plans['before']['shared_buffers']} -> {plans['after']['shared_buffers']} buffers")
+    finally:
+        await connection.close()
+
+    report_path = MIGRATIONS_DIR / f"{args.version}.plans.json"
+    report_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    print(f"evidence written to {report_path}")
+    unused = [index for index, changed in report["indexes"].items() if not changed]
+    if unused:
+        # An index no template plan uses only costs writes
+        print(f"warning: no plan uses {', '.join(unused)}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("version", help="migration file name without .sql")
+    parser.add_argument("--only", help="only check templates whose id starts with this prefix")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Applies the versioned schema migrations in sql/migrations in order.
+
+    python scripts/migrate.py            # apply pending migrations
+    python scripts/migrate.py --status   # list applied and pending versions
+
+Applied versions are tracked in dynastr.schema_migrations. A migration that
+builds indexes CONCURRENTLY is run statement by statement outside a
+transaction, everything else runs in a single transaction. An index left
+INVALID by an earlier failed concurrent build is dropped and built again.
+"""
+import argparse
+import asyncio
+import os
+import re
+from pathlib import Path
+
+import asyncpg
+from dotenv import load_dotenv
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "sql" / "migrations"
+
+CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)\s+ON\s+(\w+)\.", re.IGNORECASE)
+
+
+def split_statements(sql: str) -> list:
+    statements = []
+    for statement in sql.split(";"):
+        lines = [line for line in statement.splitlines() if not line.strip().startswith("--")]
+        statement = "\n".join(lines).strip()
+        if statement:
+            statements.append(statement)
+    return statements
+
+
+async def index_valid(connection, schema: str, index: str):
+    # None when the index does not exist
+    return await connection.fetchval("""
+        SELECT i.indisvalid
+        FROM pg_index i
+        INNER JOIN pg_class c on i.indexrelid = c.oid
+        INNER JOIN pg_namespace ns on c.relnamespace = ns.oid
+        WHERE ns.nspname = $1 and c.relname = $2
+    """, schema, index)
+
+
+async def create_index_concurrently(connection, statement: str, schema: str, index: str):
+    # A failed or cancelled CREATE INDEX CONCURRENTLY leaves an INVALID index
+    # behind, which IF NOT EXISTS would then skip on every later run
+    if await index_valid(connection, schema, index) is False:
+        print(f"rebuilding invalid index {schema}.{index}")
+        await connection.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema}."{index}"')
+    await connection.execute(statement)
+    if not await index_valid(connection, schema, index):
+        raise RuntimeError(f"index {schema}.{index} is not valid after building it")
+
+
+async def apply_migration(connection, version: str, sql: str):
+    if "CONCURRENTLY" in sql:
+        for statement in split_statements(sql):
+            concurrent_index = CONCURRENT_INDEX.search(statement)
+            if concurrent_index:
+                index, schema = concurrent_index.groups()
+                await create_index_concurrently(connection, statement, schema, index)
+            else:
+                await connection.execute(statement)
+        await connection.execute("INSERT INTO dynastr.schema_migrations (version) VALUES ($1)", version)
+    else:
+        async with connection.transaction():
+            await connection.execute(sql)
+            await connection.execute("INSERT INTO dynastr.schema_migrations (version) VALUES ($1)", version)
+
+
+async def run(args):
+    load_dotenv()
+    connection = await asyncpg.connect(
+        host=os.getenv("host"),
+        database=os.getenv("dbname"),
+        user=os.getenv("user"),
+        password=os.getenv("password"),
+        ssl=os.getenv("sslmode"),
+    )
+    try:
+        await connection.execute("""
+            CREATE TABLE IF NOT EXISTS dynastr.schema_migrations (
+                version varchar PRIMARY KEY,
+                applied_at timestamp NOT NULL DEFAULT now()
+            )
+        """)
+        applied = {r["version"] for r in await connection.fetch("SELECT version FROM dynastr.schema_migrations")}
+
+        for migration_path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            version = migration_path.stem
+            if version in applied:
+                if args.status:
+                    print(f"applied  {version}")
+                continue
+            if args.status:
+                print(f"pending  {version}")
+                continue
+            print(f"applying {version}")
+            await apply_migration(connection, version, migration_path.read_text())
+    finally:
+        await connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
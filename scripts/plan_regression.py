@@ -0,0 +1,280 @@
+"""Query plan regression harness for the templates under sql/.
+
+Renders every template with representative parameters for each platform,
+rank_type and roster_type variant, runs EXPLAIN (ANALYZE, BUFFERS) against a
+seeded database and compares execution time, buffers and plan shape with the
+committed baseline in scripts/plan_baseline.json.
+
+    python scripts/plan_seed.py --league-id 123 --session-id abc --user-id 456
+    python scripts/plan_regression.py
+    python scripts/plan_regression.py --update   # re-record the baseline
+
+The database is the one scripts/plan_seed.py seeded; the league, session and
+user ids default to the ones in its scripts/plan_seed.json manifest, which
+--update also records in the baseline. Connection settings come from the
+same host/dbname/user/password/sslmode environment variables as db.py.
+Exits non-zero when a template regresses, fails to run or has no baseline
+entry, when the baseline is missing, or when it was recorded against a
+different seed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import asyncpg
+from dotenv import load_dotenv
+
+ROOT = Path(__file__).resolve().parent.parent
+SQL_DIR = ROOT / "sql"
+BASELINE_PATH = Path(__file__).resolve().parent / "plan_baseline.json"
+SEED_PATH = Path(__file__).resolve().parent / "plan_seed.json"
+# Baseline entry holding the seed manifest it was recorded against
+SEED_KEY = "_seed"
+
+POWER_PLATFORMS = ["ktc", "sf", "fc", "dd", "dp"]
+TRADE_PLATFORMS = ["ktc", "sf", "fc", "dd", "dp"]
+CONTENDER_SOURCES = ["espn", "cbs", "nfl", "fp", "fc"]
+RANK_TYPES = ["dynasty", "redraft"]
+ROSTER_TYPES = ["Superflex", "Single QB"]
+
+# A sequential scan of one of these tables in a per-league template is a regression
+# Daily session partitions (league_players_p20240901) are reported as their
+# parent, so the watch list and plan shapes do not change from day to day
+PARTITION_SUFFIX = re.compile(r"_(p\d{8}|default)$")
+
+WATCHED_RELATIONS = ["league_players", "players", "draft_picks", "draft_positions", "current_leagues", "managers"]
+
+# Directories that hold DDL or multi-statement scripts rather than queries
+SKIPPED_DIRS = ["migrations", "projections", "trade_rollups", "consensus", "value_history"]
+
+# fc contender projections are read from player_projections_index (the
+# contender/index templates); these still take a league_type placeholder
+# but no route renders them any more
+UNUSED_TEMPLATES = ["summary/contender/fc", "details/contender/fc", "best_available/contender/fc"]
+
+TIME_FACTOR = 2.0
+TIME_FLOOR_MS = 25.0
+BUFFER_FACTOR = 1.5
+
+
+def league_columns(platform: str, roster_type: str):
+    superflex = roster_type == "Superflex"
+    if platform == "sf":
+        return (("superflex_sf_value" if superflex else "superflex_one_qb_value"),
+                ("superflex_sf_pos_rank" if superflex else "superflex_one_qb_pos_rank"))
+    if platform == "dd":
+        return (("sf_trade_value" if superflex else "trade_value"),
+                ("sf_position_rank" if superflex else "position_rank"))
+    if platform == "fc":
+        return (("sf_value" if superflex else "one_qb_value"),
+                ("sf_position_rank" if superflex else "one_qb_position_rank"))
+    return ("sf_value" if superflex else "one_qb_value"), ""
+
+
+def template_variants(params: dict):
+    """Yields (template_id, variant, replacements) for every template and variant."""
+    session = {"'session_id'": f"'{params['session_id']}'", "'league_id'": f"'{params['league_id']}'"}
+
+    for rank_source in ["summary", "details"]:
+        # The consensus platform only has a league summary template
+        power_platforms = POWER_PLATFORMS + ["consensus"] if rank_source == "summary" else POWER_PLATFORMS
+        for platform in power_platforms:
+            for rank_type in RANK_TYPES:
+                for roster_type in ROSTER_TYPES:
+                    league_type, league_pos_col = league_columns(platform, roster_type)
+                    yield (f"{rank_source}/power/{platform}", f"{rank_type}/{roster_type}", {
+                        **session,
+                        "league_type": league_type,
+                        "league_pos_col": league_pos_col,
+                        "'rank_type'": f"'{rank_type}'",
+                    })
+        for platform in TRADE_PLATFORMS:
+            for rank_type in RANK_TYPES:
+                for roster_type in ROSTER_TYPES:
+                    league_type, _ = league_columns(platform, roster_type)
+                    yield (f"{rank_source}/trades/{platform}", f"{rank_type}/{roster_type}", {
+                        "'current_year'": f"'{params['league_year']}'",
+                        "'league_id'": f"'{params['league_id']}'",
+                        "league_type": league_type,
+                        "'rank_type'": f"'{rank_type}'",
+                    })
+                    yield (f"{rank_source}/trades/rollup", f"{platform}/{rank_type}/{roster_type}", {
+                        "'league_id'": f"'{params['league_id']}'",
+                        "'platform'": f"'{platform}'",
+                        "league_type": "sf" if roster_type == "Superflex" else "one_qb",
+                        "'rank_type'": f"'{rank_type}'",
+                    })
+        for projection_source in CONTENDER_SOURCES:
+            yield (f"{rank_source}/contender/index", projection_source, {
+                **session,
+                "'projection_source'": f"'{projection_source}'",
+            })
+
+    yield ("leagues/get_leagues", "default", {
+        "'session_id'": f"'{params['session_id']}'",
+        "'user_id'": f"'{params['user_id']}'",
+        "'league_year'": f"'{params['league_year']}'",
+    })
+
+    # Everything else takes only session/league placeholders, or none at all
+    covered = {"summary/power", "details/power", "summary/trades", "details/trades",
+               "leagues"}
+    for sql_path in sorted(SQL_DIR.rglob("*.sql")):
+        relative = sql_path.relative_to(SQL_DIR).with_suffix("")
+        template_id = relative.as_posix()
+        if relative.parts[0] in SKIPPED_DIRS or relative.parent.as_posix() in covered:
+            continue
+        if template_id in ("summary/contender/index", "details/contender/index"):
+            continue
+        if template_id in UNUSED_TEMPLATES:
+            continue
+        yield template_id, "default", session
+
+
+def plan_shape(node: dict, shape: list, seq_scans: set):
+    relation = node.get("Relation Name")
+    if relation:
+        relation = PARTITION_SUFFIX.sub("", relation)
+    shape.append(f"{node['Node Type']}({relation})" if relation else node["Node Type"])
+    if node["Node Type"] == "Seq Scan" and relation:
+        seq_scans.add(relation)
+    children = []
+    for child in node.get("Plans", []):
+        child_shape = []
+        plan_shape(child, child_shape, seq_scans)
+        # One entry per distinct partition scan, however many partitions exist today
+        if node["Node Type"] in ("Append", "Merge Append") and child_shape in children:
+            continue
+        children.append(child_shape)
+    for child_shape in children:
+        shape.extend(child_shape)
+
+
+async def explain(connection, sql: str) -> dict:
+    # ANALYZE executes the statement, so the ranks_summary upserts are rolled back
+    transaction = connection.transaction()
+    await transaction.start()
+    try:
+        explain_result = await connection.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    finally:
+        await transaction.rollback()
+
+    plan = json.loads(explain_result)[0]
+    shape, seq_scans = [], set()
+    plan_shape(plan["Plan"], shape, seq_scans)
+    return {
+        "execution_ms": round(plan["Execution Time"], 3),
+        "shared_buffers": plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0),
+        "plan_shape": shape,
+        "seq_scans": sorted(seq_scans),
+    }
+
+
+def compare(key: str, current: dict, baseline: dict) -> list:
+    if baseline is None:
+        # A new template or variant; record it with --update once reviewed
+        return [f"{key}: no baseline recorded"]
+
+    problems = []
+    for relation in current["seq_scans"]:
+        if relation in WATCHED_RELATIONS and relation not in baseline["seq_scans"]:
+            problems.append(f"{key}: new Seq Scan on {relation}")
+    time_budget = max(baseline["execution_ms"] * TIME_FACTOR, baseline["execution_ms"] + TIME_FLOOR_MS)
+    if current["execution_ms"] > time_budget:
+        problems.append(f"{key}: execution {current['execution_ms']}ms over budget {round(time_budget, 3)}ms")
+    if current["shared_buffers"] > baseline["shared_buffers"] * BUFFER_FACTOR and current["shared_buffers"] > 100:
+        problems.append(f"{key}: {current['shared_buffers']} buffers vs baseline {baseline['shared_buffers']}")
+    if current["plan_shape"] != baseline["plan_shape"]:
+        print(f"note {key}: plan shape changed")
+    return problems
+
+
+def load_seed() -> dict:
+    return json.loads(SEED_PATH.read_text()) if SEED_PATH.exists() else {}
+
+
+async def run(args) -> int:
+    load_dotenv()
+    seed = load_seed()
+    if not args.update and not BASELINE_PATH.exists():
+        print(f"error: no baseline at {BASELINE_PATH}; seed with plan_seed.py and record one with --update")
+        return 1
+    params = {
+        name: getattr(args, name) or seed.get(name)
+        for name in ["league_id", "session_id", "user_id", "league_year"]
+    }
+    params["league_year"] = params["league_year"] or "2024"
+    missing = [name for name, value in params.items() if not value]
+    if missing:
+        print(f"error: no {', '.join(missing)} given and none in {SEED_PATH}")
+        return 1
+    connection = await asyncpg.connect(
+        host=os.getenv("host"),
+        database=os.getenv("dbname"),
+        user=os.getenv("user"),
+        password=os.getenv("password"),
+        ssl=os.getenv("sslmode"),
+    )
+
+    results = {}
+    try:
+        for template_id, variant, replacements in template_variants(params):
+            if args.only and not template_id.startswith(args.only):
+                continue
+            sql = (SQL_DIR / f"{template_id}.sql").read_text().strip().rstrip(";")
+            if not sql:
+                continue
+            for placeholder, value in replacements.items():
+                sql = sql.replace(placeholder, value)
+            key = f"{template_id}[{variant}]"
+            try:
+                results[key] = await explain(connection, sql)
+            except Exception as e:
+                results[key] = {"error": str(e)}
+            print(f"{key}: {results[key].get('execution_ms', results[key].get('error'))}")
+    finally:
+        await connection.close()
+
+    if args.update:
+        if not seed:
+            print(f"error: no seed manifest at {SEED_PATH}; seed the database with plan_seed.py first")
+            return 1
+        results[SEED_KEY] = seed
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {BASELINE_PATH}")
+        return 0
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    problems = []
+    if baseline.get(SEED_KEY) != seed:
+        # Timings and plans from another data set are not comparable
+        problems.append(f"baseline was recorded against a different seed than {SEED_PATH}")
+    for key, current in results.items():
+        if "error" in current:
+            problems.append(f"{key}: {current['error']}")
+            continue
+        problems.extend(compare(key, current, baseline.get(key)))
+
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    print(f"{len(results)} plans checked, {len(problems)} regressions")
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--league-id", help="defaults to the seed manifest's")
+    parser.add_argument("--session-id", help="defaults to the seed manifest's")
+    parser.add_argument("--user-id", help="defaults to the seed manifest's")
+    parser.add_argument("--league-year", help="defaults to the seed manifest's, or 2024")
+    parser.add_argument("--only", help="only check templates whose id starts with this prefix")
+    parser.add_argument("--update", action="store_true", help="record the current plans as the baseline")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Seeds the database plan_regression.py runs against with one league copied
+from a source database, so the committed plan baseline can be reproduced.
+
+    python scripts/migrate.py
+    python scripts/plan_seed.py --league-id 123 --session-id abc --user-id 456
+
+The target is the usual host/dbname/user/password/sslmode database, which
+must already have the schema (pg_dump --schema-only of the source, then
+migrate.py). The source is read with the same settings prefixed with
+source_ (source_host, source_dbname, ...). Shared tables such as players and
+every platform's ranks are copied whole; league and session tables only keep
+the chosen league. Session rows are stamped with today's partition_date so
+they land in a daily partition, as a fresh session would.
+
+The ids, row counts and seed time are written to scripts/plan_seed.json,
+which plan_regression.py reads for its defaults and records in the baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import asyncpg
+from dotenv import load_dotenv
+
+MANIFEST_PATH = Path(__file__).resolve().parent / "plan_seed.json"
+
+SHARED_TABLES = [
+    "players",
+    "ktc_player_ranks",
+    "sf_player_ranks",
+    "fc_player_ranks",
+    "dd_player_ranks",
+    "dp_player_ranks",
+    "consensus_player_values",
+    "player_projections_index",
+    "nfl_player_projections",
+    "espn_player_projections",
+    "cbs_player_projections",
+    "fp_player_projections",
+]
+
+# table -> (filter, the arguments it takes in order)
+FILTERED_TABLES = {
+    "draft_positions": ("league_id = $1", ["league_id"]),
+    "player_trades": ("league_id = $1", ["league_id"]),
+    "draft_pick_trades": ("league_id = $1", ["league_id"]),
+    "trade_rollups": ("league_id = $1", ["league_id"]),
+    "managers": ("user_id IN (SELECT user_id FROM dynastr.league_players WHERE league_id = $1 and session_id = $2)",
+                 ["league_id", "session_id"]),
+    # Every league of the session, so leagues/get_leagues sees a real list
+    "current_leagues": ("session_id = $1", ["session_id"]),
+    "league_players": ("league_id = $1 and session_id = $2", ["league_id", "session_id"]),
+    "draft_picks": ("league_id = $1 and session_id = $2", ["league_id", "session_id"]),
+}
+
+
+async def connect(prefix: str = ""):
+    return await asyncpg.connect(
+        host=os.getenv(f"{prefix}host"),
+        database=os.getenv(f"{prefix}dbname"),
+        user=os.getenv(f"{prefix}user"),
+        password=os.getenv(f"{prefix}password"),
+        ssl=os.getenv(f"{prefix}sslmode"),
+    )
+
+
+async def table_columns(connection, table: str) -> list:
+    rows = await connection.fetch("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'dynastr' and table_name = $1
+        ORDER BY ordinal_position
+    """, table)
+    return [row["column_name"] for row in rows]
+
+
+async def copy_table(source, target, table: str, where: str = None, args: list = ()) -> int:
+    columns = await table_columns(target, table)
+    selected = ", ".join("current_date" if column == "partition_date" else f'"{column}"' for column in columns)
+    query = f"SELECT {selected} FROM dynastr.{table}"
+    if where:
+        query += f" WHERE {where}"
+    records = await source.fetch(query, *args)
+
+    await target.execute(f"TRUNCATE dynastr.{table}")
+    if records:
+        await target.copy_records_to_table(table, schema_name="dynastr", columns=columns, records=records)
+    print(f"{table}: {len(records)} rows")
+    return len(records)
+
+
+async def run(args):
+    load_dotenv()
+    source = await connect("source_")
+    target = await connect()
+    params = vars(args)
+    row_counts = {}
+    try:
+        async with target.transaction():
+            await target.execute("SELECT dynastr.ensure_session_partitions()")
+            for table in SHARED_TABLES:
+                row_counts[table] = await copy_table(source, target, table)
+            for table, (where, names) in FILTERED_TABLES.items():
+                row_counts[table] = await copy_table(source, target, table, where, [params[n] for n in names])
+        # Plans depend on statistics as much as on the data
+        await target.execute("ANALYZE")
+        server_version = await target.fetchval("SHOW server_version")
+    finally:
+        await source.close()
+        await target.close()
+
+    manifest = {
+        "league_id": args.league_id,
+        "session_id": args.session_id,
+        "user_id": args.user_id,
+        "league_year": args.league_year,
+        "server_version": server_version,
+        "seeded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "row_counts": row_counts,
+    }
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    print(f"seed manifest written to {MANIFEST_PATH}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--league-id", required=True)
+    parser.add_argument("--session-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--league-year", default="2024")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Local stand-in for the Sleeper API that injects failures.
+
+    python scripts/sleeper_stub.py --port 8089 --rate-429 0.2 --rate-timeout 0.05
+    sleeper_base_url=http://localhost:8089/v1 gunicorn -c gunicorn.conf.py main:app
+
+Every GET under /v1 returns a small canned payload. A share of requests is
+answered with 429 (and a Retry-After header) or left hanging past the
+client's timeout, so the rate limiter, retries and circuit breaker in
+sleeper_client.py can be exercised without touching Sleeper.
+"""
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+
+def canned_payload(path: str):
+    if path.endswith("/state/nfl"):
+        return {"season": "2024", "season_type": "regular", "leg": 4, "week": 4}
+    if "/transactions/" in path:
+        return []
+    if path.endswith("/rosters") or path.endswith("/users") or path.endswith("/traded_picks") or path.endswith("/drafts"):
+        return []
+    if "/user/" in path:
+        return {"user_id": "1", "username": path.rsplit("/", 1)[-1], "display_name": "stub"}
+    return {}
+
+
+def make_app(args) -> web.Application:
+    counts = {"ok": 0, "429": 0, "timeout": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        roll = random.random()
+        if roll < args.rate_429:
+            counts["429"] += 1
+            return web.json_response({"error": "rate limited"}, status=429,
+                                     headers={"Retry-After": str(args.retry_after)})
+        if roll < args.rate_429 + args.rate_timeout:
+            counts["timeout"] += 1
+            await asyncio.sleep(args.hang_seconds)
+        counts["ok"] += 1
+        return web.json_response(canned_payload(request.path))
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(counts)
+
+    app = web.Application()
+    app.router.add_get("/_stats", stats)
+    app.router.add_get("/v1/{tail:.*}", handle)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--rate-429", type=float, default=0.1)
+    parser.add_argument("--rate-timeout", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--hang-seconds", type=float, default=30)
+    args = parser.parse_args()
+    web.run_app(make_app(args), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures a worker's cold start and fails when it goes over budget.
+
+    python scripts/startup_budget.py                       # default budgets
+    python scripts/startup_budget.py --max-import-ms 800 --max-rss-mb 90
+
+Imports main in fresh interpreters, the way a recycled gunicorn worker does,
+and reports the median import time and peak resident memory together with
+the modules that cost the most (from python -X importtime). Exits 1 when
+either figure is over its budget, so it can gate CI or an image build.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MEASURE = """
+import json, resource, time
+started = time.perf_counter()
+import main
+print(json.dumps({
+    "import_ms": (time.perf_counter() - started) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return modules
+
+
+def measure() -> tuple:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", MEASURE], cwd=ROOT,
+                            capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if result.returncode != 0:
+        sys.exit(f"Importing main failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--max-import-ms", type=float,
+                        default=float(os.getenv("startup_import_budget_ms", "1500")))
+    parser.add_argument("--max-rss-mb", type=float, default=float(os.getenv("startup_rss_budget_mb", "150")))
+    parser.add_argument("--top", type=int, default=15, help="most expensive top-level imports to list")
+    args = parser.parse_args()
+
+    # The first run warms the OS page cache and .pyc files; it is not counted
+    measure()
+    runs = [measure() for _ in range(args.runs)]
+    import_ms = statistics.median(r[0]["import_ms"] for r in runs)
+    rss_mb = statistics.median(r[0]["max_rss_mb"] for r in runs)
+
+    # Top-level imports only: nested ones are already in their parent's cumulative time
+    modules = [m for m in runs[-1][1] if not m[2].startswith("  ")]
+    modules.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in modules[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name.strip()}")
+
+    print(f"\nimport main: {import_ms:.0f} ms (budget {args.max_import_ms:.0f}), "
+          f"max RSS: {rss_mb:.1f} MB (budget {args.max_rss_mb:.0f}), median of {args.runs}")
+    over = []
+    if import_ms > args.max_import_ms:
+        over.append("import time")
+    if rss_mb > args.max_rss_mb:
+        over.append("resident memory")
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
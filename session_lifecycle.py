@@ -0,0 +1,201 @@
+import asyncio
+import os
+import re
+from datetime import datetime
+
+import asyncpg
+
+import db as database
+from db import logger
+from deadlines import start_deadline
+
+SESSION_TABLES = ["current_leagues", "league_players", "draft_picks"]
+
+# Session copies older than this many days are dropped with their partition
+SESSION_RETENTION_DAYS = int(os.getenv("session_retention_days", "7"))
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv("session_sweep_interval_seconds", "3600"))
+# Daily partitions are created this many days ahead of inserts
+SESSION_PARTITIONS_AHEAD = int(os.getenv("session_partitions_ahead", "7"))
+# How long the sweeper waits for a table lock before leaving that step to the next sweep
+SESSION_SWEEP_LOCK_TIMEOUT_MS = int(os.getenv("session_sweep_lock_timeout_ms", "2000"))
+
+PARTITION_SUFFIX = re.compile(r"_p(\d{8})$")
+
+
+async def session_table_sizes(db) -> dict:
+    sizes = {}
+    for table in SESSION_TABLES:
+        sizes[table] = await db.fetchval(
+            """
+            SELECT coalesce(sum(pg_total_relation_size(relid)), 0)
+            FROM pg_partition_tree($1::regclass)
+            """,
+            f"dynastr.{table}",
+        )
+    return sizes
+
+
+async def expired_partitions(db, table: str, cutoff) -> list:
+    # (name, attached) for daily partitions older than the cutoff, including
+    # ones an earlier sweep detached but did not get to drop
+    rows = await db.fetch(
+        """
+        SELECT c.relname, i.inhrelid IS NOT NULL as attached
+        FROM pg_class c
+        INNER JOIN pg_namespace ns on c.relnamespace = ns.oid
+        LEFT JOIN pg_inherits i on i.inhrelid = c.oid
+        WHERE ns.nspname = 'dynastr'
+        and c.relkind = 'r'
+        and c.relname ~ ('^' || $1 || '_p[0-9]{8}$')
+        """,
+        table,
+    )
+    expired = []
+    for row in rows:
+        match = PARTITION_SUFFIX.search(row["relname"])
+        if match and datetime.strptime(match.group(1), "%Y%m%d").date() < cutoff:
+            expired.append((row["relname"], row["attached"]))
+    return sorted(expired)
+
+
+async def detach_partition(db, table: str, partition: str) -> bool:
+    # DETACH takes an ACCESS EXCLUSIVE lock on the parent, which queues every
+    # read and write of the table behind it, so each partition gets its own
+    # short transaction that gives up rather than wait behind a long query.
+    # (DETACH ... CONCURRENTLY is not allowed while a default partition exists.)
+    try:
+        async with db.transaction():
+            await db.execute(f"SET LOCAL lock_timeout = {SESSION_SWEEP_LOCK_TIMEOUT_MS}")
+            await db.execute(f'ALTER TABLE dynastr.{table} DETACH PARTITION dynastr."{partition}"')
+    except asyncpg.exceptions.LockNotAvailableError:
+        logger.info(f"session sweep: {table} busy, {partition} left for the next sweep")
+        return False
+    return True
+
+
+async def sweep_expired_sessions(db, retention_days: int = SESSION_RETENTION_DAYS) -> dict:
+    # Only one worker across all hosts sweeps at a time. A session-level lock,
+    # since the sweep is a series of short transactions rather than one.
+    locked = await db.fetchval("SELECT pg_try_advisory_lock(hashtext('dynastr.session_sweeper'))")
+    if not locked:
+        return {"swept": False}
+    try:
+        return await sweep_locked(db, retention_days)
+    finally:
+        await db.execute("SELECT pg_advisory_unlock(hashtext('dynastr.session_sweeper'))")
+
+
+async def sweep_locked(db, retention_days: int) -> dict:
+    # The database's date, the same clock partition_date defaults to
+    cutoff = await db.fetchval("SELECT current_date - $1::integer", retention_days)
+    sizes_before = await session_table_sizes(db)
+    dropped = []
+
+    # Its own transaction: ATTACH also locks the parent, and the default
+    # partition catches inserts if the days ahead are not created this time
+    try:
+        async with db.transaction():
+            await db.execute(f"SET LOCAL lock_timeout = {SESSION_SWEEP_LOCK_TIMEOUT_MS}")
+            await db.execute("SELECT dynastr.ensure_session_partitions($1)", SESSION_PARTITIONS_AHEAD)
+    except asyncpg.exceptions.LockNotAvailableError:
+        logger.info("session sweep: session tables busy, partitions ahead left for the next sweep")
+
+    for table in SESSION_TABLES:
+        for partition, attached in await expired_partitions(db, table, cutoff):
+            if attached and not await detach_partition(db, table, partition):
+                continue
+            # Only locks the detached table, which no query reaches any more
+            await db.execute(f'DROP TABLE dynastr."{partition}"')
+            dropped.append(partition)
+        # Rows that landed in the default partition expire row by row
+        await db.execute(f"DELETE FROM dynastr.{table}_default WHERE partition_date < $1", cutoff)
+
+    sizes_after = await session_table_sizes(db)
+    for table in SESSION_TABLES:
+        logger.info(f"session sweep {table}: {sizes_before[table]} -> {sizes_after[table]} bytes")
+    logger.info(f"session sweep dropped {len(dropped)} partitions older than {cutoff}")
+    return {"swept": True, "dropped": dropped, "sizes_before": sizes_before, "sizes_after": sizes_after}
+
+
+async def run_session_sweeper():
+    # Started from the startup hook; a sweep runs without a request deadline
+    start_deadline(None)
+    while True:
+        try:
+            await database.ensure_pools()
+            async with database.pool.acquire() as connection:
+                await sweep_expired_sessions(connection)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Session sweep failed: {e}")
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+
+
+async def rehydrate_session(db, session_id: str, user_id: str, league_year: str) -> int:
+    # A returning session whose copy was swept, or a new browser for a known
+    # user, is filled from the user's newest session instead of re-ingesting
+    # every league and roster from Sleeper.
+    async with db.transaction():
+        source_session_id = await db.fetchval(
+            """
+            SELECT session_id
+            FROM dynastr.current_leagues
+            WHERE user_id = $1
+            and league_year = $2
+            and session_id <> $3
+            ORDER BY partition_date desc, insert_date desc
+            LIMIT 1
+            """,
+            user_id, league_year, session_id,
+        )
+        if source_session_id is None:
+            return 0
+
+        status = await db.execute(
+            """
+            INSERT INTO dynastr.current_leagues (
+                session_id, user_id, user_name, league_id, league_name, avatar,
+                total_rosters, qb_cnt, rb_cnt, wr_cnt, te_cnt, flex_cnt, sf_cnt,
+                starter_cnt, total_roster_cnt, sport, insert_date, rf_cnt, league_cat,
+                league_year, previous_league_id
+            )
+            SELECT $1, user_id, user_name, league_id, league_name, avatar,
+                total_rosters, qb_cnt, rb_cnt, wr_cnt, te_cnt, flex_cnt, sf_cnt,
+                starter_cnt, total_roster_cnt, sport, insert_date, rf_cnt, league_cat,
+                league_year, previous_league_id
+            FROM dynastr.current_leagues
+            WHERE session_id = $2
+            and user_id = $3
+            and league_year = $4
+            ON CONFLICT DO NOTHING
+            """,
+            session_id, source_session_id, user_id, league_year,
+        )
+        await db.execute(
+            """
+            INSERT INTO dynastr.league_players (session_id, owner_user_id, player_id, league_id, user_id, insert_date)
+            SELECT $1, lp.owner_user_id, lp.player_id, lp.league_id, lp.user_id, lp.insert_date
+            FROM dynastr.league_players lp
+            INNER JOIN dynastr.current_leagues cl on cl.league_id = lp.league_id and cl.session_id = lp.session_id
+            WHERE lp.session_id = $2
+            and cl.league_year = $3
+            ON CONFLICT DO NOTHING
+            """,
+            session_id, source_session_id, league_year,
+        )
+        await db.execute(
+            """
+            INSERT INTO dynastr.draft_picks (year, round, round_name, roster_id, owner_id, league_id, draft_id, session_id)
+            SELECT dp.year, dp.round, dp.round_name, dp.roster_id, dp.owner_id, dp.league_id, dp.draft_id, $1
+            FROM dynastr.draft_picks dp
+            INNER JOIN dynastr.current_leagues cl on cl.league_id = dp.league_id and cl.session_id = dp.session_id
+            WHERE dp.session_id = $2
+            and cl.league_year = $3
+            ON CONFLICT DO NOTHING
+            """,
+            session_id, source_session_id, league_year,
+        )
+    rehydrated = int(status.split()[-1])
+    logger.info(f"Rehydrated {rehydrated} leagues for session {session_id} from {source_session_id}")
+    return rehydrated
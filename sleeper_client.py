@@ -0,0 +1,259 @@
+import asyncio
+import os
+import random
+import time
+
+import aiohttp
+
+from db import logger
+from payloads import loads
+from deadlines import bounded_timeout, check_deadline, remaining, DeadlineExceeded
+
+SLEEPER_API = os.getenv("sleeper_base_url", "https://api.sleeper.app/v1").rstrip("/")
+
+# Sleeper asks clients to stay under 1000 calls per minute; this is per worker
+SLEEPER_RATE_PER_SECOND = float(os.getenv("sleeper_rate_per_second", "8"))
+SLEEPER_BURST = int(os.getenv("sleeper_burst", "20"))
+SLEEPER_MAX_CONCURRENCY = int(os.getenv("sleeper_max_concurrency", "10"))
+# The breaker opens after this many consecutive failed calls and stays open for the cooldown
+SLEEPER_BREAKER_THRESHOLD = int(os.getenv("sleeper_breaker_threshold", "10"))
+SLEEPER_BREAKER_COOLDOWN_SECONDS = float(os.getenv("sleeper_breaker_cooldown_seconds", "30"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Raised without calling Sleeper while the circuit breaker is open."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        # Returns how long the caller waited for a token
+        waited = 0.0
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            # Let a single call through to probe whether Sleeper recovered
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        # Returns True when this failure opens the breaker
+        self.failures += 1
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+            return True
+        return False
+
+    def release_trial(self):
+        # Frees the half-open probe when the call holding it ended without an
+        # outcome (cancelled, deadline, early exit) so the next call can probe
+        self.trial_in_flight = False
+
+
+class SleeperClient:
+    def __init__(self):
+        self.bucket = TokenBucket(SLEEPER_RATE_PER_SECOND, SLEEPER_BURST)
+        self.semaphore = asyncio.Semaphore(SLEEPER_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(SLEEPER_BREAKER_THRESHOLD, SLEEPER_BREAKER_COOLDOWN_SECONDS)
+        self.session = None
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "throttle_wait_seconds": 0.0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "breaker_trips": 0,
+            "breaker_rejections": 0,
+        }
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "breaker_state": self.breaker.state}
+
+    def retry_delay(self, retry: int, backoff_factor: float, max_retries: int, retry_after: str = None) -> float:
+        if retry_after:
+            try:
+                # Capped at the longest backoff, so a bad or hostile header
+                # cannot park the call for minutes
+                return min(backoff_factor * (2 ** max_retries), max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter keeps workers that failed together from retrying together
+        return random.uniform(0, backoff_factor * (2 ** retry))
+
+    def cut_by_deadline(self, attempt_timeout: float, timeout: float) -> bool:
+        # A timeout whose limit came from the request deadline rather than the
+        # caller's timeout says nothing about Sleeper's health
+        left = remaining()
+        return attempt_timeout < timeout or (left is not None and left <= 0)
+
+    async def get(self, url, params=None, headers=None, timeout=10, max_retries=5, backoff_factor=1):
+        session = await self.get_session()
+        for retry in range(max_retries):
+            check_deadline()
+            if not self.breaker.allow():
+                self.stats["breaker_rejections"] += 1
+                raise CircuitOpenError(f"Sleeper circuit open, not calling {url}")
+
+            trial = self.breaker.state == "half_open"
+            try:
+                waited = await self.bucket.acquire()
+                if waited:
+                    self.stats["throttled"] += 1
+                    self.stats["throttle_wait_seconds"] += waited
+                # Each attempt only gets what is left of the request deadline,
+                # taken after the bucket since it may have slept
+                attempt_timeout = bounded_timeout(timeout)
+
+                retry_after = None
+                try:
+                    async with self.semaphore:
+                        self.stats["requests"] += 1
+                        async with session.get(url, params=params, headers=headers,
+                                               timeout=aiohttp.ClientTimeout(total=attempt_timeout)) as response:
+                            if response.status in RETRYABLE_STATUSES:
+                                retry_after = response.headers.get("Retry-After")
+                                if response.status == 429:
+                                    self.stats["rate_limited"] += 1
+                            response.raise_for_status()
+                            body = await response.read()
+                    self.breaker.record_success()
+                    # Decoded after the semaphore is released
+                    return loads(body)
+                except DeadlineExceeded:
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if isinstance(e, aiohttp.ClientResponseError) and e.status not in RETRYABLE_STATUSES:
+                        # A 404 for a bad league or user id will not get better with
+                        # retries, but Sleeper did answer, so it counts as up
+                        self.breaker.record_success()
+                        raise
+                    if isinstance(e, asyncio.TimeoutError):
+                        if self.cut_by_deadline(attempt_timeout, timeout):
+                            raise DeadlineExceeded(f"Request deadline exceeded calling {url}") from e
+                        self.stats["timeouts"] += 1
+                    if self.breaker.record_failure():
+                        self.stats["breaker_trips"] += 1
+                        logger.error(f"Sleeper circuit opened after {self.breaker.failures} failures")
+
+                    if retry < max_retries - 1:
+                        sleep_time = self.retry_delay(retry, backoff_factor, max_retries, retry_after)
+                        left = remaining()
+                        if left is not None and sleep_time >= left:
+                            # No budget left for another attempt after backing off
+                            logger.error(f"Error while making API call: {e!r}. Deadline leaves no time to retry.")
+                            raise DeadlineExceeded(f"Request deadline exceeded calling {url}") from e
+                        self.stats["retries"] += 1
+                        logger.info(f"Error while making API call: {e!r}. Retrying in {sleep_time:.2f} seconds...")
+                        await asyncio.sleep(sleep_time)
+                    else:
+                        logger.error(f"Error while making API call: {e!r}. Reached maximum retries ({max_retries}).")
+                        if isinstance(e, asyncio.TimeoutError):
+                            raise aiohttp.ServerTimeoutError(f"Timed out calling {url}") from e
+                        raise
+            finally:
+                if trial:
+                    self.breaker.release_trial()
+
+    async def stream(self, url, chunk_size=65536, timeout=300):
+        # Yields the response body in chunks for large dumps such as
+        # /players/nfl. One attempt only: a half-read body cannot be resumed.
+        check_deadline()
+        if not self.breaker.allow():
+            self.stats["breaker_rejections"] += 1
+            raise CircuitOpenError(f"Sleeper circuit open, not calling {url}")
+        trial = self.breaker.state == "half_open"
+        try:
+            session = await self.get_session()
+            waited = await self.bucket.acquire()
+            if waited:
+                self.stats["throttled"] += 1
+                self.stats["throttle_wait_seconds"] += waited
+            attempt_timeout = bounded_timeout(timeout)
+            try:
+                async with self.semaphore:
+                    self.stats["requests"] += 1
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=attempt_timeout)) as response:
+                        response.raise_for_status()
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            yield chunk
+            except DeadlineExceeded:
+                raise
+            except aiohttp.ClientResponseError as e:
+                if e.status in RETRYABLE_STATUSES:
+                    if self.breaker.record_failure():
+                        self.stats["breaker_trips"] += 1
+                else:
+                    self.breaker.record_success()
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, asyncio.TimeoutError) and self.cut_by_deadline(attempt_timeout, timeout):
+                    raise DeadlineExceeded(f"Request deadline exceeded streaming {url}") from e
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                if self.breaker.record_failure():
+                    self.stats["breaker_trips"] += 1
+                raise
+            else:
+                self.breaker.record_success()
+        finally:
+            # Also runs on GeneratorExit when the consumer stops reading early
+            if trial:
+                self.breaker.release_trial()
+
+sleeper_client = SleeperClient()
@@ -11,7 +11,7 @@ pl.player_id
 ,ROW_NUMBER() OVER(PARTITION BY pl.player_position ORDER BY ep.total_projection desc) rn
 
 FROM dynastr.players pl 
-INNER JOIN dynastr.nfl_player_projections ep on concat(pl.first_name, pl.last_name)  = concat(ep.player_first_name, ep.player_last_name)
+INNER JOIN dynastr.cbs_player_projections ep on concat(pl.first_name, pl.last_name)  = concat(ep.player_first_name, ep.player_last_name)
 WHERE 1=1 
 and pl.player_id NOT IN (SELECT
                 lp.player_id
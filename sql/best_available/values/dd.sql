@@ -0,0 +1,12 @@
+SELECT
+pl.player_id as sleeper_id
+, pl.full_name
+, pl.player_position
+, dd.rank_type
+, coalesce(dd.sf_trade_value, 0) as sf_value
+, coalesce(dd.trade_value, 0) as one_qb_value
+FROM dynastr.players pl
+INNER JOIN dynastr.dd_player_ranks dd on lower(concat(pl.first_name, pl.last_name, pl.player_position)) = dd.name_id
+where 1=1
+and pl.player_position IN ('QB', 'RB', 'WR', 'TE' )
+and pl.team is not null
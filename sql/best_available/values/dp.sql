@@ -0,0 +1,13 @@
+SELECT
+pl.player_id as sleeper_id
+, pl.full_name
+, pl.player_position
+, rt.rank_type
+, coalesce(dpr.sf_value, 0) as sf_value
+, coalesce(dpr.one_qb_value, 0) as one_qb_value
+FROM dynastr.players pl
+INNER JOIN dynastr.dp_player_ranks dpr on concat(pl.first_name, pl.last_name) = concat(dpr.player_first_name, dpr.player_last_name)
+CROSS JOIN (SELECT unnest(array['dynasty', 'redraft']) as rank_type) rt
+where 1=1
+and pl.player_position IN ('QB', 'RB', 'WR', 'TE' )
+and pl.team is not null
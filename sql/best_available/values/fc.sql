@@ -0,0 +1,12 @@
+SELECT
+pl.player_id as sleeper_id
+, pl.full_name
+, pl.player_position
+, fc.rank_type
+, coalesce(fc.sf_value, 0) as sf_value
+, coalesce(fc.one_qb_value, 0) as one_qb_value
+FROM dynastr.players pl
+INNER JOIN dynastr.fc_player_ranks fc on concat(pl.first_name, pl.last_name) = concat(fc.player_first_name, fc.player_last_name)
+where 1=1
+and pl.player_position IN ('QB', 'RB', 'WR', 'TE' )
+and pl.team is not null
@@ -0,0 +1,12 @@
+SELECT
+pl.player_id as sleeper_id
+, pl.full_name
+, pl.player_position
+, ktc.rank_type
+, coalesce(ktc.sf_value, 0) as sf_value
+, coalesce(ktc.one_qb_value, 0) as one_qb_value
+FROM dynastr.players pl
+INNER JOIN dynastr.ktc_player_ranks ktc on concat(pl.first_name, pl.last_name) = concat(ktc.player_first_name, ktc.player_last_name)
+where 1=1
+and pl.player_position IN ('QB', 'RB', 'WR', 'TE' )
+and pl.team is not null
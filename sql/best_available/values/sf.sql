@@ -0,0 +1,12 @@
+SELECT
+pl.player_id as sleeper_id
+, pl.full_name
+, pl.player_position
+, sf.rank_type
+, coalesce(sf.superflex_sf_value, 0) as sf_value
+, coalesce(sf.superflex_one_qb_value, 0) as one_qb_value
+FROM dynastr.players pl
+INNER JOIN dynastr.sf_player_ranks sf on sf.player_full_name = pl.full_name
+where 1=1
+and pl.player_position IN ('QB', 'RB', 'WR', 'TE' )
+and pl.team is not null
@@ -0,0 +1,121 @@
+-- Fills dynastr.consensus_player_values from every rank source; the caller
+-- empties the table first in the same transaction. Each source's values are
+-- scaled to 0-10000 against its own top asset per rank type and roster type,
+-- then averaged per asset. Players are keyed by Sleeper
+-- player_id using the same join each source's league templates use; picks by
+-- dynastr.pick_asset_key(), which gives every source's name for a pick the
+-- same key. dp has no rank_type and only contributes to dynasty.
+WITH source_values AS (
+    SELECT 'ktc' as source
+        , ktc.rank_type
+        , p.player_id
+        , ktc.player_full_name
+        , ktc.position as _position
+        , ktc.sf_value::numeric as sf_value
+        , ktc.one_qb_value::numeric as one_qb_value
+    FROM dynastr.ktc_player_ranks ktc
+    LEFT JOIN dynastr.players p on concat(p.first_name, p.last_name) = concat(ktc.player_first_name, ktc.player_last_name)
+    UNION ALL
+    SELECT 'sf' as source
+        , sf.rank_type
+        , p.player_id
+        , sf.player_full_name
+        , sf._position
+        , sf.superflex_sf_value::numeric
+        , sf.superflex_one_qb_value::numeric
+    FROM dynastr.sf_player_ranks sf
+    LEFT JOIN dynastr.players p on sf.player_full_name = p.full_name
+    UNION ALL
+    SELECT 'fc' as source
+        , fc.rank_type
+        , fc.sleeper_player_id
+        , fc.player_full_name
+        , fc.player_position
+        , fc.sf_value::numeric
+        , fc.one_qb_value::numeric
+    FROM dynastr.fc_player_ranks fc
+    UNION ALL
+    SELECT 'dd' as source
+        , dd.rank_type
+        , p.player_id
+        -- Picks have no player row; their name_id reads like "2025mid1stpi"
+        , coalesce(p.full_name, dd.name_id)
+        , p.player_position
+        , dd.sf_trade_value::numeric
+        , dd.trade_value::numeric
+    FROM dynastr.dd_player_ranks dd
+    LEFT JOIN dynastr.players p on lower(concat(p.first_name, p.last_name, p.player_position)) = dd.name_id
+    UNION ALL
+    SELECT 'dp' as source
+        , 'dynasty' as rank_type
+        , p.player_id
+        , dp.player_full_name
+        , dp.player_position
+        , dp.sf_value::numeric
+        , dp.one_qb_value::numeric
+    FROM dynastr.dp_player_ranks dp
+    LEFT JOIN dynastr.players p on dp.player_full_name = p.full_name
+)
+, keyed AS (
+    SELECT DISTINCT ON (source, rank_type, asset_key) *
+    FROM (
+        SELECT sv.*
+            , CASE WHEN sv.player_full_name ~* '^[0-9]{4}( ?[a-z]| [0-9])' THEN dynastr.pick_asset_key(sv.player_full_name)
+                ELSE sv.player_id
+                END as asset_key
+            , sv.player_full_name ~* '^[0-9]{4}( ?[a-z]| [0-9])' as is_pick
+        FROM source_values sv
+        WHERE coalesce(sv.sf_value, 0) > 0 OR coalesce(sv.one_qb_value, 0) > 0
+    ) k
+    WHERE asset_key IS NOT NULL
+    ORDER BY source, rank_type, asset_key, sf_value DESC NULLS LAST
+)
+, normalized AS (
+    SELECT source
+        , rank_type
+        , asset_key
+        , is_pick
+        , player_id
+        , player_full_name
+        , _position
+        , 10000.0 * nullif(sf_value, 0) / max(sf_value) OVER (PARTITION BY source, rank_type) as sf_value
+        , 10000.0 * nullif(one_qb_value, 0) / max(one_qb_value) OVER (PARTITION BY source, rank_type) as one_qb_value
+    FROM keyed
+)
+, consensus AS (
+    SELECT rank_type
+        , asset_key
+        , max(player_id) as player_id
+        -- Pick names as ktc writes them, which is the form the league templates build
+        , coalesce(max(player_full_name) FILTER (WHERE source = 'ktc'), max(player_full_name)) as player_full_name
+        , CASE WHEN bool_or(is_pick) THEN 'Pick' ELSE upper(coalesce(max(_position) FILTER (WHERE source = 'fc'), max(_position))) END as _position
+        , round(avg(sf_value))::integer as sf_value
+        , round(coalesce(max(sf_value) - min(sf_value), 0))::integer as sf_spread
+        , round(avg(one_qb_value))::integer as one_qb_value
+        , round(coalesce(max(one_qb_value) - min(one_qb_value), 0))::integer as one_qb_spread
+        , count(*)::smallint as sources
+        , array_agg(source ORDER BY source)::varchar[] as source_list
+    FROM normalized
+    GROUP BY rank_type, asset_key
+)
+INSERT INTO dynastr.consensus_player_values (rank_type, asset_key, player_id, player_full_name, _position,
+                                             sf_value, sf_spread, sf_rank, sf_position_rank,
+                                             one_qb_value, one_qb_spread, one_qb_rank, one_qb_position_rank,
+                                             sources, source_list, computed_at)
+SELECT c.rank_type
+    , c.asset_key
+    , c.player_id
+    , c.player_full_name
+    , c._position
+    , coalesce(c.sf_value, 0)
+    , c.sf_spread
+    , row_number() OVER (PARTITION BY c.rank_type ORDER BY coalesce(c.sf_value, 0) DESC)
+    , rank() OVER (PARTITION BY c.rank_type, c._position ORDER BY coalesce(c.sf_value, 0) DESC)
+    , coalesce(c.one_qb_value, 0)
+    , c.one_qb_spread
+    , row_number() OVER (PARTITION BY c.rank_type ORDER BY coalesce(c.one_qb_value, 0) DESC)
+    , rank() OVER (PARTITION BY c.rank_type, c._position ORDER BY coalesce(c.one_qb_value, 0) DESC)
+    , c.sources
+    , c.source_list
+    , now()
+FROM consensus c;
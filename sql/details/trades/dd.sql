@@ -31,7 +31,7 @@ SELECT *
                                     inner join dynastr.players p on pt.player_id = p.player_id
                                     left join dynastr.dd_player_ranks dd on lower(concat(p.first_name,p.last_name, p.player_position)) = dd.name_id 
                                     inner join dynastr.draft_positions dp on pt.roster_id = dp.roster_id and dp.league_id = pt.league_id
-                                    inner join dynastr.managers m on cast(dp.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on dp.user_id = m.user_id
                                     where 1=1
                                     and pt.league_id = 'league_id' 
                                     and transaction_type = 'add'
@@ -80,7 +80,7 @@ SELECT *
                                                 
                                                 )  a1
                                     inner join dynastr.dd_player_ranks dd on a1.player_name = dd.name_id
-                                    inner join dynastr.managers m on cast(a1.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on a1.user_id = m.user_id
                                     
                                     ) t1                              
                                     order by 
@@ -30,7 +30,7 @@ SELECT *
                                     inner join dynastr.players p on pt.player_id = p.player_id
                                     left join dynastr.fc_player_ranks fc on concat(p.first_name, p.last_name) = concat(fc.player_first_name, fc.player_last_name)
                                     inner join dynastr.draft_positions dp on pt.roster_id = dp.roster_id and dp.league_id = pt.league_id
-                                    inner join dynastr.managers m on cast(dp.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on dp.user_id = m.user_id
                                     where 1=1
                                     and pt.league_id = 'league_id' 
                                     and transaction_type = 'add'
@@ -77,7 +77,7 @@ SELECT *
                                                 
                                                 )  a1
                                     left join (select * from dynastr.fc_player_ranks fc where fc.rank_type = 'dynasty') fc on a1.player_name = fc.player_full_name
-                                    inner join dynastr.managers m on cast(a1.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on a1.user_id = m.user_id
                                     ) t1                              
                                     order by 
                                     status_updated desc
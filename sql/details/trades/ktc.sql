@@ -31,7 +31,7 @@ SELECT *
                                     inner join dynastr.players p on pt.player_id = p.player_id
                                     left join dynastr.ktc_player_ranks ktc on concat(p.first_name, p.last_name) = concat(ktc.player_first_name, ktc.player_last_name)
                                     inner join dynastr.draft_positions dp on pt.roster_id = dp.roster_id and dp.league_id = pt.league_id
-                                    inner join dynastr.managers m on cast(dp.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on dp.user_id = m.user_id
                                     where 1=1
                                     and pt.league_id = 'league_id' 
                                     and transaction_type = 'add'
@@ -84,7 +84,7 @@ SELECT *
                                                 
                                                 )  a1
                                     inner join dynastr.ktc_player_ranks ktc on a1.player_name = ktc.player_full_name
-                                    inner join dynastr.managers m on cast(a1.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on a1.user_id = m.user_id
                                     
                                     ) t1                              
                                     order by 
@@ -0,0 +1,24 @@
+SELECT tr.league_id
+    , tr.transaction_id
+    , tr.status_updated
+    , tr.user_id
+    , a.transaction_type
+    , a.asset
+    , a.league_type_value as value
+    , tr.display_name
+    , a.player_id as sleeper_id
+    , a._position
+    , tr.owner_total
+    , tr.deal_total
+    , tr.num_managers
+FROM (SELECT r.*
+        , r.league_type_add_total as owner_total
+        , sum(r.league_type_add_total) OVER (PARTITION BY r.transaction_id) as deal_total
+      FROM dynastr.trade_rollups r
+      WHERE r.league_id = 'league_id'
+      AND r.platform = 'platform'
+      AND r.rank_type = 'rank_type'
+      AND r.num_managers > 1) tr
+CROSS JOIN LATERAL jsonb_to_recordset(tr.assets) AS a(transaction_type varchar, asset varchar, player_id varchar, _position varchar, sf_value numeric, one_qb_value numeric)
+WHERE a.transaction_type = 'add'
+ORDER BY tr.status_updated DESC, value DESC
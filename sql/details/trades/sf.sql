@@ -30,7 +30,7 @@ SELECT *
                                     inner join dynastr.players p on pt.player_id = p.player_id
                                     left join dynastr.sf_player_ranks sf on sf.player_full_name = p.full_name
                                     inner join dynastr.draft_positions dp on pt.roster_id = dp.roster_id and dp.league_id = pt.league_id
-                                    inner join dynastr.managers m on cast(dp.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on dp.user_id = m.user_id
                                     where 1=1
                                     and pt.league_id = 'league_id' 
                                     and transaction_type = 'add'
@@ -81,7 +81,7 @@ SELECT *
                                                 
                                                 )  a1
                                     left join dynastr.sf_player_ranks sf on a1.player_name = sf.player_full_name
-                                    inner join dynastr.managers m on cast(a1.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on a1.user_id = m.user_id
                                     
                                     ) t1                              
                                     order by 
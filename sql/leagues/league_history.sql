@@ -0,0 +1,51 @@
+WITH RECURSIVE chain AS (
+    SELECT ls.*, 0 as depth
+    FROM dynastr.league_seasons ls
+    WHERE ls.league_id = 'league_id'
+
+    UNION ALL
+
+    SELECT ls.*, chain.depth + 1
+    FROM dynastr.league_seasons ls
+    INNER JOIN chain on ls.league_id = chain.previous_league_id
+    WHERE chain.depth < 50
+)
+SELECT c.league_id
+, c.previous_league_id
+, c.season
+, c.league_name
+, c.status
+, c.total_rosters
+, c.completed
+, c.fetched_at
+, coalesce((SELECT json_agg(json_build_object(
+        'roster_id', r.roster_id
+        , 'owner_id', r.owner_id
+        , 'display_name', r.display_name
+        , 'wins', r.wins
+        , 'losses', r.losses
+        , 'ties', r.ties
+        , 'fpts', r.fpts
+        , 'players', r.players) ORDER BY r.wins DESC, r.fpts DESC)
+    FROM dynastr.league_season_rosters r WHERE r.league_id = c.league_id), '[]') as rosters
+, coalesce((SELECT json_agg(json_build_object(
+        'transaction_id', t.transaction_id
+        , 'status_updated', t.status_updated
+        , 'week', t.week
+        , 'roster_ids', t.roster_ids
+        , 'adds', t.adds
+        , 'drops', t.drops
+        , 'draft_picks', t.draft_picks) ORDER BY t.status_updated DESC)
+    FROM dynastr.league_season_trades t WHERE t.league_id = c.league_id), '[]') as trades
+, coalesce((SELECT json_agg(json_build_object(
+        'draft_id', d.draft_id
+        , 'pick_no', d.pick_no
+        , 'round', d.round
+        , 'roster_id', d.roster_id
+        , 'picked_by', d.picked_by
+        , 'player_id', d.player_id
+        , 'player_name', d.player_name
+        , 'position', d.position) ORDER BY d.draft_id, d.pick_no)
+    FROM dynastr.league_season_draft_picks d WHERE d.league_id = c.league_id), '[]') as draft_picks
+FROM chain c
+ORDER BY c.season DESC
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS dynastr.player_projections_index (
+    player_id varchar NOT NULL
+    , projection_source varchar NOT NULL
+    , projection numeric NOT NULL
+    , insert_date timestamp NOT NULL DEFAULT now()
+    , PRIMARY KEY (projection_source, player_id)
+);
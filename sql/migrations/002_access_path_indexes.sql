@@ -0,0 +1,63 @@
+-- Indexes matching the filters and joins every per-league template uses.
+-- Built CONCURRENTLY so the migration does not block refreshes; the runner
+-- executes this file statement by statement outside a transaction.
+-- Plan evidence: python scripts/index_evidence.py 002_access_path_indexes, on
+-- the database scripts/plan_seed.py seeded, explains every template with and
+-- without each index and writes the shapes, timings and buffers of the plans
+-- that change to 002_access_path_indexes.plans.json next to this file. The
+-- templates each index serves and the plan change it is expected to make are
+-- listed with it; an index the report shows no plan using should be dropped.
+
+-- summary/power/*, details/power/*, best_available/*, ranks_summary/*:
+-- lp.session_id = .. and lp.league_id = .. , Seq Scan -> Index Only Scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS league_players_session_league_idx
+    ON dynastr.league_players (session_id, league_id) INCLUDE (user_id, player_id);
+
+-- summary/power/*, details/power/*, */trades/*, ranks_summary/power:
+-- draft_positions joined on (league_id, roster_id) for owners and pick names,
+-- Seq Scan + Hash Join -> Index Only Scan under a Nested Loop
+CREATE INDEX CONCURRENTLY IF NOT EXISTS draft_positions_league_roster_idx
+    ON dynastr.draft_positions (league_id, roster_id) INCLUDE (user_id, season, position, position_name, draft_set_flg);
+
+-- summary/power/*, details/power/*, ranks_summary/power: base_picks filter,
+-- Seq Scan -> Index Only Scan on each daily partition
+CREATE INDEX CONCURRENTLY IF NOT EXISTS draft_picks_league_session_owner_idx
+    ON dynastr.draft_picks (league_id, session_id, owner_id) INCLUDE (year, round, round_name, roster_id);
+
+-- leagues/get_leagues: Seq Scan + Filter -> Index Scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS current_leagues_session_user_year_idx
+    ON dynastr.current_leagues (session_id, user_id, league_year);
+
+-- summary/trades/*, details/trades/*: trade history filtered by league,
+-- Seq Scan -> Bitmap Index Scan / Index Scan on both trade tables
+CREATE INDEX CONCURRENTLY IF NOT EXISTS player_trades_league_idx
+    ON dynastr.player_trades (league_id, roster_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS draft_pick_trades_league_idx
+    ON dynastr.draft_pick_trades (league_id, roster_id);
+
+-- sf templates join players on full_name: Hash Join over a Seq Scan of
+-- players -> Nested Loop with Index Scan once the league side is small
+CREATE INDEX CONCURRENTLY IF NOT EXISTS players_full_name_idx
+    ON dynastr.players (full_name);
+
+-- Rank lookups are always (name, rank_type). The name-concat joins cannot use an
+-- index because concat() is not immutable; the pick and full-name joins can,
+-- Seq Scan of the rank table -> Index Scan per rostered player or pick.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ktc_player_ranks_name_rank_type_idx
+    ON dynastr.ktc_player_ranks (player_full_name, rank_type);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sf_player_ranks_name_rank_type_idx
+    ON dynastr.sf_player_ranks (player_full_name, rank_type);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fc_player_ranks_name_rank_type_idx
+    ON dynastr.fc_player_ranks (player_full_name, rank_type);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fc_player_ranks_sleeper_id_idx
+    ON dynastr.fc_player_ranks (sleeper_player_id) WHERE sleeper_player_id IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS dd_player_ranks_name_id_rank_type_idx
+    ON dynastr.dd_player_ranks (name_id, rank_type);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS dp_player_ranks_name_idx
+    ON dynastr.dp_player_ranks (player_full_name);
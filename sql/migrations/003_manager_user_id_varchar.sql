@@ -0,0 +1,6 @@
+-- The trade templates joined managers through
+-- cast(dp.user_id as varchar) = cast(m.user_id as varchar), which hides both
+-- columns from their indexes. Sleeper user ids are stored as strings
+-- everywhere else, so both sides become varchar and the casts are dropped.
+ALTER TABLE dynastr.draft_positions ALTER COLUMN user_id TYPE varchar USING user_id::varchar;
+ALTER TABLE dynastr.managers ALTER COLUMN user_id TYPE varchar USING user_id::varchar;
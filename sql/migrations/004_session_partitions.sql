@@ -0,0 +1,70 @@
+-- Partitions the session-scoped tables by day of insert so expired sessions can
+-- be dropped a partition at a time (see session_lifecycle.py). Unique keys on a
+-- partitioned table must contain the partition key, so partition_date joins
+-- the ON CONFLICT targets used by utils.py.
+
+CREATE OR REPLACE FUNCTION dynastr.ensure_session_partitions(days_ahead integer DEFAULT 7)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    parent_table text;
+    partition_day date;
+BEGIN
+    FOREACH parent_table IN ARRAY ARRAY['current_leagues', 'league_players', 'draft_picks'] LOOP
+        FOR partition_day IN SELECT generate_series(current_date - 1, current_date + days_ahead, interval '1 day')::date LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS dynastr.%I PARTITION OF dynastr.%I FOR VALUES FROM (%L) TO (%L)',
+                parent_table || '_p' || to_char(partition_day, 'YYYYMMDD'),
+                parent_table,
+                partition_day,
+                partition_day + 1
+            );
+        END LOOP;
+    END LOOP;
+END;
+$$;
+
+ALTER TABLE dynastr.current_leagues RENAME TO current_leagues_legacy;
+CREATE TABLE dynastr.current_leagues (
+    LIKE dynastr.current_leagues_legacy INCLUDING DEFAULTS,
+    partition_date date NOT NULL DEFAULT current_date
+) PARTITION BY RANGE (partition_date);
+
+ALTER TABLE dynastr.league_players RENAME TO league_players_legacy;
+CREATE TABLE dynastr.league_players (
+    LIKE dynastr.league_players_legacy INCLUDING DEFAULTS,
+    partition_date date NOT NULL DEFAULT current_date
+) PARTITION BY RANGE (partition_date);
+
+ALTER TABLE dynastr.draft_picks RENAME TO draft_picks_legacy;
+CREATE TABLE dynastr.draft_picks (
+    LIKE dynastr.draft_picks_legacy INCLUDING DEFAULTS,
+    partition_date date NOT NULL DEFAULT current_date
+) PARTITION BY RANGE (partition_date);
+
+SELECT dynastr.ensure_session_partitions(7);
+
+-- Existing sessions land in today's partition and age out with the retention window
+INSERT INTO dynastr.current_leagues SELECT *, current_date FROM dynastr.current_leagues_legacy;
+INSERT INTO dynastr.league_players SELECT *, current_date FROM dynastr.league_players_legacy;
+INSERT INTO dynastr.draft_picks SELECT *, current_date FROM dynastr.draft_picks_legacy;
+
+DROP TABLE dynastr.current_leagues_legacy;
+DROP TABLE dynastr.league_players_legacy;
+DROP TABLE dynastr.draft_picks_legacy;
+
+CREATE UNIQUE INDEX current_leagues_session_league_key
+    ON dynastr.current_leagues (session_id, league_id, partition_date);
+CREATE INDEX current_leagues_session_user_year_idx
+    ON dynastr.current_leagues (session_id, user_id, league_year);
+CREATE INDEX current_leagues_user_year_idx
+    ON dynastr.current_leagues (user_id, league_year, partition_date);
+
+CREATE UNIQUE INDEX league_players_session_user_player_league_key
+    ON dynastr.league_players (session_id, user_id, player_id, league_id, partition_date);
+CREATE INDEX league_players_session_league_idx
+    ON dynastr.league_players (session_id, league_id) INCLUDE (user_id, player_id);
+
+CREATE UNIQUE INDEX draft_picks_year_round_roster_owner_league_session_key
+    ON dynastr.draft_picks (year, round, roster_id, owner_id, league_id, session_id, partition_date);
+CREATE INDEX draft_picks_league_session_owner_idx
+    ON dynastr.draft_picks (league_id, session_id, owner_id) INCLUDE (year, round, round_name, roster_id);
@@ -0,0 +1,9 @@
+-- Username to Sleeper user_id resolutions. user_id is NULL for usernames
+-- Sleeper does not know, which are retried after a short TTL.
+CREATE TABLE IF NOT EXISTS dynastr.users (
+    user_name varchar PRIMARY KEY
+    , user_id varchar
+    , resolved_at timestamp NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS users_user_id_idx ON dynastr.users (user_id) WHERE user_id IS NOT NULL;
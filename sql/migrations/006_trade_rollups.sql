@@ -0,0 +1,23 @@
+-- One valued row per trade side (league, platform, rank type, transaction,
+-- manager). Kept current by insert_trades for new transactions and revalued
+-- in bulk after a ranks load, so the trade views never re-join the rank
+-- tables on read.
+CREATE TABLE IF NOT EXISTS dynastr.trade_rollups (
+    league_id varchar NOT NULL
+    , platform varchar NOT NULL
+    , rank_type varchar NOT NULL
+    , transaction_id varchar NOT NULL
+    , status_updated varchar
+    , user_id varchar NOT NULL
+    , display_name varchar
+    , num_managers integer NOT NULL
+    , assets jsonb NOT NULL
+    , sf_add_total numeric NOT NULL DEFAULT 0
+    , sf_drop_total numeric NOT NULL DEFAULT 0
+    , sf_net_gain numeric GENERATED ALWAYS AS (sf_add_total - sf_drop_total) STORED
+    , one_qb_add_total numeric NOT NULL DEFAULT 0
+    , one_qb_drop_total numeric NOT NULL DEFAULT 0
+    , one_qb_net_gain numeric GENERATED ALWAYS AS (one_qb_add_total - one_qb_drop_total) STORED
+    , valued_at timestamp NOT NULL DEFAULT now()
+    , PRIMARY KEY (league_id, platform, rank_type, transaction_id, user_id)
+);
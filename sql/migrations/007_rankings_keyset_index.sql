@@ -0,0 +1,5 @@
+-- /v1/rankings: rank_type = .. ORDER BY value, player_full_name DESC with a
+-- keyset row comparison, Seq Scan + Sort -> Index Scan. The expression must
+-- match RANKINGS_SORT_VALUE in utils.py.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sf_player_ranks_rank_type_value_idx
+    ON dynastr.sf_player_ranks (rank_type, (coalesce(superflex_sf_value, -1)::numeric) DESC, player_full_name DESC);
@@ -0,0 +1,53 @@
+-- Past seasons of a league along the previous_league_id chain. Seasons with
+-- completed = true are immutable and never fetched from Sleeper again; the
+-- current season is replaced on every history refresh.
+CREATE TABLE IF NOT EXISTS dynastr.league_seasons (
+    league_id varchar PRIMARY KEY
+    , previous_league_id varchar
+    , season varchar NOT NULL
+    , league_name varchar
+    , status varchar
+    , total_rosters integer
+    , completed boolean NOT NULL DEFAULT false
+    , fetched_at timestamp NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS league_seasons_previous_idx ON dynastr.league_seasons (previous_league_id);
+
+CREATE TABLE IF NOT EXISTS dynastr.league_season_rosters (
+    league_id varchar NOT NULL REFERENCES dynastr.league_seasons (league_id) ON DELETE CASCADE
+    , roster_id integer NOT NULL
+    , owner_id varchar
+    , display_name varchar
+    , wins integer
+    , losses integer
+    , ties integer
+    , fpts numeric
+    , players jsonb
+    , PRIMARY KEY (league_id, roster_id)
+);
+
+CREATE TABLE IF NOT EXISTS dynastr.league_season_trades (
+    league_id varchar NOT NULL REFERENCES dynastr.league_seasons (league_id) ON DELETE CASCADE
+    , transaction_id varchar NOT NULL
+    , status_updated bigint
+    , week integer
+    , roster_ids jsonb
+    , adds jsonb
+    , drops jsonb
+    , draft_picks jsonb
+    , PRIMARY KEY (league_id, transaction_id)
+);
+
+CREATE TABLE IF NOT EXISTS dynastr.league_season_draft_picks (
+    league_id varchar NOT NULL REFERENCES dynastr.league_seasons (league_id) ON DELETE CASCADE
+    , draft_id varchar NOT NULL
+    , pick_no integer NOT NULL
+    , round integer
+    , roster_id integer
+    , picked_by varchar
+    , player_id varchar
+    , player_name varchar
+    , position varchar
+    , PRIMARY KEY (league_id, draft_id, pick_no)
+);
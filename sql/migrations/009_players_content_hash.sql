@@ -0,0 +1,3 @@
+-- Hash of the synced Sleeper fields, so the player sync rewrites only the
+-- players whose name, position, team or age actually changed.
+ALTER TABLE dynastr.players ADD COLUMN IF NOT EXISTS content_hash varchar;
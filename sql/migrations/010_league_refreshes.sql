@@ -0,0 +1,7 @@
+-- Last completed refresh of each league, read under the league's advisory
+-- lock so a refresh that waited on another can reuse its league-wide data.
+CREATE TABLE IF NOT EXISTS dynastr.league_refreshes (
+    league_id varchar PRIMARY KEY
+    , session_id varchar NOT NULL
+    , refreshed_at timestamp NOT NULL DEFAULT now()
+);
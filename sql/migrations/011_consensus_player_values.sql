@@ -0,0 +1,28 @@
+-- Consensus of every rank source per asset, rebuilt after each ranks load.
+-- Values are on a common 0-10000 scale; spread is the gap between the
+-- highest and lowest source for the asset.
+CREATE TABLE IF NOT EXISTS dynastr.consensus_player_values (
+    rank_type varchar NOT NULL
+    , asset_key varchar NOT NULL
+    , player_id varchar
+    , player_full_name varchar
+    , _position varchar
+    , sf_value integer NOT NULL
+    , sf_spread integer NOT NULL
+    , sf_rank integer NOT NULL
+    , sf_position_rank integer NOT NULL
+    , one_qb_value integer NOT NULL
+    , one_qb_spread integer NOT NULL
+    , one_qb_rank integer NOT NULL
+    , one_qb_position_rank integer NOT NULL
+    , sources smallint NOT NULL
+    , source_list varchar[] NOT NULL
+    , computed_at timestamp NOT NULL
+    , PRIMARY KEY (rank_type, asset_key)
+);
+
+-- League templates join players by Sleeper id and picks by name
+CREATE INDEX IF NOT EXISTS consensus_player_values_player_idx
+    ON dynastr.consensus_player_values (rank_type, player_id);
+CREATE INDEX IF NOT EXISTS consensus_player_values_name_idx
+    ON dynastr.consensus_player_values (rank_type, player_full_name);
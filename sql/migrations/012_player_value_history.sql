@@ -0,0 +1,32 @@
+-- Value history per asset and rank source, one row per (source, rank_type,
+-- asset_key). Samples are delta encoded: day_deltas holds days since the
+-- previous sample (0 for the first, at base_date) and sf_deltas /
+-- one_qb_deltas the change in value, so a running sum over the arrays
+-- rebuilds the series. A sample is only appended when a value changes; the
+-- last_* columns make appending a single-row update.
+CREATE TABLE IF NOT EXISTS dynastr.player_value_history (
+    source varchar NOT NULL
+    , rank_type varchar NOT NULL
+    , asset_key varchar NOT NULL
+    , base_date date NOT NULL
+    , day_deltas integer[] NOT NULL
+    , sf_deltas integer[] NOT NULL
+    , one_qb_deltas integer[] NOT NULL
+    , last_date date NOT NULL
+    , last_sf_value integer NOT NULL
+    , last_one_qb_value integer NOT NULL
+    , last_seen date NOT NULL
+    , PRIMARY KEY (source, rank_type, asset_key)
+);
+
+-- Value as of a date: the last sample on or before it, NULL before base_date
+CREATE OR REPLACE FUNCTION dynastr.history_value_at(base_date date, day_deltas integer[], value_deltas integer[], at date)
+RETURNS integer
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT sum(s.v)::integer
+    FROM (
+        SELECT u.v, sum(u.d) OVER (ORDER BY u.i) as day
+        FROM unnest(day_deltas, value_deltas) WITH ORDINALITY AS u(d, v, i)
+    ) s
+    WHERE base_date + s.day::integer <= at
+$$;
@@ -0,0 +1,48 @@
+-- One key per draft pick across rank sources, so the consensus averages a
+-- pick over every source that values it and its history lines up. The same
+-- key is built in Python by value_history.pick_asset_key():
+--   a slotted pick, "2025 Round 1 Pick 5" or "2025 1.05" -> pick:2025pick1.5
+--     (the form trade_values.asset_key uses)
+--   a round without a slot, fc's "2025 Round 1"         -> pick:2025mid1st
+--   a tier, "2025 Mid 1st" or dd's name_id "2025mid1stpi" -> pick:2025mid1st
+CREATE OR REPLACE FUNCTION dynastr.pick_asset_key(name text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT 'pick:' || CASE
+        WHEN m.slot IS NOT NULL THEN m.slot[1] || 'pick' || m.slot[2]::integer || '.' || m.slot[3]::integer
+        WHEN m.round_only IS NOT NULL THEN m.round_only[1] || 'mid' || m.round_only[2]::integer
+            || CASE WHEN m.round_only[2]::integer % 100 IN (11, 12, 13) THEN 'th'
+                    WHEN m.round_only[2]::integer % 10 = 1 THEN 'st'
+                    WHEN m.round_only[2]::integer % 10 = 2 THEN 'nd'
+                    WHEN m.round_only[2]::integer % 10 = 3 THEN 'rd'
+                    ELSE 'th' END
+        ELSE regexp_replace(regexp_replace(l.n, '[^a-z0-9]', '', 'g'),
+                            '^([0-9]{4}(early|mid|late)[0-9]+(st|nd|rd|th))pi$', '\1')
+        END
+    FROM (SELECT lower(trim(name)) as n) l
+    CROSS JOIN LATERAL (
+        SELECT regexp_match(l.n, '^([0-9]{4})\s*(?:round\s*)?([0-9]+)\s*[\s.]\s*(?:pick\s*)?([0-9]+)$') as slot
+            , regexp_match(l.n, '^([0-9]{4})\s*round\s*([0-9]+)$') as round_only
+    ) m
+$$;
+
+-- Pick history was keyed by the name with everything but letters and digits
+-- removed ("pick:2025round1pick5"); move it to the shared key unless a row
+-- already has that key
+UPDATE dynastr.player_value_history h
+SET asset_key = k.new_key
+FROM (
+    SELECT source, rank_type, asset_key
+        , dynastr.pick_asset_key(
+            regexp_replace(
+                regexp_replace(substr(asset_key, 6), '^([0-9]{4})round([0-9]+)pick([0-9]+)$', '\1 \2.\3'),
+                '^([0-9]{4})round([0-9]+)$', '\1 round \2')) as new_key
+    FROM dynastr.player_value_history
+    WHERE asset_key LIKE 'pick:%'
+) k
+WHERE h.source = k.source AND h.rank_type = k.rank_type AND h.asset_key = k.asset_key
+    AND k.new_key <> k.asset_key
+    AND NOT EXISTS (
+        SELECT 1 FROM dynastr.player_value_history e
+        WHERE e.source = k.source AND e.rank_type = k.rank_type AND e.asset_key = k.new_key
+    );
@@ -0,0 +1,44 @@
+-- A DEFAULT partition per session table, so an insert still lands when the
+-- sweeper has not created that day's partition in time (worker down for
+-- longer than session_partitions_ahead days, clock skew around midnight).
+-- ensure_session_partitions now moves such rows out of the default partition
+-- into the day's partition when it creates it; a range partition cannot be
+-- added while the default partition holds rows for that range.
+
+CREATE TABLE IF NOT EXISTS dynastr.current_leagues_default PARTITION OF dynastr.current_leagues DEFAULT;
+CREATE TABLE IF NOT EXISTS dynastr.league_players_default PARTITION OF dynastr.league_players DEFAULT;
+CREATE TABLE IF NOT EXISTS dynastr.draft_picks_default PARTITION OF dynastr.draft_picks DEFAULT;
+
+CREATE OR REPLACE FUNCTION dynastr.ensure_session_partitions(days_ahead integer DEFAULT 7)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    parent_table text;
+    partition_table text;
+    partition_day date;
+BEGIN
+    FOREACH parent_table IN ARRAY ARRAY['current_leagues', 'league_players', 'draft_picks'] LOOP
+        FOR partition_day IN SELECT generate_series(current_date - 1, current_date + days_ahead, interval '1 day')::date LOOP
+            partition_table := parent_table || '_p' || to_char(partition_day, 'YYYYMMDD');
+            CONTINUE WHEN to_regclass(format('dynastr.%I', partition_table)) IS NOT NULL;
+
+            EXECUTE format('CREATE TABLE dynastr.%I (LIKE dynastr.%I INCLUDING DEFAULTS)', partition_table, parent_table);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM dynastr.%I WHERE partition_date = %L RETURNING *) '
+                'INSERT INTO dynastr.%I SELECT * FROM moved',
+                parent_table || '_default',
+                partition_day,
+                partition_table
+            );
+            EXECUTE format(
+                'ALTER TABLE dynastr.%I ATTACH PARTITION dynastr.%I FOR VALUES FROM (%L) TO (%L)',
+                parent_table,
+                partition_table,
+                partition_day,
+                partition_day + 1
+            );
+        END LOOP;
+    END LOOP;
+END;
+$$;
+
+SELECT dynastr.ensure_session_partitions(7);
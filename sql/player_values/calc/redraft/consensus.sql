@@ -0,0 +1,19 @@
+select COALESCE(REPLACE(REPLACE(cv.player_full_name, 'Round ', ''), ' Pick ', '.')) as player_full_name
+, p.team
+, p.age
+, cv._position
+, cv.sf_value
+, cv.sf_rank
+, cv.one_qb_value
+, cv.one_qb_rank
+, cv.sf_spread
+, cv.one_qb_spread
+, cv.sources
+, cv.computed_at as insert_date
+, cv.asset_key as player_id
+from dynastr.consensus_player_values cv
+left join dynastr.players p on cv.player_id = p.player_id
+where 1=1
+and cv.rank_type = 'redraft'
+and (cv.sf_value > 0 OR cv.one_qb_value > 0)
+order by cv.sf_value desc
@@ -0,0 +1,48 @@
+with consensus_players as (select cv.player_full_name
+, CONCAT(cv._position, ' ', cv.sf_position_rank) as pos_rank
+, p.team
+, p.age
+, cv.sf_value as value
+, cv.sf_rank as rank
+, cv.sf_spread as spread
+, cv.sources
+, cv._position
+, 'sf_value' as roster_type
+, cv.rank_type
+, cv.computed_at
+from dynastr.consensus_player_values cv
+left join dynastr.players p on cv.player_id = p.player_id
+UNION ALL
+select cv.player_full_name
+, CONCAT(cv._position, ' ', cv.one_qb_position_rank) as pos_rank
+, p.team
+, p.age
+, cv.one_qb_value as value
+, cv.one_qb_rank as rank
+, cv.one_qb_spread as spread
+, cv.sources
+, cv._position
+, 'one_qb_value' as roster_type
+, cv.rank_type
+, cv.computed_at
+from dynastr.consensus_player_values cv
+left join dynastr.players p on cv.player_id = p.player_id)
+
+select
+COALESCE(REPLACE(REPLACE(player_full_name, 'Round ', ''), ' Pick ', '.')) as player_full_name
+, pos_rank
+, team
+, age
+, value as player_value
+, rank as player_rank
+, row_number() OVER (order by value desc) as _rownum
+, UPPER(_position) AS _position
+, roster_type
+, rank_type
+, spread
+, sources
+, computed_at::date as _insert_date
+from consensus_players
+where 1=1
+and value > 0
+order by value desc
@@ -0,0 +1,49 @@
+DELETE FROM dynastr.player_projections_index;
+
+INSERT INTO dynastr.player_projections_index (player_id, projection_source, projection, insert_date)
+SELECT pl.player_id
+, 'espn' as projection_source
+, max(ep.total_projection) as projection
+, now()
+FROM dynastr.players pl
+INNER JOIN dynastr.espn_player_projections ep on concat(pl.first_name, pl.last_name) = concat(ep.player_first_name, ep.player_last_name)
+WHERE pl.player_position IN ('QB', 'RB', 'WR', 'TE')
+GROUP BY pl.player_id
+UNION ALL
+SELECT pl.player_id
+, 'cbs' as projection_source
+, max(ep.total_projection) as projection
+, now()
+FROM dynastr.players pl
+INNER JOIN dynastr.cbs_player_projections ep on concat(pl.first_name, pl.last_name) = concat(ep.player_first_name, ep.player_last_name)
+WHERE pl.player_position IN ('QB', 'RB', 'WR', 'TE')
+GROUP BY pl.player_id
+UNION ALL
+SELECT pl.player_id
+, 'nfl' as projection_source
+, max(ep.total_projection) as projection
+, now()
+FROM dynastr.players pl
+INNER JOIN dynastr.nfl_player_projections ep on concat(pl.first_name, pl.last_name) = concat(ep.player_first_name, ep.player_last_name)
+WHERE pl.player_position IN ('QB', 'RB', 'WR', 'TE')
+GROUP BY pl.player_id
+UNION ALL
+SELECT pl.player_id
+, 'fp' as projection_source
+, max(ep.total_projection) as projection
+, now()
+FROM dynastr.players pl
+INNER JOIN dynastr.fp_player_projections ep on concat(pl.first_name, pl.last_name) = concat(ep.player_first_name, ep.player_last_name)
+WHERE pl.player_position IN ('QB', 'RB', 'WR', 'TE')
+GROUP BY pl.player_id
+UNION ALL
+SELECT pl.player_id
+, 'fc' as projection_source
+, max(fc.sf_value) as projection
+, now()
+FROM dynastr.players pl
+INNER JOIN dynastr.fc_player_ranks fc on concat(pl.first_name, pl.last_name) = concat(fc.player_first_name, fc.player_last_name)
+WHERE pl.player_position IN ('QB', 'RB', 'WR', 'TE')
+and fc.rank_type = 'redraft'
+and fc.sf_value is not null
+GROUP BY pl.player_id;
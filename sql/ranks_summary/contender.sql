@@ -0,0 +1,117 @@
+WITH league as (SELECT
+                cl.league_id
+                , cl.qb_cnt
+                , cl.rb_cnt
+                , cl.wr_cnt
+                , cl.te_cnt
+                , cl.flex_cnt
+                , cl.sf_cnt
+                , cl.rf_cnt
+                FROM dynastr.current_leagues cl
+                WHERE cl.session_id = 'session_id'
+                and cl.league_id = 'league_id'
+                LIMIT 1)
+
+, ranked as (SELECT ppi.projection_source
+                , lp.user_id
+                , pl.player_id
+                , pl.player_position
+                , ppi.projection as player_value
+                , ROW_NUMBER() OVER (PARTITION BY ppi.projection_source, lp.user_id, pl.player_position ORDER BY ppi.projection desc) as player_order
+                FROM dynastr.league_players lp
+                INNER JOIN dynastr.players pl on lp.player_id = pl.player_id
+                INNER JOIN dynastr.player_projections_index ppi on ppi.player_id = lp.player_id
+                WHERE lp.session_id = 'session_id'
+                and lp.league_id = 'league_id'
+                and pl.player_position IN ('QB', 'RB', 'WR', 'TE'))
+
+, starters as (SELECT r.projection_source
+                , r.user_id
+                , r.player_id
+                FROM ranked r
+                CROSS JOIN league l
+                WHERE (r.player_position = 'QB' and r.player_order <= l.qb_cnt)
+                or (r.player_position = 'RB' and r.player_order <= l.rb_cnt)
+                or (r.player_position = 'WR' and r.player_order <= l.wr_cnt)
+                or (r.player_position = 'TE' and r.player_order <= l.te_cnt))
+
+, flex as (SELECT ns.projection_source
+                , ns.user_id
+                , ns.player_id
+                FROM (SELECT r.projection_source
+                    , r.user_id
+                    , r.player_id
+                    , ROW_NUMBER() OVER (PARTITION BY r.projection_source, r.user_id ORDER BY r.player_value desc) as player_order
+                    FROM ranked r
+                    LEFT JOIN starters s on s.projection_source = r.projection_source and s.player_id = r.player_id
+                    WHERE s.player_id IS NULL
+                    and r.player_position IN ('RB', 'WR', 'TE')) ns
+                CROSS JOIN league l
+                WHERE ns.player_order <= l.flex_cnt)
+
+, super_flex as (SELECT ns_sf.projection_source
+                , ns_sf.user_id
+                , ns_sf.player_id
+                FROM (SELECT r.projection_source
+                    , r.user_id
+                    , r.player_id
+                    , ROW_NUMBER() OVER (PARTITION BY r.projection_source, r.user_id ORDER BY r.player_value desc) as player_order
+                    FROM ranked r
+                    LEFT JOIN (SELECT * FROM starters UNION ALL SELECT * FROM flex) s on s.projection_source = r.projection_source and s.player_id = r.player_id
+                    WHERE s.player_id IS NULL
+                    and r.player_position IN ('QB', 'RB', 'WR', 'TE')) ns_sf
+                CROSS JOIN league l
+                WHERE ns_sf.player_order <= l.sf_cnt)
+
+, rec_flex as (SELECT ns_rf.projection_source
+                , ns_rf.user_id
+                , ns_rf.player_id
+                FROM (SELECT r.projection_source
+                    , r.user_id
+                    , r.player_id
+                    , ROW_NUMBER() OVER (PARTITION BY r.projection_source, r.user_id ORDER BY r.player_value desc) as player_order
+                    FROM ranked r
+                    LEFT JOIN (SELECT * FROM starters UNION ALL SELECT * FROM flex UNION ALL SELECT * FROM super_flex) s on s.projection_source = r.projection_source and s.player_id = r.player_id
+                    WHERE s.player_id IS NULL
+                    and r.player_position IN ('WR', 'TE')) ns_rf
+                CROSS JOIN league l
+                WHERE ns_rf.player_order <= l.rf_cnt)
+
+, source_ranks as (SELECT r.projection_source
+                , r.user_id
+                , RANK() OVER (PARTITION BY r.projection_source ORDER BY sum(r.player_value) desc) as contender_rank
+                FROM ranked r
+                INNER JOIN (SELECT * FROM starters
+                            UNION ALL SELECT * FROM flex
+                            UNION ALL SELECT * FROM super_flex
+                            UNION ALL SELECT * FROM rec_flex) ast on ast.projection_source = r.projection_source and ast.player_id = r.player_id
+                GROUP BY r.projection_source, r.user_id)
+
+INSERT INTO dynastr.ranks_summary (
+    user_id, display_name, league_id
+    , espn_contender_rank, nfl_contender_rank, fp_contender_rank, fc_contender_rank, cbs_contender_rank
+    , updatetime
+)
+SELECT sr.user_id
+, m.display_name
+, 'league_id'
+, max(CASE WHEN sr.projection_source = 'espn' THEN sr.contender_rank END)
+, max(CASE WHEN sr.projection_source = 'nfl' THEN sr.contender_rank END)
+, max(CASE WHEN sr.projection_source = 'fp' THEN sr.contender_rank END)
+, max(CASE WHEN sr.projection_source = 'fc' THEN sr.contender_rank END)
+, max(CASE WHEN sr.projection_source = 'cbs' THEN sr.contender_rank END)
+, now()
+FROM source_ranks sr
+INNER JOIN dynastr.managers m on sr.user_id = m.user_id
+GROUP BY sr.user_id, m.display_name
+ON CONFLICT (user_id, league_id)
+DO UPDATE
+SET
+    display_name = EXCLUDED.display_name,
+    espn_contender_rank = EXCLUDED.espn_contender_rank,
+    nfl_contender_rank = EXCLUDED.nfl_contender_rank,
+    fp_contender_rank = EXCLUDED.fp_contender_rank,
+    fc_contender_rank = EXCLUDED.fc_contender_rank,
+    cbs_contender_rank = EXCLUDED.cbs_contender_rank,
+    updatetime = EXCLUDED.updatetime
+RETURNING user_id, display_name, espn_contender_rank, nfl_contender_rank, fp_contender_rank, fc_contender_rank, cbs_contender_rank
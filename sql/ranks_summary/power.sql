@@ -0,0 +1,304 @@
+WITH league as (SELECT
+                cl.league_id
+                , cl.qb_cnt
+                , cl.rb_cnt
+                , cl.wr_cnt
+                , cl.te_cnt
+                , cl.flex_cnt
+                , cl.sf_cnt
+                , cl.rf_cnt
+                , CASE WHEN cl.sf_cnt > 0 THEN 'sf_value' ELSE 'one_qb_value' END as roster_type
+                , CASE WHEN cl.league_cat = 0 THEN 'redraft' ELSE 'dynasty' END as rank_type
+                FROM dynastr.current_leagues cl
+                WHERE cl.session_id = 'session_id'
+                and cl.league_id = 'league_id'
+                LIMIT 1)
+
+, roster as (SELECT
+                lp.user_id
+                , pl.player_id
+                , pl.full_name
+                , pl.first_name
+                , pl.last_name
+                , pl.player_position
+                FROM dynastr.league_players lp
+                INNER JOIN dynastr.players pl on lp.player_id = pl.player_id
+                WHERE lp.session_id = 'session_id'
+                and lp.league_id = 'league_id'
+                and pl.player_position IN ('QB', 'RB', 'WR', 'TE'))
+
+, picks as (SELECT
+                al.user_id
+                , CASE WHEN (dname.position::integer) < 13 and al.draft_set_flg = 'Y' and al.year = dname.season
+                            THEN al.year || ' Round ' || al.round || ' Pick ' || dname.position
+                        WHEN (dname.position::integer) > 12 and al.draft_set_flg = 'Y' and al.year = dname.season
+                            THEN al.year || ' ' || dname.position_name || ' ' || al.round_name
+                        ELSE al.year || ' Mid ' || al.round_name
+                        END AS pick_name
+                , CASE WHEN al.draft_set_flg = 'Y' and al.year = dname.season THEN al.year || ' Round ' || al.round || ' Pick ' || dname.position
+                        ELSE al.year || ' Round ' || al.round
+                        END AS fc_pick_name
+                , CASE WHEN (dname.position::integer / al.leaguesize < 0.33) and al.draft_set_flg = 'Y' and al.year = dname.season THEN al.year || 'early' || al.round_name || 'pi'
+                        ELSE al.year || 'mid' || al.round_name || 'pi'
+                        END AS dd_pick_name
+                FROM (
+                    SELECT dp.roster_id
+                    , dp.year
+                    , dp.round_name
+                    , dp.round
+                    , dp.league_id
+                    , dpos.user_id
+                    , dpos.season
+                    , dpos.draft_set_flg
+                    , MAX(dpos.roster_id::integer) OVER () as leaguesize
+                    FROM dynastr.draft_picks dp
+                    INNER JOIN dynastr.draft_positions dpos on dp.owner_id = dpos.roster_id and dp.league_id = dpos.league_id
+                    WHERE dpos.league_id = 'league_id'
+                    and dp.session_id = 'session_id'
+                    ) al
+                INNER JOIN dynastr.draft_positions dname on dname.roster_id = al.roster_id and al.league_id = dname.league_id)
+
+, player_values as (SELECT 'ktc' as platform
+                , r.user_id
+                , r.player_id
+                , r.player_position
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN ktc.sf_value ELSE ktc.one_qb_value END, -1) as player_value
+                FROM roster r
+                CROSS JOIN league l
+                INNER JOIN dynastr.ktc_player_ranks ktc on concat(r.first_name, r.last_name) = concat(ktc.player_first_name, ktc.player_last_name)
+                    and ktc.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'sf' as platform
+                , r.user_id
+                , r.player_id
+                , r.player_position
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN sf.superflex_sf_value ELSE sf.superflex_one_qb_value END, -1) as player_value
+                FROM roster r
+                CROSS JOIN league l
+                INNER JOIN dynastr.sf_player_ranks sf on sf.player_full_name = r.full_name
+                    and sf.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'fc' as platform
+                , r.user_id
+                , r.player_id
+                , r.player_position
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN fc.sf_value ELSE fc.one_qb_value END, -1) as player_value
+                FROM roster r
+                CROSS JOIN league l
+                INNER JOIN dynastr.fc_player_ranks fc on concat(r.first_name, r.last_name) = concat(fc.player_first_name, fc.player_last_name)
+                    and fc.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'dd' as platform
+                , r.user_id
+                , r.player_id
+                , r.player_position
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN dd.sf_trade_value ELSE dd.trade_value END, -1) as player_value
+                FROM roster r
+                CROSS JOIN league l
+                INNER JOIN dynastr.dd_player_ranks dd on lower(concat(r.first_name, r.last_name, r.player_position)) = dd.name_id
+                    and dd.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'dp' as platform
+                , r.user_id
+                , r.player_id
+                , r.player_position
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN dp.sf_value ELSE dp.one_qb_value END, -1) as player_value
+                FROM roster r
+                CROSS JOIN league l
+                INNER JOIN dynastr.dp_player_ranks dp on concat(r.first_name, r.last_name) = concat(dp.player_first_name, dp.player_last_name))
+
+, pick_values as (SELECT 'ktc' as platform
+                , p.user_id
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN ktc.sf_value ELSE ktc.one_qb_value END, -1) as pick_value
+                FROM picks p
+                CROSS JOIN league l
+                INNER JOIN dynastr.ktc_player_ranks ktc on ktc.player_full_name = p.pick_name
+                    and ktc.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'sf' as platform
+                , p.user_id
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN sf.superflex_sf_value ELSE sf.superflex_one_qb_value END, -1) as pick_value
+                FROM picks p
+                CROSS JOIN league l
+                INNER JOIN dynastr.sf_player_ranks sf on sf.player_full_name = p.pick_name
+                    and sf.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'fc' as platform
+                , p.user_id
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN fc.sf_value ELSE fc.one_qb_value END, -1) as pick_value
+                FROM picks p
+                CROSS JOIN league l
+                INNER JOIN dynastr.fc_player_ranks fc on fc.player_full_name = p.fc_pick_name
+                    and fc.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'dd' as platform
+                , p.user_id
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN dd.sf_trade_value ELSE dd.trade_value END, -1) as pick_value
+                FROM picks p
+                CROSS JOIN league l
+                INNER JOIN dynastr.dd_player_ranks dd on dd.name_id = p.dd_pick_name
+                    and dd.rank_type = l.rank_type
+                UNION ALL
+                SELECT 'dp' as platform
+                , p.user_id
+                , coalesce(CASE WHEN l.roster_type = 'sf_value' THEN dp.sf_value ELSE dp.one_qb_value END, -1) as pick_value
+                FROM picks p
+                CROSS JOIN league l
+                INNER JOIN dynastr.dp_player_ranks dp on dp.player_full_name = p.pick_name)
+
+, ranked as (SELECT pv.platform
+                , pv.user_id
+                , pv.player_id
+                , pv.player_position
+                , pv.player_value
+                , ROW_NUMBER() OVER (PARTITION BY pv.platform, pv.user_id, pv.player_position ORDER BY pv.player_value desc) as player_order
+                FROM player_values pv)
+
+, starters as (SELECT r.platform
+                , r.user_id
+                , r.player_id
+                FROM ranked r
+                CROSS JOIN league l
+                WHERE (r.player_position = 'QB' and r.player_order <= l.qb_cnt)
+                or (r.player_position = 'RB' and r.player_order <= l.rb_cnt)
+                or (r.player_position = 'WR' and r.player_order <= l.wr_cnt)
+                or (r.player_position = 'TE' and r.player_order <= l.te_cnt))
+
+, flex as (SELECT ns.platform
+                , ns.user_id
+                , ns.player_id
+                FROM (SELECT r.platform
+                    , r.user_id
+                    , r.player_id
+                    , ROW_NUMBER() OVER (PARTITION BY r.platform, r.user_id ORDER BY r.player_value desc) as player_order
+                    FROM ranked r
+                    LEFT JOIN starters s on s.platform = r.platform and s.player_id = r.player_id
+                    WHERE s.player_id IS NULL
+                    and r.player_position IN ('RB', 'WR', 'TE')) ns
+                CROSS JOIN league l
+                WHERE ns.player_order <= l.flex_cnt)
+
+, super_flex as (SELECT ns_sf.platform
+                , ns_sf.user_id
+                , ns_sf.player_id
+                FROM (SELECT r.platform
+                    , r.user_id
+                    , r.player_id
+                    , ROW_NUMBER() OVER (PARTITION BY r.platform, r.user_id ORDER BY r.player_value desc) as player_order
+                    FROM ranked r
+                    LEFT JOIN (SELECT * FROM starters UNION ALL SELECT * FROM flex) s on s.platform = r.platform and s.player_id = r.player_id
+                    WHERE s.player_id IS NULL
+                    and r.player_position IN ('QB', 'RB', 'WR', 'TE')) ns_sf
+                CROSS JOIN league l
+                WHERE ns_sf.player_order <= l.sf_cnt)
+
+, rec_flex as (SELECT ns_rf.platform
+                , ns_rf.user_id
+                , ns_rf.player_id
+                FROM (SELECT r.platform
+                    , r.user_id
+                    , r.player_id
+                    , ROW_NUMBER() OVER (PARTITION BY r.platform, r.user_id ORDER BY r.player_value desc) as player_order
+                    FROM ranked r
+                    LEFT JOIN (SELECT * FROM starters UNION ALL SELECT * FROM flex UNION ALL SELECT * FROM super_flex) s on s.platform = r.platform and s.player_id = r.player_id
+                    WHERE s.player_id IS NULL
+                    and r.player_position IN ('WR', 'TE')) ns_rf
+                CROSS JOIN league l
+                WHERE ns_rf.player_order <= l.rf_cnt)
+
+, all_starters as (SELECT * FROM starters
+                UNION ALL SELECT * FROM flex
+                UNION ALL SELECT * FROM super_flex
+                UNION ALL SELECT * FROM rec_flex)
+
+, platform_totals as (SELECT t.platform
+                , t.user_id
+                , sum(t.starters_value) as starters_value
+                , sum(t.bench_value) as bench_value
+                , sum(t.picks_value) as picks_value
+                FROM (SELECT r.platform
+                    , r.user_id
+                    , CASE WHEN ast.player_id IS NOT NULL THEN r.player_value ELSE 0 END as starters_value
+                    , CASE WHEN ast.player_id IS NULL THEN r.player_value ELSE 0 END as bench_value
+                    , 0 as picks_value
+                    FROM ranked r
+                    LEFT JOIN all_starters ast on ast.platform = r.platform and ast.player_id = r.player_id
+                    UNION ALL
+                    SELECT pv.platform
+                    , pv.user_id
+                    , 0 as starters_value
+                    , 0 as bench_value
+                    , pv.pick_value as picks_value
+                    FROM pick_values pv) t
+                GROUP BY t.platform, t.user_id)
+
+, platform_ranks as (SELECT pt.platform
+                , pt.user_id
+                , RANK() OVER (PARTITION BY pt.platform ORDER BY pt.starters_value + pt.bench_value + pt.picks_value desc) as power_rank
+                , RANK() OVER (PARTITION BY pt.platform ORDER BY pt.starters_value desc) as starters_rank
+                , RANK() OVER (PARTITION BY pt.platform ORDER BY pt.bench_value desc) as bench_rank
+                , RANK() OVER (PARTITION BY pt.platform ORDER BY pt.picks_value desc) as picks_rank
+                FROM platform_totals pt)
+
+INSERT INTO dynastr.ranks_summary (
+    user_id, display_name, league_id
+    , ktc_power_rank, ktc_starters_rank, ktc_bench_rank, ktc_picks_rank
+    , sf_power_rank, sf_starters_rank, sf_bench_rank, sf_picks_rank
+    , fc_power_rank, fc_starters_rank, fc_bench_rank, fc_picks_rank
+    , dd_power_rank, dd_starters_rank, dd_bench_rank, dd_picks_rank
+    , dp_power_rank, dp_starters_rank, dp_bench_rank, dp_picks_rank
+    , updatetime
+)
+SELECT pr.user_id
+, m.display_name
+, 'league_id'
+, max(CASE WHEN pr.platform = 'ktc' THEN pr.power_rank END)
+, max(CASE WHEN pr.platform = 'ktc' THEN pr.starters_rank END)
+, max(CASE WHEN pr.platform = 'ktc' THEN pr.bench_rank END)
+, max(CASE WHEN pr.platform = 'ktc' THEN pr.picks_rank END)
+, max(CASE WHEN pr.platform = 'sf' THEN pr.power_rank END)
+, max(CASE WHEN pr.platform = 'sf' THEN pr.starters_rank END)
+, max(CASE WHEN pr.platform = 'sf' THEN pr.bench_rank END)
+, max(CASE WHEN pr.platform = 'sf' THEN pr.picks_rank END)
+, max(CASE WHEN pr.platform = 'fc' THEN pr.power_rank END)
+, max(CASE WHEN pr.platform = 'fc' THEN pr.starters_rank END)
+, max(CASE WHEN pr.platform = 'fc' THEN pr.bench_rank END)
+, max(CASE WHEN pr.platform = 'fc' THEN pr.picks_rank END)
+, max(CASE WHEN pr.platform = 'dd' THEN pr.power_rank END)
+, max(CASE WHEN pr.platform = 'dd' THEN pr.starters_rank END)
+, max(CASE WHEN pr.platform = 'dd' THEN pr.bench_rank END)
+, max(CASE WHEN pr.platform = 'dd' THEN pr.picks_rank END)
+, max(CASE WHEN pr.platform = 'dp' THEN pr.power_rank END)
+, max(CASE WHEN pr.platform = 'dp' THEN pr.starters_rank END)
+, max(CASE WHEN pr.platform = 'dp' THEN pr.bench_rank END)
+, max(CASE WHEN pr.platform = 'dp' THEN pr.picks_rank END)
+, now()
+FROM platform_ranks pr
+INNER JOIN dynastr.managers m on pr.user_id = m.user_id
+GROUP BY pr.user_id, m.display_name
+ON CONFLICT (user_id, league_id)
+DO UPDATE
+SET
+    display_name = EXCLUDED.display_name,
+    ktc_power_rank = EXCLUDED.ktc_power_rank,
+    ktc_starters_rank = EXCLUDED.ktc_starters_rank,
+    ktc_bench_rank = EXCLUDED.ktc_bench_rank,
+    ktc_picks_rank = EXCLUDED.ktc_picks_rank,
+    sf_power_rank = EXCLUDED.sf_power_rank,
+    sf_starters_rank = EXCLUDED.sf_starters_rank,
+    sf_bench_rank = EXCLUDED.sf_bench_rank,
+    sf_picks_rank = EXCLUDED.sf_picks_rank,
+    fc_power_rank = EXCLUDED.fc_power_rank,
+    fc_starters_rank = EXCLUDED.fc_starters_rank,
+    fc_bench_rank = EXCLUDED.fc_bench_rank,
+    fc_picks_rank = EXCLUDED.fc_picks_rank,
+    dd_power_rank = EXCLUDED.dd_power_rank,
+    dd_starters_rank = EXCLUDED.dd_starters_rank,
+    dd_bench_rank = EXCLUDED.dd_bench_rank,
+    dd_picks_rank = EXCLUDED.dd_picks_rank,
+    dp_power_rank = EXCLUDED.dp_power_rank,
+    dp_starters_rank = EXCLUDED.dp_starters_rank,
+    dp_bench_rank = EXCLUDED.dp_bench_rank,
+    dp_picks_rank = EXCLUDED.dp_picks_rank,
+    updatetime = EXCLUDED.updatetime
+RETURNING user_id, display_name, ktc_power_rank, sf_power_rank, fc_power_rank, dd_power_rank, dp_power_rank
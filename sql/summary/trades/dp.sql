@@ -46,7 +46,7 @@ from
                                     inner join dynastr.players p on pt.player_id = p.player_id
                                     left join dynastr.dp_player_ranks dpr on concat(p.first_name, p.last_name) = concat(dpr.player_first_name, dpr.player_last_name)
                                     inner join dynastr.draft_positions dp on pt.roster_id = dp.roster_id and dp.league_id = pt.league_id
-                                    inner join dynastr.managers m on cast(dp.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on dp.user_id = m.user_id
                                     where 1=1
                                     and pt.league_id = 'league_id'
 
@@ -90,7 +90,7 @@ from
                                                 and dpt.league_id = 'league_id' 
                                                 )  a1
                                     inner join dynastr.dp_player_ranks dpr on a1.player_name = dpr.player_full_name
-                                    inner join dynastr.managers m on cast(a1.user_id as varchar) = cast(m.user_id as varchar)
+                                    inner join dynastr.managers m on a1.user_id = m.user_id
                                     where 1=1 
 
                                     order by status_updated desc
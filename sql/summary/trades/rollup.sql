@@ -0,0 +1,26 @@
+select
+display_name
+,trades_cnt
+, NTILE(10) OVER (ORDER BY trades_cnt desc) cnt_tile
+, total_add
+, NTILE(10) OVER (ORDER BY total_add desc) add_tile
+, total_drop
+, NTILE(10) OVER (ORDER BY total_drop asc) drop_tile
+, total_diff
+, NTILE(10) OVER (ORDER BY total_diff desc) diff_tile
+, avg_per_trade
+, NTILE(10) OVER (ORDER BY avg_per_trade desc) avg_tile
+from
+    (SELECT display_name
+        , count(distinct transaction_id) trades_cnt
+        , sum(league_type_add_total) as total_add
+        , sum(league_type_drop_total) as total_drop
+        , sum(league_type_net_gain) as total_diff
+        , sum(league_type_net_gain) / count(distinct transaction_id) as avg_per_trade
+    FROM dynastr.trade_rollups
+    WHERE league_id = 'league_id'
+    AND platform = 'platform'
+    AND rank_type = 'rank_type'
+    AND num_managers > 1
+    GROUP BY display_name
+    order by trades_cnt desc) t3
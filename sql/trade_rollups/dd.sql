@@ -0,0 +1,124 @@
+-- Values every trade side for dd and upserts it into dynastr.trade_rollups.
+-- $1 limits the run to one league and $2 to a set of transaction ids; NULL
+-- for either covers everything (the bulk revalue after a ranks load).
+WITH rank_types AS (
+    SELECT unnest(array['dynasty', 'redraft']) as rank_type
+)
+, managers AS (
+    SELECT DISTINCT league_id, roster_id, user_id
+    FROM dynastr.draft_positions
+    WHERE ($1::varchar IS NULL OR league_id = $1)
+)
+, player_assets AS (
+    SELECT pt.league_id
+        , pt.transaction_id
+        , pt.status_updated
+        , mg.user_id
+        , pt.transaction_type
+        , rt.rank_type
+        , p.full_name as asset
+        , p.player_id
+        , p.player_position as _position
+        , coalesce(dd.sf_trade_value, 0) as sf_value
+        , coalesce(dd.trade_value, 0) as one_qb_value
+    FROM dynastr.player_trades pt
+    INNER JOIN dynastr.players p on pt.player_id = p.player_id
+    INNER JOIN managers mg on pt.roster_id = mg.roster_id and pt.league_id = mg.league_id
+    CROSS JOIN rank_types rt
+    LEFT JOIN dynastr.dd_player_ranks dd on lower(concat(p.first_name, p.last_name, p.player_position)) = dd.name_id and dd.rank_type = rt.rank_type
+    WHERE ($1::varchar IS NULL OR pt.league_id = $1)
+    AND ($2::varchar[] IS NULL OR pt.transaction_id = any($2::varchar[]))
+)
+, pick_names AS (
+    SELECT dpt.league_id
+        , dpt.transaction_id
+        , dpt.status_updated
+        , mg.user_id
+        , dpt.transaction_type
+        , CASE WHEN (ddp.position::numeric / ddp.league_size < 0.33) and ddp.draft_set_flg = 'Y' and dpt.season = ddp.season
+                THEN dpt.season || 'early' || dpt.round || 'pi'
+            WHEN (ddp.position::numeric / ddp.league_size) > 0.66 and ddp.draft_set_flg = 'Y' and dpt.season = ddp.season
+                THEN dpt.season || 'late' || dpt.round || 'pi'
+            ELSE dpt.season || 'mid' || dpt.round || 'pi'
+            END AS asset
+    FROM dynastr.draft_pick_trades dpt
+    INNER JOIN managers mg on dpt.roster_id = mg.roster_id and dpt.league_id = mg.league_id
+    -- The original owner's slot for the traded season, if its draft is set
+    LEFT JOIN LATERAL (
+        SELECT ddp.season
+            , ddp.position
+            , ddp.position_name
+            , ddp.draft_set_flg
+            , (SELECT max(lp.roster_id::integer) FROM dynastr.draft_positions lp WHERE lp.league_id = dpt.league_id) as league_size
+        FROM dynastr.draft_positions ddp
+        WHERE ddp.league_id = dpt.league_id
+        AND ddp.roster_id = dpt.org_owner_id
+        ORDER BY (ddp.season = dpt.season) DESC
+        LIMIT 1
+    ) ddp on true
+    WHERE ($1::varchar IS NULL OR dpt.league_id = $1)
+    AND ($2::varchar[] IS NULL OR dpt.transaction_id = any($2::varchar[]))
+)
+, pick_assets AS (
+    SELECT pn.league_id
+        , pn.transaction_id
+        , pn.status_updated
+        , pn.user_id
+        , pn.transaction_type
+        , rt.rank_type
+        , pn.asset
+        , null as player_id
+        , '' as _position
+        , coalesce(dd.sf_trade_value, 0) as sf_value
+        , coalesce(dd.trade_value, 0) as one_qb_value
+    FROM pick_names pn
+    CROSS JOIN rank_types rt
+    LEFT JOIN dynastr.dd_player_ranks dd on pn.asset = dd.name_id and dd.rank_type = rt.rank_type
+)
+, sides AS (
+    SELECT league_id
+        , transaction_id
+        , max(status_updated) as status_updated
+        , user_id
+        , rank_type
+        , jsonb_agg(jsonb_build_object(
+            'transaction_type', transaction_type
+            , 'asset', asset
+            , 'player_id', player_id
+            , '_position', _position
+            , 'sf_value', sf_value
+            , 'one_qb_value', one_qb_value) ORDER BY sf_value DESC) as assets
+        , sum(CASE WHEN transaction_type = 'add' THEN sf_value ELSE 0 END) as sf_add_total
+        , sum(CASE WHEN transaction_type = 'drop' THEN sf_value ELSE 0 END) as sf_drop_total
+        , sum(CASE WHEN transaction_type = 'add' THEN one_qb_value ELSE 0 END) as one_qb_add_total
+        , sum(CASE WHEN transaction_type = 'drop' THEN one_qb_value ELSE 0 END) as one_qb_drop_total
+    FROM (SELECT * FROM player_assets UNION ALL SELECT * FROM pick_assets) assets
+    GROUP BY league_id, transaction_id, user_id, rank_type
+)
+INSERT INTO dynastr.trade_rollups (league_id, platform, rank_type, transaction_id, status_updated, user_id, display_name, num_managers, assets, sf_add_total, sf_drop_total, one_qb_add_total, one_qb_drop_total, valued_at)
+SELECT s.league_id
+    , 'dd'
+    , s.rank_type
+    , s.transaction_id
+    , s.status_updated
+    , s.user_id
+    , m.display_name
+    , count(*) OVER (PARTITION BY s.league_id, s.transaction_id, s.rank_type)
+    , s.assets
+    , s.sf_add_total
+    , s.sf_drop_total
+    , s.one_qb_add_total
+    , s.one_qb_drop_total
+    , now()
+FROM sides s
+LEFT JOIN dynastr.managers m on s.user_id = m.user_id
+ON CONFLICT (league_id, platform, rank_type, transaction_id, user_id)
+DO UPDATE SET status_updated = EXCLUDED.status_updated
+    , display_name = EXCLUDED.display_name
+    , num_managers = EXCLUDED.num_managers
+    , assets = EXCLUDED.assets
+    , sf_add_total = EXCLUDED.sf_add_total
+    , sf_drop_total = EXCLUDED.sf_drop_total
+    , one_qb_add_total = EXCLUDED.one_qb_add_total
+    , one_qb_drop_total = EXCLUDED.one_qb_drop_total
+    , valued_at = EXCLUDED.valued_at;
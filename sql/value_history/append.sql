@@ -0,0 +1,130 @@
+-- Appends today's values from every rank source and the consensus to
+-- dynastr.player_value_history. Assets are keyed as in sql/consensus/compute.sql.
+-- A sample is added only when an asset's value changed since its last one;
+-- a second load on the same day replaces that day's sample. Unchanged
+-- assets just have last_seen moved forward.
+WITH source_values AS (
+    SELECT 'ktc' as source
+        , ktc.rank_type
+        , p.player_id
+        , ktc.player_full_name
+        , ktc.position as _position
+        , ktc.sf_value::numeric as sf_value
+        , ktc.one_qb_value::numeric as one_qb_value
+    FROM dynastr.ktc_player_ranks ktc
+    LEFT JOIN dynastr.players p on concat(p.first_name, p.last_name) = concat(ktc.player_first_name, ktc.player_last_name)
+    UNION ALL
+    SELECT 'sf' as source
+        , sf.rank_type
+        , p.player_id
+        , sf.player_full_name
+        , sf._position
+        , sf.superflex_sf_value::numeric
+        , sf.superflex_one_qb_value::numeric
+    FROM dynastr.sf_player_ranks sf
+    LEFT JOIN dynastr.players p on sf.player_full_name = p.full_name
+    UNION ALL
+    SELECT 'fc' as source
+        , fc.rank_type
+        , fc.sleeper_player_id
+        , fc.player_full_name
+        , fc.player_position
+        , fc.sf_value::numeric
+        , fc.one_qb_value::numeric
+    FROM dynastr.fc_player_ranks fc
+    UNION ALL
+    SELECT 'dd' as source
+        , dd.rank_type
+        , p.player_id
+        -- Picks have no player row; their name_id reads like "2025mid1stpi"
+        , coalesce(p.full_name, dd.name_id)
+        , p.player_position
+        , dd.sf_trade_value::numeric
+        , dd.trade_value::numeric
+    FROM dynastr.dd_player_ranks dd
+    LEFT JOIN dynastr.players p on lower(concat(p.first_name, p.last_name, p.player_position)) = dd.name_id
+    UNION ALL
+    SELECT 'dp' as source
+        , 'dynasty' as rank_type
+        , p.player_id
+        , dp.player_full_name
+        , dp.player_position
+        , dp.sf_value::numeric
+        , dp.one_qb_value::numeric
+    FROM dynastr.dp_player_ranks dp
+    LEFT JOIN dynastr.players p on dp.player_full_name = p.full_name
+    UNION ALL
+    SELECT 'consensus' as source
+        , cv.rank_type
+        , cv.player_id
+        , cv.player_full_name
+        , cv._position
+        , cv.sf_value::numeric
+        , cv.one_qb_value::numeric
+    FROM dynastr.consensus_player_values cv
+)
+, keyed AS (
+    SELECT DISTINCT ON (source, rank_type, asset_key) *
+    FROM (
+        SELECT sv.*
+            , CASE WHEN sv.player_full_name ~* '^[0-9]{4}( ?[a-z]| [0-9])' THEN dynastr.pick_asset_key(sv.player_full_name)
+                ELSE sv.player_id
+                END as asset_key
+            , sv.player_full_name ~* '^[0-9]{4}( ?[a-z]| [0-9])' as is_pick
+        FROM source_values sv
+        WHERE coalesce(sv.sf_value, 0) > 0 OR coalesce(sv.one_qb_value, 0) > 0
+    ) k
+    WHERE asset_key IS NOT NULL
+    ORDER BY source, rank_type, asset_key, sf_value DESC NULLS LAST
+)
+, current_values AS (
+    SELECT source
+        , rank_type
+        , asset_key
+        , round(coalesce(sf_value, 0))::integer as sf_value
+        , round(coalesce(one_qb_value, 0))::integer as one_qb_value
+    FROM keyed
+)
+INSERT INTO dynastr.player_value_history AS h (source, rank_type, asset_key, base_date, day_deltas, sf_deltas,
+                                               one_qb_deltas, last_date, last_sf_value, last_one_qb_value, last_seen)
+SELECT source
+    , rank_type
+    , asset_key
+    , current_date
+    , ARRAY[0]
+    , ARRAY[sf_value]
+    , ARRAY[one_qb_value]
+    , current_date
+    , sf_value
+    , one_qb_value
+    , current_date
+FROM current_values
+ON CONFLICT (source, rank_type, asset_key) DO UPDATE SET
+    day_deltas = CASE
+        WHEN (h.last_sf_value, h.last_one_qb_value) = (EXCLUDED.last_sf_value, EXCLUDED.last_one_qb_value)
+            OR h.last_date = current_date THEN h.day_deltas
+        ELSE array_append(h.day_deltas, current_date - h.last_date)
+        END
+    , sf_deltas = CASE
+        WHEN (h.last_sf_value, h.last_one_qb_value) = (EXCLUDED.last_sf_value, EXCLUDED.last_one_qb_value) THEN h.sf_deltas
+        WHEN h.last_date = current_date
+            THEN h.sf_deltas[1:cardinality(h.sf_deltas) - 1]
+                 || (h.sf_deltas[cardinality(h.sf_deltas)] + EXCLUDED.last_sf_value - h.last_sf_value)
+        ELSE array_append(h.sf_deltas, EXCLUDED.last_sf_value - h.last_sf_value)
+        END
+    , one_qb_deltas = CASE
+        WHEN (h.last_sf_value, h.last_one_qb_value) = (EXCLUDED.last_sf_value, EXCLUDED.last_one_qb_value) THEN h.one_qb_deltas
+        WHEN h.last_date = current_date
+            THEN h.one_qb_deltas[1:cardinality(h.one_qb_deltas) - 1]
+                 || (h.one_qb_deltas[cardinality(h.one_qb_deltas)] + EXCLUDED.last_one_qb_value - h.last_one_qb_value)
+        ELSE array_append(h.one_qb_deltas, EXCLUDED.last_one_qb_value - h.last_one_qb_value)
+        END
+    , last_date = CASE
+        WHEN (h.last_sf_value, h.last_one_qb_value) = (EXCLUDED.last_sf_value, EXCLUDED.last_one_qb_value) THEN h.last_date
+        ELSE current_date
+        END
+    , last_sf_value = EXCLUDED.last_sf_value
+    , last_one_qb_value = EXCLUDED.last_one_qb_value
+    , last_seen = current_date
+WHERE (h.last_sf_value, h.last_one_qb_value) <> (EXCLUDED.last_sf_value, EXCLUDED.last_one_qb_value)
+    OR h.last_seen < current_date;
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
@@ -18,6 +20,27 @@ class RosterDataModel(BaseModel):
     league_year: str
 
 
+class RefreshAllDataModel(BaseModel):
+    user_id: str
+    guid: str
+    league_year: str
+    # Defaults to every league /user_details stored for the session
+    league_ids: Optional[List[str]] = None
+
+
+class TradeEvaluateDataModel(BaseModel):
+    platform: str
+    rank_type: str
+    roster_type: str
+    # trades[i][side] lists Sleeper player ids or pick descriptors ("2025 Mid 1st")
+    trades: List[List[List[str]]]
+
+
+class LeagueRanksDataModel(BaseModel):
+    league_id: str
+    guid: str
+
+
 class RanksDataModel(BaseModel):
     user_id: str
     display_name: str
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+
+import aiofiles
+
+from db import logger
+from query_stats import query_tag
+
+# Platforms with a sql/player_values/calc template (dd's is empty)
+TRADE_VALUE_PLATFORMS = ["ktc", "sf", "fc", "dp", "consensus"]
+TRADE_VALUE_TTL_SECONDS = float(os.getenv("trade_value_ttl_seconds", "900"))
+MAX_TRADES_PER_REQUEST = int(os.getenv("max_trades_per_request", "500"))
+
+NAME_SUFFIXES = re.compile(r"\b(jr|sr|ii|iii|iv|v)\b")
+NON_ALNUM = re.compile(r"[^a-z0-9]")
+# "2025 Round 1 Pick 5", "2025 1.05", "2025 1 5" all name the same pick
+PICK_SLOT = re.compile(r"^(\d{4})\s*(?:round\s*)?(\d+)\s*[\s.]\s*(?:pick\s*)?(\d+)$")
+
+
+def asset_key(name: str) -> str:
+    # Matching key shared by the calc rows, dynastr.players names and the
+    # descriptors callers send, so "2025 Mid 1st" and "2025 mid 1st" agree
+    name = name.strip().lower()
+    slot = PICK_SLOT.match(name)
+    if slot:
+        year, round_, pick = slot.groups()
+        return f"{year}pick{int(round_)}.{int(pick)}"
+    return NON_ALNUM.sub("", NAME_SUFFIXES.sub("", name))
+
+
+class TradeValueIndex:
+    """Values from the sql/player_values/calc templates per platform and rank
+    type, keyed by asset name, plus the Sleeper id to name map used to look
+    up players by id."""
+
+    def __init__(self):
+        # (platform, rank_type) -> {asset key: (name, position, sf_value, one_qb_value)}
+        self.values = {}
+        self.loaded_at = {}
+        self.sleeper_names = {}
+        self.sleeper_loaded_at = None
+        self.lock = asyncio.Lock()
+
+    def invalidate(self, platform: str = None):
+        for key in list(self.loaded_at):
+            if platform is None or key[0] == platform:
+                del self.loaded_at[key]
+
+    def fresh(self, loaded_at) -> bool:
+        return loaded_at is not None and time.monotonic() - loaded_at < TRADE_VALUE_TTL_SECONDS
+
+    async def ensure_loaded(self, db, platform: str, rank_type: str):
+        key = (platform, rank_type)
+        if self.fresh(self.loaded_at.get(key)) and self.fresh(self.sleeper_loaded_at):
+            return
+        async with self.lock:
+            if not self.fresh(self.sleeper_loaded_at):
+                with query_tag("trade_values/players"):
+                    rows = await db.fetch("SELECT player_id, full_name FROM dynastr.players WHERE full_name IS NOT NULL")
+                self.sleeper_names = {row["player_id"]: row["full_name"] for row in rows}
+                self.sleeper_loaded_at = time.monotonic()
+
+            if self.fresh(self.loaded_at.get(key)):
+                return
+            sql_path = Path.cwd() / "sql" / "player_values" / "calc" / rank_type / f"{platform}.sql"
+            async with aiofiles.open(sql_path, mode='r') as calc_file:
+                calc_sql = await calc_file.read()
+            with query_tag(f"player_values/calc/{rank_type}/{platform}"):
+                rows = await db.fetch(calc_sql)
+
+            values = {}
+            for row in rows:
+                entry = (row["player_full_name"], row["_position"], row["sf_value"] or 0, row["one_qb_value"] or 0)
+                # Rows come highest value first; keep that one on a name clash
+                values.setdefault(asset_key(row["player_full_name"]), entry)
+            self.values[key] = values
+            self.loaded_at[key] = time.monotonic()
+            logger.info(f"Loaded trade values for {platform}/{rank_type}: {len(values)} assets")
+
+    def lookup(self, platform: str, rank_type: str, asset: str):
+        # Sleeper player ids first, then names and pick descriptors
+        values = self.values.get((platform, rank_type), {})
+        name = self.sleeper_names.get(asset)
+        if name is not None:
+            found = values.get(asset_key(name))
+            if found is not None:
+                return found
+        return values.get(asset_key(asset))
+
+    async def evaluate(self, db, platform: str, rank_type: str, roster: str, trades: list) -> list:
+        await self.ensure_loaded(db, platform, rank_type)
+        value_index = 2 if roster == "sf" else 3
+
+        results = []
+        for sides in trades:
+            evaluated_sides = []
+            for assets in sides:
+                side_assets = []
+                for asset in assets:
+                    found = self.lookup(platform, rank_type, asset)
+                    side_assets.append({
+                        "asset": asset,
+                        "name": found[0] if found else None,
+                        "position": found[1] if found else None,
+                        "value": found[value_index] if found else 0,
+                        "matched": found is not None,
+                    })
+                evaluated_sides.append({"total": sum(a["value"] for a in side_assets), "assets": side_assets})
+
+            totals = [side["total"] for side in evaluated_sides]
+            results.append({
+                "sides": evaluated_sides,
+                # Two sides: first minus second; more: spread between best and worst
+                "difference": totals[0] - totals[1] if len(totals) == 2 else (max(totals) - min(totals) if totals else 0),
+                "best_side": totals.index(max(totals)) if totals else None,
+            })
+        return results
+
+
+trade_value_index = TradeValueIndex()
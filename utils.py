@@ -1,62 +1,118 @@
-import requests
-from requests.exceptions import RequestException
-from time import sleep
-from psycopg2.extras import execute_batch, execute_values
-from superflex_models import UserDataModel, LeagueDataModel, RosterDataModel, RanksDataModel
+from superflex_models import UserDataModel, RosterDataModel, RanksDataModel
+from collections import OrderedDict
 from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from contextlib import asynccontextmanager
 import asyncio
+import base64
+import json
+import os
+import time
 import aiohttp
+import aiofiles
 import traceback
+from sleeper_client import sleeper_client, SLEEPER_API
+from db import logger, primary_connection
+from query_stats import query_tag, record_league_size
+from payloads import normalize_leagues, normalize_rosters, normalize_trades, offload, round_suffix
+
+CONTENDER_SOURCES = ["espn", "cbs", "nfl", "fp", "fc"]
+TRADE_ROLLUP_PLATFORMS = ["ktc", "sf", "fc", "dd", "dp"]
 
 
 async def make_api_call(url, params=None, headers=None, timeout=10, max_retries=5, backoff_factor=1):
-    async with aiohttp.ClientSession() as session:
-        for retry in range(max_retries):
-            try:
-                async with session.get(url, params=params, headers=headers, timeout=timeout) as response:
-                    response.raise_for_status()
-                    return await response.json()
-            except aiohttp.ClientError as e:
-                if retry < max_retries - 1:
-                    sleep_time = backoff_factor * (2 ** retry)
-                    print(f"Error while making API call: {e}. Retrying in {sleep_time} seconds...")
-                    await asyncio.sleep(sleep_time)
-                else:
-                    print(f"Error while making API call: {e}. Reached maximum retries ({max_retries}).")
-                    raise
+    # All Sleeper traffic shares one rate limiter, concurrency cap and circuit breaker per worker
+    return await sleeper_client.get(url, params=params, headers=headers, timeout=timeout,
+                                    max_retries=max_retries, backoff_factor=backoff_factor)
+
 
+# Sleeper user ids never change, unknown usernames are retried much sooner
+USER_ID_TTL_SECONDS = int(os.getenv("user_id_ttl_seconds", str(30 * 24 * 3600)))
+USER_NOT_FOUND_TTL_SECONDS = int(os.getenv("user_not_found_ttl_seconds", "300"))
+# Not-found lookups are cached too, so any username typed in can take a slot
+USER_ID_CACHE_MAX_ENTRIES = int(os.getenv("user_id_cache_max_entries", "50000"))
 
-def dedupe(lst):
-    dup_free_set = set()
-    for x in lst:
-        t = tuple(x)
-        if t not in dup_free_set:
-            dup_free_set.add(t)
-    return list(dup_free_set)
+# user_name -> (user_id or None, expires_at), in front of dynastr.users,
+# least recently used first
+user_id_cache = OrderedDict()
 
 
-def round_suffix(rank: int) -> str:
-    ith = {1: "st", 2: "nd", 3: "rd"}.get(
-        rank % 10 * (rank % 100 not in [11, 12, 13]), "th"
+async def lookup_user_id(db, user_name: str):
+    # Returns (found, user_id) from the users table while the row is fresh
+    row = await db.fetchrow(
+        """
+        SELECT user_id, extract(epoch from now() - resolved_at) as age_seconds
+        FROM dynastr.users
+        WHERE user_name = $1
+        """,
+        user_name,
     )
-    return f"{str(rank)}{ith}"
+    if row is None:
+        return False, None
+    ttl = USER_ID_TTL_SECONDS if row["user_id"] else USER_NOT_FOUND_TTL_SECONDS
+    if row["age_seconds"] > ttl:
+        return False, None
+    return True, row["user_id"]
 
 
-async def get_user_id(user_name: str) -> str:
+async def store_user_id(user_name: str, user_id: str) -> None:
     try:
-        user_url = f"https://api.sleeper.app/v1/user/{user_name}"
-        user_data = await make_api_call(user_url)
-        return user_data["user_id"]
-    except KeyError:
-        raise ValueError(f"User ID not found for user: {user_name}")
+        async with primary_connection() as primary:
+            await primary.execute(
+                """
+                INSERT INTO dynastr.users (user_name, user_id, resolved_at)
+                VALUES ($1, $2, now())
+                ON CONFLICT (user_name)
+                DO UPDATE SET user_id = EXCLUDED.user_id, resolved_at = EXCLUDED.resolved_at;
+                """,
+                user_name, user_id,
+            )
     except Exception as e:
-        raise ConnectionError(f"Failed to fetch user data: {e}")
+        logger.error(f"Failed to store user id for {user_name}: {e}")
+
+
+async def get_user_id(user_name: str, db=None) -> str:
+    # Resolves through the in-process cache, then dynastr.users, and only then
+    # Sleeper; misses are cached as not found for USER_NOT_FOUND_TTL_SECONDS.
+    key = user_name.strip().lower()
+    cached = user_id_cache.get(key)
+    if cached is not None and cached[1] > time.monotonic():
+        user_id = cached[0]
+        user_id_cache.move_to_end(key)
+    else:
+        found = False
+        if db is not None:
+            found, user_id = await lookup_user_id(db, key)
+        if not found:
+            try:
+                user_url = f"{SLEEPER_API}/user/{user_name}"
+                user_data = await make_api_call(user_url)
+                user_id = user_data["user_id"] if user_data else None
+            except aiohttp.ClientResponseError as e:
+                if e.status != 404:
+                    raise ConnectionError(f"Failed to fetch user data: {e}")
+                user_id = None
+            except KeyError:
+                user_id = None
+            except Exception as e:
+                raise ConnectionError(f"Failed to fetch user data: {e}")
+            await store_user_id(key, user_id)
+        ttl = USER_ID_TTL_SECONDS if user_id else USER_NOT_FOUND_TTL_SECONDS
+        user_id_cache[key] = (user_id, time.monotonic() + ttl)
+        user_id_cache.move_to_end(key)
+        while len(user_id_cache) > USER_ID_CACHE_MAX_ENTRIES:
+            user_id_cache.popitem(last=False)
+
+    if user_id is None:
+        raise ValueError(f"User ID not found for user: {user_name}")
+    return user_id
 
 
 
 async def get_user_name(user_id: str):
     try:
-        username_url = f"https://api.sleeper.app/v1/user/{user_id}"
+        username_url = f"{SLEEPER_API}/user/{user_id}"
         user_meta = await make_api_call(username_url)
         return (user_meta["username"], user_meta["display_name"])
     except KeyError:
@@ -69,50 +125,19 @@ async def get_user_name(user_id: str):
 
 
 
-async def get_user_leagues(user_name: str, league_year: str) -> list:
-    owner_id = await get_user_id(user_name)  # Ensure this call is awaited
+async def get_user_leagues(user_name: str, league_year: str, owner_id: str = None) -> list:
+    if owner_id is None:
+        owner_id = await get_user_id(user_name)  # Ensure this call is awaited
     leagues_json = await make_api_call(
-        f"https://api.sleeper.app/v1/user/{owner_id}/leagues/nfl/{league_year}"
+        f"{SLEEPER_API}/user/{owner_id}/leagues/nfl/{league_year}"
     )  # Ensure this call is awaited
 
-    leagues = []
-    for league in leagues_json:
-        qbs = len([i for i in league["roster_positions"] if i == "QB"])
-        rbs = len([i for i in league["roster_positions"] if i == "RB"])
-        wrs = len([i for i in league["roster_positions"] if i == "WR"])
-        tes = len([i for i in league["roster_positions"] if i == "TE"])
-        flexes = len([i for i in league["roster_positions"] if i == "FLEX"])
-        super_flexes = len([i for i in league["roster_positions"] if i == "SUPER_FLEX"])
-        rec_flexes = len([i for i in league["roster_positions"] if i == "REC_FLEX"])
-        starters = sum([qbs, rbs, wrs, tes, flexes, super_flexes, rec_flexes])
-
-        leagues.append(
-            (
-                league["name"],
-                league["league_id"],
-                league.get("avatar", ""),
-                league["total_rosters"],
-                qbs,
-                rbs,
-                wrs,
-                tes,
-                flexes,
-                super_flexes,
-                starters,
-                len(league["roster_positions"]),
-                league["sport"],
-                rec_flexes,
-                league["settings"]["type"],
-                league_year,
-                league.get("previous_league_id", None),
-            )
-        )
-    return leagues
+    return await offload(normalize_leagues, leagues_json, league_year, size=len(leagues_json))
 
 
 
 async def clean_league_managers(db, league_id: str):
-    delete_query = f"""
+    delete_query = """
         DELETE FROM dynastr.managers 
         WHERE league_id = $1;
     """
@@ -161,7 +186,7 @@ async def clean_draft_positions(db, league_id: str):
 
 
 async def get_managers(league_id: str) -> list:
-    url = f"https://api.sleeper.app/v1/league/{league_id}/users"
+    url = f"{SLEEPER_API}/league/{league_id}/users"
     res = await make_api_call(url)  # Ensure this call is asynchronous
     manager_data = [
         ["sleeper", i["user_id"], league_id, i.get("avatar", ""), i["display_name"]]
@@ -171,26 +196,26 @@ async def get_managers(league_id: str) -> list:
 
 
 async def get_league_rosters_size(league_id: str) -> int:
-    url = f"https://api.sleeper.app/v1/league/{league_id}"
+    url = f"{SLEEPER_API}/league/{league_id}"
     league_res = await make_api_call(url)  # Using the async version of make_api_call
     return league_res["total_rosters"]
 
 
 
 async def get_league_rosters(league_id: str) -> list:
-    url = f"https://api.sleeper.app/v1/league/{league_id}/rosters"
+    url = f"{SLEEPER_API}/league/{league_id}/rosters"
     rosters = await make_api_call(url)
     return rosters
 
 async def get_traded_picks(league_id: str) -> list:
-    url = f"https://api.sleeper.app/v1/league/{league_id}/traded_picks"
+    url = f"{SLEEPER_API}/league/{league_id}/traded_picks"
     total_res = await make_api_call(url)  # Using the async version of make_api_call
     return total_res
 
 
 
 async def get_draft_id(league_id: str) -> dict:
-    url = f"https://api.sleeper.app/v1/league/{league_id}/drafts"
+    url = f"{SLEEPER_API}/league/{league_id}/drafts"
     draft_res = await make_api_call(url)  # Using the async version of make_api_call
     if draft_res and isinstance(draft_res, list) and len(draft_res) > 0:
         draft_meta = draft_res[0]  # Assume the first draft is what we need
@@ -201,14 +226,14 @@ async def get_draft_id(league_id: str) -> dict:
 
 
 async def get_draft(draft_id: str):
-    draft_res_url = f"https://api.sleeper.app/v1/draft/{draft_id}"
+    draft_res_url = f"{SLEEPER_API}/draft/{draft_id}"
     draft_res = await make_api_call(draft_res_url)
     return draft_res
 
 
 async def get_roster_ids(league_id: str) -> list:
     try:
-        roster_meta_url = f"https://api.sleeper.app/v1/league/{league_id}/rosters"
+        roster_meta_url = f"{SLEEPER_API}/league/{league_id}/rosters"
         roster_meta = await make_api_call(roster_meta_url)
         return [(r["owner_id"], str(r["roster_id"])) for r in roster_meta]
     except Exception as e:
@@ -218,7 +243,7 @@ async def get_roster_ids(league_id: str) -> list:
 
 
 async def get_full_league(league_id: str):
-    l_res_url = f"https://api.sleeper.app/v1/league/{league_id}/rosters"
+    l_res_url = f"{SLEEPER_API}/league/{league_id}/rosters"
     l_res = await make_api_call(l_res_url)
     return l_res
 
@@ -256,6 +281,149 @@ async def insert_ranks_summary(db, ranks_data: RanksDataModel):
     return
 
 
+async def insert_league_ranks_summary(db, league_id: str, session_id: str) -> dict:
+    # Values every power platform and every projection source for the league and
+    # upserts the complete ranks_summary row for each manager, so the client no
+    # longer posts one /ranks_summary per platform.
+    results = {}
+    async with db.transaction():
+        for rank_source in ["power", "contender"]:
+            sql_path = Path.cwd() / "sql" / "ranks_summary" / f"{rank_source}.sql"
+            async with aiofiles.open(sql_path, mode='r') as ranks_file:
+                ranks_sql = await ranks_file.read()
+                ranks_sql = (ranks_sql.replace("'session_id'", f"'{session_id}'")
+                             .replace("'league_id'", f"'{league_id}'"))
+            with query_tag(f"ranks_summary/{rank_source}", league_id):
+                results[rank_source] = await db.fetch(ranks_sql)
+    return results
+
+
+async def refresh_projection_index(db) -> None:
+    # Rebuilds dynastr.player_projections_index from the *_player_projections
+    # tables. Run after a projections load so the contender views read points
+    # keyed by sleeper id instead of re-matching names on every request.
+    sql_path = Path.cwd() / "sql" / "projections" / "refresh_index.sql"
+    async with aiofiles.open(sql_path, mode='r') as refresh_file:
+        refresh_sql = await refresh_file.read()
+
+    async with db.transaction():
+        with query_tag("projections/refresh_index"):
+            await db.execute(refresh_sql)
+    return
+
+
+async def update_trade_rollups(db, league_id: str = None, transaction_ids: list = None, platforms: list = None) -> int:
+    # Values trade sides into dynastr.trade_rollups. With a league and
+    # transaction ids only those trades are (re)valued; with neither every
+    # rolled up trade is revalued, which is what a ranks load needs.
+    rows = 0
+    for platform in platforms or TRADE_ROLLUP_PLATFORMS:
+        sql_path = Path.cwd() / "sql" / "trade_rollups" / f"{platform}.sql"
+        async with aiofiles.open(sql_path, mode='r') as rollup_file:
+            rollup_sql = await rollup_file.read()
+        with query_tag(f"trade_rollups/{platform}", league_id, incremental=transaction_ids is not None):
+            status = await db.execute(rollup_sql, league_id, transaction_ids)
+        rows += int(status.split()[-1])
+    return rows
+
+
+async def refresh_trade_rollups(db, league_id: str, transaction_ids: list) -> int:
+    # Drops rollups for trades Sleeper no longer reports, then values the
+    # trades that are new since the last refresh. Pick trades are always
+    # revalued because their asset names follow the draft order.
+    await db.execute("""
+        DELETE FROM dynastr.trade_rollups
+        WHERE league_id = $1 AND NOT (transaction_id = any($2::varchar[]));
+    """, league_id, transaction_ids)
+
+    rolled_up = await db.fetch("""
+        SELECT DISTINCT transaction_id FROM dynastr.trade_rollups
+        WHERE league_id = $1 AND transaction_id = any($2::varchar[])
+        AND NOT EXISTS (SELECT 1 FROM dynastr.draft_pick_trades dpt
+                        WHERE dpt.league_id = $1 AND dpt.transaction_id = trade_rollups.transaction_id);
+    """, league_id, transaction_ids)
+    current = {row["transaction_id"] for row in rolled_up}
+    stale = [transaction_id for transaction_id in transaction_ids if transaction_id not in current]
+    if not stale:
+        return 0
+    return await update_trade_rollups(db, league_id, stale)
+
+
+async def refresh_consensus_values(db) -> int:
+    # Rebuilds dynastr.consensus_player_values from every rank source. Run in
+    # one transaction so readers keep the previous consensus until it commits.
+    sql_path = Path.cwd() / "sql" / "consensus" / "compute.sql"
+    async with aiofiles.open(sql_path, mode='r') as consensus_file:
+        consensus_sql = await consensus_file.read()
+    async with db.transaction():
+        await db.execute("DELETE FROM dynastr.consensus_player_values")
+        with query_tag("consensus/compute"):
+            status = await db.execute(consensus_sql)
+    return int(status.split()[-1])
+
+
+RANKINGS_FIELDS = ["player_full_name", "_position", "team", "rank_type", "superflex_sf_value",
+                   "superflex_sf_rank", "superflex_sf_pos_rank", "superflex_one_qb_value",
+                   "superflex_one_qb_rank", "superflex_one_qb_pos_rank", "insert_date"]
+RANKINGS_MAX_LIMIT = int(os.getenv("rankings_max_limit", "1000"))
+# Must match the expression in sf_player_ranks_rank_type_value_idx
+RANKINGS_SORT_VALUE = "(coalesce(superflex_sf_value, -1)::numeric)"
+
+
+def encode_rankings_cursor(row) -> str:
+    # Opaque keyset cursor: the sort value and player name of the last row
+    sort_value = row["superflex_sf_value"] if row["superflex_sf_value"] is not None else -1
+    payload = json.dumps([str(sort_value), row["player_full_name"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_rankings_cursor(cursor: str):
+    try:
+        sort_value, player_full_name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return Decimal(sort_value), str(player_full_name)
+    except (ValueError, TypeError, ArithmeticError):
+        raise ValueError("Invalid cursor")
+
+
+def build_rankings_query(rank_type: str, fields: list, limit: int = None, cursor: str = None,
+                         positions: list = None, teams: list = None, min_value: float = None,
+                         max_value: float = None, updated_since: datetime = None):
+    # Builds the parameterized /v1/rankings query. Rows are ordered by
+    # (value, player_full_name) descending so a page can resume after the
+    # cursor row with a row comparison the index answers directly.
+    # fields are validated against RANKINGS_FIELDS by the caller.
+    columns = list(dict.fromkeys(fields + ["superflex_sf_value", "player_full_name"]))
+    args = [rank_type]
+    conditions = ["rank_type = $1"]
+
+    def arg(value):
+        args.append(value)
+        return f"${len(args)}"
+
+    if cursor is not None:
+        sort_value, player_full_name = decode_rankings_cursor(cursor)
+        conditions.append(f"({RANKINGS_SORT_VALUE}, player_full_name) < ({arg(sort_value)}::numeric, {arg(player_full_name)})")
+    if positions:
+        conditions.append(f"_position = any({arg(positions)}::varchar[])")
+    if teams:
+        conditions.append(f"team = any({arg(teams)}::varchar[])")
+    if min_value is not None:
+        conditions.append(f"{RANKINGS_SORT_VALUE} >= {arg(Decimal(str(min_value)))}::numeric")
+    if max_value is not None:
+        conditions.append(f"{RANKINGS_SORT_VALUE} <= {arg(Decimal(str(max_value)))}::numeric")
+    if updated_since is not None:
+        conditions.append(f"insert_date::timestamp >= {arg(updated_since)}")
+
+    query = f"""
+        SELECT {", ".join(columns)}
+        FROM dynastr.sf_player_ranks
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {RANKINGS_SORT_VALUE} DESC, player_full_name DESC
+    """
+    if limit is not None:
+        # One extra row tells us whether there is a next page
+        query += f" LIMIT {arg(limit + 1)}"
+    return query, args
 
 
 async def insert_current_leagues(db, user_data: UserDataModel):
@@ -263,9 +431,9 @@ async def insert_current_leagues(db, user_data: UserDataModel):
     user_name = user_data.user_name
     league_year = user_data.league_year
     
-    # Execute synchronous code asynchronously
-    leagues = await get_user_leagues(user_name, league_year)
-    user_id = await get_user_id(user_name)
+    # Resolve the user once and share it with the leagues lookup
+    user_id = await get_user_id(user_name, db)
+    leagues = await get_user_leagues(user_name, league_year, user_id)
     
     session_id = user_data.guid
     entry_time = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f%z")
@@ -280,6 +448,9 @@ async def insert_current_leagues(db, user_data: UserDataModel):
             await db.execute(delete_user_leagues_query)
             print(f"Leagues for user: {user_id} cleaned.")
 
+            for league in leagues:
+                record_league_size(league[1], league[3])
+
             # Prepare data tuple for insertion
             values = [
                 (
@@ -317,7 +488,7 @@ async def insert_current_leagues(db, user_data: UserDataModel):
                     league_year, previous_league_id
                 )
                 VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21)
-                ON CONFLICT (session_id, league_id) DO UPDATE 
+                ON CONFLICT (session_id, league_id, partition_date) DO UPDATE 
                 SET
                     user_id = excluded.user_id,
                     user_name = excluded.user_name,
@@ -452,37 +623,28 @@ async def insert_managers(db, managers: list):
     # Execute the batch operation
     async with db.transaction():
         await db.executemany(sql, values)
-    return
+    return len(values)
 
 
 
-async def insert_league_rosters(db, session_id: str, user_id: str, league_id: str) -> None:
+async def insert_league_rosters(db, session_id: str, user_id: str, league_id: str) -> int:
     entry_time = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f%z")
     rosters = await get_league_rosters(league_id)  # Ensure this is an async call
 
-    league_players = []
-    for roster in rosters:
-        league_roster = roster["players"]
-        try:
-            for player_id in league_roster:
-                league_players.append(
-                    (session_id, user_id, player_id, roster["league_id"],
-                     roster.get("owner_id", "EMPTY"), entry_time)
-                )
-        except KeyError:
-            continue  # Skip any rosters that do not have the necessary data
+    league_players = await offload(normalize_rosters, rosters, session_id, user_id, entry_time,
+                                   size=sum(len(roster.get("players") or []) for roster in rosters))
 
     sql = """
         INSERT INTO dynastr.league_players 
         (session_id, owner_user_id, player_id, league_id, user_id, insert_date)
         VALUES ($1, $2, $3, $4, $5, $6)
-        ON CONFLICT (session_id, user_id, player_id, league_id)
+        ON CONFLICT (session_id, user_id, player_id, league_id, partition_date)
         DO UPDATE SET insert_date = EXCLUDED.insert_date;
     """
     # Execute the batch insertion using executemany
     async with db.transaction():
         await db.executemany(sql, league_players)
-    return
+    return len(league_players)
 
 
 async def total_owned_picks(
@@ -497,7 +659,8 @@ async def total_owned_picks(
         base_picks = {}
     if traded_picks_all is None:
         traded_picks_all = {}
-    
+
+    inserted = 0
     if startup is not None:
         league_size =  await get_league_rosters_size(league_id)
         total_picks =  await get_traded_picks(league_id)
@@ -543,14 +706,15 @@ async def total_owned_picks(
                 sql = """
                     INSERT INTO dynastr.draft_picks (year, round, round_name, roster_id, owner_id, league_id, draft_id, session_id)
                     VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                    ON CONFLICT (year, round, roster_id, owner_id, league_id, session_id)
+                    ON CONFLICT (year, round, roster_id, owner_id, league_id, session_id, partition_date)
                     DO UPDATE SET round_name = EXCLUDED.round_name, draft_id = EXCLUDED.draft_id;
                 """
                 async with db.transaction():
                     await db.executemany(sql, draft_picks)
-    return
+                inserted += len(draft_picks)
+    return inserted
 
-async def draft_positions(db, league_id: str, user_id: str, draft_order: list = None) -> None:
+async def draft_positions(db, league_id: str, user_id: str, draft_order: list = None) -> int:
     if draft_order is None:
         draft_order = []
     
@@ -605,7 +769,7 @@ async def draft_positions(db, league_id: str, user_id: str, draft_order: list =
     async with db.transaction():
         await db.executemany(sql, draft_order)
     
-    return
+    return len(draft_order)
 
 
 async def clean_player_trades(db, league_id: str) -> None:
@@ -636,7 +800,7 @@ async def get_trades(league_id: str, nfl_state: dict, year_entered: str) -> list
     all_trades = []
 
     async def fetch_week_transactions(week):
-        url = f"https://api.sleeper.app/v1/league/{league_id}/transactions/{week}"
+        url = f"{SLEEPER_API}/league/{league_id}/transactions/{week}"
         transactions = await make_api_call(url)
         all_trades.extend([t for t in transactions if t["type"] == "trade"])
 
@@ -654,7 +818,7 @@ async def get_trades(league_id: str, nfl_state: dict, year_entered: str) -> list
 
 async def get_sleeper_state() -> str:
     try:
-        url = "https://api.sleeper.app/v1/state/nfl"
+        url = f"{SLEEPER_API}/state/nfl"
         state = await make_api_call(url)
         return state
     except Exception as e:
@@ -663,82 +827,9 @@ async def get_sleeper_state() -> str:
 
 
 
-async def insert_trades(db, trades: dict, league_id: str) -> None:
-    player_adds_db = []
-    player_drops_db = []
-    draft_adds_db = []
-    draft_drops_db = []
-
-    for trade in trades:
-       for roster_id in trade["roster_ids"]:
-            player_adds = trade["adds"] if trade["adds"] else {}
-            player_drops = trade["drops"] if trade["drops"] else {}
-            draft_picks = trade["draft_picks"] if trade["draft_picks"] else [{}]
-
-            for a_player_id, a_id in [
-                [k, v] for k, v in player_adds.items() if v == roster_id
-            ]:
-                player_adds_db.append(
-                    [
-                        str(trade["transaction_id"]),
-                        str(trade["status_updated"]),
-                        str(a_id),
-                        "add",
-                        str(a_player_id),
-                        str(league_id),
-                    ]
-                )
-            for d_player_id, d_id in [
-                [k, v] for k, v in player_drops.items() if v == roster_id
-            ]:
-
-                player_drops_db.append(
-                    [
-                        str(trade["transaction_id"]),
-                        str(trade["status_updated"]),
-                        str(d_id),
-                        "drop",
-                        str(d_player_id),
-                        str(league_id),
-                    ]
-                )
-
-            for pick in draft_picks:
-                draft_picks_ = [v for k, v in pick.items()]
-
-                if draft_picks_:
-                    suffix = round_suffix(draft_picks_[1])
-                    draft_adds_db.append(
-                        [
-                            str(trade["transaction_id"]),
-                            str(trade["status_updated"]),
-                            str(draft_picks_[4]),
-                            "add",
-                            str(draft_picks_[0]),
-                            str(draft_picks_[1]),
-                            str(suffix),
-                            str(draft_picks_[2]),
-                            str(league_id),
-                        ]
-                    )
-                    draft_drops_db.append(
-                        [
-                            str(trade["transaction_id"]),
-                            str(trade["status_updated"]),
-                            draft_picks_[3],
-                            "drop",
-                            str(draft_picks_[0]),
-                            str(draft_picks_[1]),
-                            str(suffix),
-                            str(draft_picks_[2]),
-                            str(league_id),
-                        ]
-                    )
-
-    draft_adds_db = dedupe(draft_adds_db)
-    player_adds_db = dedupe(player_adds_db)
-    player_drops_db = dedupe(player_drops_db)
-    draft_drops_db = dedupe(draft_drops_db)
+async def insert_trades(db, trades: dict, league_id: str) -> int:
+    player_adds_db, player_drops_db, draft_adds_db, draft_drops_db = await offload(
+        normalize_trades, trades, league_id, size=len(trades))
 
     # Use asyncpg's executemany for batch operations within a transaction
     async with db.transaction():
@@ -760,11 +851,38 @@ async def insert_trades(db, trades: dict, league_id: str) -> None:
         await db.executemany(player_adds_query, player_adds_db)
         await db.executemany(player_drops_query, player_drops_db)
 
-    return
+        transaction_ids = list({str(trade["transaction_id"]) for trade in trades})
+        await refresh_trade_rollups(db, str(league_id), transaction_ids)
+
+    return len(draft_adds_db) + len(draft_drops_db) + len(player_adds_db) + len(player_drops_db)
 
 
 
-async def player_manager_rosters(db, roster_data: RosterDataModel):
+@asynccontextmanager
+async def refresh_stage(progress, stage: str):
+    # Reports a refresh stage's start, finish, timing and row count to an
+    # optional RefreshProgress; the caller sets stage_result["rows"]
+    started = time.monotonic()
+    stage_result = {"rows": None}
+    if progress is not None:
+        await progress.emit("stage_start", stage=stage)
+    try:
+        yield stage_result
+    except Exception as e:
+        if progress is not None:
+            await progress.emit("stage_error", stage=stage, error=str(e),
+                                seconds=round(time.monotonic() - started, 3))
+        raise
+    if progress is not None:
+        await progress.emit("stage_finish", stage=stage, rows=stage_result["rows"],
+                            seconds=round(time.monotonic() - started, 3))
+
+
+async def player_manager_rosters(db, roster_data: RosterDataModel, progress=None, nfl_state: dict = None,
+                                 league_fresh: bool = False):
+    # league_fresh skips the league-wide managers, draft positions and trades
+    # stages when another session refreshed this league moments ago; the
+    # session's own rosters, picks and ranks are always rebuilt
     session_id = roster_data.guid
     user_id = roster_data.user_id
     league_id = roster_data.league_id
@@ -773,56 +891,79 @@ async def player_manager_rosters(db, roster_data: RosterDataModel):
 
     try:
         # Perform cleaning operations
-        print("performing roster cleaning operations")
-        await clean_league_managers(db, league_id)
-        await clean_league_rosters(db, session_id, league_id)
-        await clean_league_picks(db, league_id, session_id)
-        await clean_draft_positions(db, league_id)
+        async with refresh_stage(progress, "cleaning"):
+            print("performing roster cleaning operations")
+            if not league_fresh:
+                await clean_league_managers(db, league_id)
+            await clean_league_rosters(db, session_id, league_id)
+            await clean_league_picks(db, league_id, session_id)
+            if not league_fresh:
+                await clean_draft_positions(db, league_id)
     except Exception as e:
         print('issue1', e)
         return e
-    try:
-        print("fetching managers")
-        # Fetch managers and insert them
-        managers = await get_managers(league_id) 
-        await insert_managers(db, managers) 
-    except Exception as e:
-        print('issue2', e)
-        return e
+    if not league_fresh:
+        try:
+            async with refresh_stage(progress, "managers") as stage:
+                print("fetching managers")
+                # Fetch managers and insert them
+                managers = await get_managers(league_id) 
+                stage["rows"] = await insert_managers(db, managers) 
+        except Exception as e:
+            print('issue2', e)
+            return e
     
         
     try:
-        print("Inserting rosters and managing picks")
-        # Insert rosters and manage picks
-        await insert_league_rosters(db, session_id, user_id, league_id)
+        async with refresh_stage(progress, "rosters") as stage:
+            print("Inserting rosters and managing picks")
+            # Insert rosters and manage picks
+            stage["rows"] = await insert_league_rosters(db, session_id, user_id, league_id)
     except Exception as e:
         print('issue3', e)
         return e    
     
     print("Getting trades")
-    await total_owned_picks(db, league_id, session_id, startup)
-    await draft_positions(db, league_id, user_id)
+    async with refresh_stage(progress, "picks") as stage:
+        stage["rows"] = await total_owned_picks(db, league_id, session_id, startup)
+    if not league_fresh:
+        async with refresh_stage(progress, "draft_positions") as stage:
+            stage["rows"] = await draft_positions(db, league_id, user_id)
 
    
 
+    if not league_fresh:
+        try:
+            async with refresh_stage(progress, "trade_cleaning"):
+                print("cleaning trades")
+                # Handle trades
+                await clean_player_trades(db, league_id)
+                await clean_draft_trades(db, league_id)
+        except Exception as e:
+            print('issue4', e)
+            return e
+        try:
+            async with refresh_stage(progress, "trades_fetch") as stage:
+                # Get trades and insert them
+                # A bulk refresh fetches the state once and passes it to every league
+                trades = await get_trades(league_id, nfl_state or await get_sleeper_state(), year_entered)
+                stage["rows"] = len(trades)
+        except Exception as e:
+            print('issue5', e)
+            return e
+        try:
+            async with refresh_stage(progress, "trades_insert") as stage:
+                print("inserting Trades")
+                stage["rows"] = await insert_trades(db, trades, league_id)
+        except Exception as e:
+            print(f"Issue: {e}")
+            traceback.print_exc()  # This prints the stack trace to stdout
+            return e
     try:
-        print("cleaning trades")
-        # Handle trades
-        await clean_player_trades(db, league_id)
-        await clean_draft_trades(db, league_id)
-    except Exception as e:
-        print('issue4', e)
-        return e
-    try:
-        # Get trades and insert them
-        trades = await get_trades(league_id, await get_sleeper_state(), year_entered)
-    except Exception as e:
-        print('issue5', e)
-        return e
-    try:
-        print("inserting Trades")
-        await insert_trades(db, trades, league_id)
+        async with refresh_stage(progress, "ranks") as stage:
+            print("ranking league")
+            ranks = await insert_league_ranks_summary(db, league_id, session_id)
+            stage["rows"] = sum(len(rows) for rows in ranks.values())
     except Exception as e:
-        print(f"Issue: {e}")
-        traceback.print_exc()  # This prints the stack trace to stdout
+        print('issue6', e)
         return e
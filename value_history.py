@@ -0,0 +1,107 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import aiofiles
+
+from payloads import round_suffix
+from query_stats import query_tag
+from trade_values import NON_ALNUM, PICK_SLOT
+
+# Sources with history; dp has no rank_type and is stored as dynasty only
+VALUE_HISTORY_SOURCES = ["ktc", "sf", "fc", "dd", "dp", "consensus"]
+MAX_TREND_DAYS = 3650
+
+# A year followed by a word or, after a space, a slot: "2025 Mid 1st",
+# "2025mid1stpi", "2025 1.05", but not a numeric Sleeper player id
+PICK_NAME = re.compile(r"^[0-9]{4}( ?[a-zA-Z]| [0-9])")
+ROUND_ONLY = re.compile(r"^(\d{4})\s*round\s*(\d+)$")
+DD_PICK = re.compile(r"^(\d{4}(?:early|mid|late)\d+(?:st|nd|rd|th))pi$")
+
+
+def pick_asset_key(name: str) -> str:
+    # Mirrors dynastr.pick_asset_key() from migration 013
+    name = name.strip().lower()
+    slot = PICK_SLOT.match(name)
+    if slot:
+        year, round_, pick = slot.groups()
+        return f"pick:{year}pick{int(round_)}.{int(pick)}"
+    round_only = ROUND_ONLY.match(name)
+    if round_only:
+        year, round_ = round_only.groups()
+        return f"pick:{year}mid{round_suffix(int(round_))}"
+    return "pick:" + DD_PICK.sub(r"\1", NON_ALNUM.sub("", name))
+
+
+def history_asset_key(player_id: str = None, asset: str = None):
+    # Same keys as sql/value_history/append.sql: Sleeper ids for players,
+    # dynastr.pick_asset_key() for picks
+    if asset and PICK_NAME.match(asset):
+        return pick_asset_key(asset)
+    return player_id
+
+
+def history_rank_type(source: str, rank_type: str) -> str:
+    # fc trades are valued on dynasty ranks and dp only has dynasty
+    return "dynasty" if source in ("fc", "dp") else rank_type
+
+
+async def append_value_history(db) -> int:
+    # Run after each ranks load, once the consensus is rebuilt
+    sql_path = Path.cwd() / "sql" / "value_history" / "append.sql"
+    async with aiofiles.open(sql_path, mode='r') as append_file:
+        append_sql = await append_file.read()
+    with query_tag("value_history/append"):
+        status = await db.execute(append_sql)
+    return int(status.split()[-1])
+
+
+async def value_trend(db, source: str, rank_type: str, asset_key: str, days: int) -> dict:
+    # Samples of the last `days` days, led by the value carried into the
+    # window so a flat stretch still has a starting point
+    with query_tag("value_history/trend"):
+        rows = await db.fetch("""
+            SELECT h.base_date + (sum(u.d) OVER w)::integer as value_date
+                , (sum(u.sf) OVER w)::integer as sf_value
+                , (sum(u.oq) OVER w)::integer as one_qb_value
+            FROM dynastr.player_value_history h
+            CROSS JOIN LATERAL unnest(h.day_deltas, h.sf_deltas, h.one_qb_deltas) WITH ORDINALITY AS u(d, sf, oq, i)
+            WHERE h.source = $1 AND h.rank_type = $2 AND h.asset_key = $3
+            WINDOW w AS (ORDER BY u.i)
+            ORDER BY u.i;
+        """, source, history_rank_type(source, rank_type), asset_key)
+
+    start = date.today() - timedelta(days=days)
+    carried = [r for r in rows if r["value_date"] <= start][-1:]
+    points = [{"date": start if r["value_date"] < start else r["value_date"],
+               "sf_value": r["sf_value"], "one_qb_value": r["one_qb_value"]}
+              for r in carried + [r for r in rows if r["value_date"] > start]]
+
+    trend = {"source": source, "rank_type": rank_type, "asset_key": asset_key, "days": days, "points": points}
+    if points:
+        trend["sf_change"] = points[-1]["sf_value"] - points[0]["sf_value"]
+        trend["one_qb_change"] = points[-1]["one_qb_value"] - points[0]["one_qb_value"]
+    return trend
+
+
+async def values_at(db, source: str, rank_type: str, roster: str, lookups: list) -> dict:
+    # {(asset_key, date): value} for many assets at many dates in one query
+    if not lookups:
+        return {}
+    asset_keys = [asset_key for asset_key, _ in lookups]
+    dates = [at for _, at in lookups]
+    with query_tag("value_history/values_at", source=source, roster=roster):
+        rows = await db.fetch(f"""
+            SELECT k.asset_key
+                , k.at
+                , dynastr.history_value_at(h.base_date, h.day_deltas, h.{roster}_deltas, k.at) as value
+            FROM unnest($1::varchar[], $2::date[]) AS k(asset_key, at)
+            INNER JOIN dynastr.player_value_history h
+                on h.source = $3 and h.rank_type = $4 and h.asset_key = k.asset_key;
+        """, asset_keys, dates, source, history_rank_type(source, rank_type))
+    return {(row["asset_key"], row["at"]): row["value"] for row in rows}
+
+
+def trade_date(status_updated) -> date:
+    # Sleeper timestamps are epoch milliseconds
+    return datetime.fromtimestamp(int(str(status_updated)[:10]), tz=timezone.utc).date()